@@ -0,0 +1,369 @@
+"""
+Archive Module for Polymarket Copytrading Bot
+
+Moves historic_trades rows older than ARCHIVE_AFTER_DAYS out of the hot
+table into day-partitioned Arrow IPC files:
+
+    ARCHIVE_DIR/historic_trades/day=2024-05-01/part-<ns>.arrow
+
+Repeated text (wallets, titles, slugs, icons, bios, profile images) is
+dictionary-encoded, so each distinct value is stored once per file. The
+files are left uncompressed so the reader can memory-map them and hand
+out zero-copy tables for a time and wallet range, e.g. to the backtest.
+
+The retention job archives in batches and deletes each batch from the
+hot table only after its files are on disk. Rows already present in a
+day's files (same unique_activity_key) are not written twice, so a run
+interrupted between writing and pruning just prunes them next time.
+
+Usage:
+    python scripts/archive.py                       # archive + prune rows older than ARCHIVE_AFTER_DAYS
+    python scripts/archive.py --older-than-days 7 --keep-rows
+    python scripts/archive.py --list
+
+Requires pyarrow.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # Optional dependency, only needed for archiving
+    pa = None
+    pc = None
+
+from logger import get_logger
+from watermark import activity_key
+
+logger = get_logger(__name__)
+
+TABLE = 'historic_trades'
+
+# Rows read from the hot table per query / archived and pruned per batch
+PAGE_SIZE = 1000
+BATCH_ROWS = 50000
+
+# Column -> Arrow type name; "dict" columns are dictionary-encoded strings
+COLUMN_TYPES = {
+    'id': 'int64',
+    'proxy_wallet': 'dict',
+    'timestamp': 'int64',
+    'activity_datetime': 'string',
+    'condition_id': 'dict',
+    'type': 'dict',
+    'size': 'float64',
+    'usdc_size': 'float64',
+    'transaction_hash': 'string',
+    'price': 'float64',
+    'asset': 'dict',
+    'side': 'dict',
+    'outcome_index': 'int64',
+    'title': 'dict',
+    'slug': 'dict',
+    'icon': 'dict',
+    'event_slug': 'dict',
+    'outcome': 'dict',
+    'trader_name': 'dict',
+    'pseudonym': 'dict',
+    'bio': 'dict',
+    'profile_image': 'dict',
+    'profile_image_optimized': 'dict',
+    'unique_activity_key': 'string',
+    'created_at': 'string',
+    'updated_at': 'string',
+}
+
+
+def _arrow_type(name: str):
+    if name == 'dict':
+        return pa.dictionary(pa.int32(), pa.string())
+    return {'int64': pa.int64(), 'float64': pa.float64(), 'string': pa.string()}[name]
+
+
+def archive_schema():
+    return pa.schema([(column, _arrow_type(kind)) for column, kind in COLUMN_TYPES.items()])
+
+
+def _convert(value, kind: str):
+    """Database value (numbers may come back as strings) to the column's Python type"""
+    if value is None:
+        return None
+    if kind == 'int64':
+        return int(value)
+    if kind == 'float64':
+        return float(value)
+    return str(value)
+
+
+def rows_to_table(rows: List[dict]):
+    """Build an Arrow table of historic_trades rows, dictionary-encoding the repeated text"""
+    arrays = []
+    for column, kind in COLUMN_TYPES.items():
+        values = [_convert(row.get(column), kind) for row in rows]
+        if kind == 'dict':
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, type=_arrow_type(kind)))
+    return pa.Table.from_arrays(arrays, schema=archive_schema())
+
+
+def day_of(timestamp) -> str:
+    return datetime.fromtimestamp(int(timestamp), tz=timezone.utc).strftime('%Y-%m-%d')
+
+
+class ArchiveReader:
+    """
+    Reads the day partitions of the archive through memory maps
+
+    Args:
+        archive_dir: ARCHIVE_DIR
+        table: Archived table name
+    """
+
+    def __init__(self, archive_dir: str, table: str = TABLE):
+        self.root = os.path.join(archive_dir, table)
+
+    def days(self, start: Optional[float] = None, end: Optional[float] = None) -> List[str]:
+        """Archived days (YYYY-MM-DD) overlapping [start, end), oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        first = day_of(start) if start is not None else None
+        last = day_of(end) if end is not None else None
+        days = []
+        for entry in sorted(os.listdir(self.root)):
+            if not entry.startswith('day='):
+                continue
+            day = entry[4:]
+            if (first is None or day >= first) and (last is None or day <= last):
+                days.append(day)
+        return days
+
+    def parts(self, day: str) -> List[str]:
+        directory = os.path.join(self.root, f"day={day}")
+        if not os.path.isdir(directory):
+            return []
+        return [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if name.endswith('.arrow')]
+
+    def _open(self, path: str):
+        # Zero-copy: the table's buffers point into the mapped file
+        return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+    def read(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        wallets: Optional[Iterable[str]] = None,
+        columns: Optional[List[str]] = None,
+    ):
+        """
+        Archived rows with start <= timestamp < end, optionally of some wallets only
+
+        Args:
+            start: Epoch seconds (None = from the first archived day)
+            end: Epoch seconds, exclusive (None = up to the last archived day)
+            wallets: Proxy wallets to keep (lowercase, as stored)
+            columns: Columns to return (default: all)
+
+        Returns:
+            pyarrow.Table
+        """
+        value_set = pa.array(sorted({wallet.lower() for wallet in wallets}), type=pa.string()) if wallets else None
+        tables = []
+        for day in self.days(start, end):
+            for path in self.parts(day):
+                table = self._open(path)
+                mask = None
+                if start is not None:
+                    mask = pc.greater_equal(table['timestamp'], int(start))
+                if end is not None:
+                    below = pc.less(table['timestamp'], int(end))
+                    mask = below if mask is None else pc.and_(mask, below)
+                if value_set is not None:
+                    in_wallets = pc.is_in(table['proxy_wallet'].cast(pa.string()), value_set=value_set)
+                    mask = in_wallets if mask is None else pc.and_(mask, in_wallets)
+                if mask is not None:
+                    table = table.filter(mask)
+                if columns:
+                    table = table.select(columns)
+                tables.append(table)
+        if not tables:
+            schema = archive_schema()
+            return schema.empty_table().select(columns) if columns else schema.empty_table()
+        return pa.concat_tables(tables)
+
+    def rows(self, *args, **kwargs) -> List[dict]:
+        """read() as a list of dictionaries"""
+        return self.read(*args, **kwargs).to_pylist()
+
+    def keys(self, day: str) -> set:
+        """unique_activity_key of every row archived for a day"""
+        keys = set()
+        for path in self.parts(day):
+            keys.update(self._open(path).column('unique_activity_key').to_pylist())
+        return keys
+
+    def stats(self) -> Dict[str, dict]:
+        """Rows, files and bytes per archived day"""
+        stats = {}
+        for day in self.days():
+            parts = self.parts(day)
+            stats[day] = {
+                'files': len(parts),
+                'rows': sum(pa.ipc.open_file(pa.memory_map(path, 'r')).read_all().num_rows for path in parts),
+                'bytes': sum(os.path.getsize(path) for path in parts),
+            }
+        return stats
+
+
+def write_partitions(rows: List[dict], archive_dir: str, table: str = TABLE) -> dict:
+    """
+    Append rows to their day partitions, skipping rows already archived
+
+    Returns:
+        dict: 'written' rows, 'duplicates' skipped, 'files' created, 'bytes' written
+    """
+    reader = ArchiveReader(archive_dir, table)
+    by_day: Dict[str, List[dict]] = {}
+    for row in rows:
+        row = dict(row)
+        # Same key the database generates
+        row['unique_activity_key'] = row.get('unique_activity_key') or activity_key(row)
+        by_day.setdefault(day_of(row['timestamp']), []).append(row)
+
+    result = {'written': 0, 'duplicates': 0, 'files': 0, 'bytes': 0}
+    for day, day_rows in sorted(by_day.items()):
+        archived = reader.keys(day)
+        new_rows = [row for row in day_rows if row['unique_activity_key'] not in archived]
+        result['duplicates'] += len(day_rows) - len(new_rows)
+        if not new_rows:
+            continue
+        new_rows.sort(key=lambda row: (int(row['timestamp']), int(row.get('id') or 0)))
+        directory = os.path.join(reader.root, f"day={day}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"part-{time.time_ns()}.arrow")
+        tmp_path = path + '.tmp'
+        arrow_table = rows_to_table(new_rows)
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, arrow_table.schema) as writer:
+                writer.write_table(arrow_table)
+        os.replace(tmp_path, path)
+        result['written'] += len(new_rows)
+        result['files'] += 1
+        result['bytes'] += os.path.getsize(path)
+    return result
+
+
+def archive_trades(storage, table_name: str, archive_dir: str, older_than_days: float, prune: bool = True) -> dict:
+    """
+    Archive (and prune) the rows of the hot table older than older_than_days
+
+    Rows are read in id order and handled BATCH_ROWS at a time: the batch is
+    written to its day partitions, then deleted from the table by id range
+    and age, so rows inserted meanwhile are never pruned unarchived.
+
+    Args:
+        storage: Storage client (see storage.get_storage_client)
+        table_name: Hot table (TABLE_NAME_TRADES)
+        archive_dir: ARCHIVE_DIR
+        older_than_days: Age in days past which rows are archived
+        prune: Delete the archived rows from the hot table
+
+    Returns:
+        dict: Totals of the run ('rows', 'written', 'duplicates', 'files', 'bytes', 'pruned')
+    """
+    cutoff = int(time.time() - older_than_days * 86400)
+    totals = {'rows': 0, 'written': 0, 'duplicates': 0, 'files': 0, 'bytes': 0, 'pruned': 0}
+    last_id = 0
+    while True:
+        batch = []
+        while len(batch) < BATCH_ROWS:
+            page = (
+                storage.table(table_name).select("*")
+                .lt('timestamp', cutoff).gt('id', last_id)
+                .order('id').limit(PAGE_SIZE)
+                .execute().data or []
+            )
+            batch.extend(page)
+            if page:
+                last_id = int(page[-1]['id'])
+            if len(page) < PAGE_SIZE:
+                break
+        if not batch:
+            break
+
+        result = write_partitions(batch, archive_dir, TABLE)
+        totals['rows'] += len(batch)
+        for key in ('written', 'duplicates', 'files', 'bytes'):
+            totals[key] += result[key]
+        if prune:
+            response = (
+                storage.table(table_name).delete(count="exact", returning="minimal")
+                .lt('timestamp', cutoff).gte('id', int(batch[0]['id'])).lte('id', last_id)
+                .execute()
+            )
+            totals['pruned'] += response.count if response.count is not None else len(batch)
+        logger.debug("Archived batch", rows=len(batch), written=result['written'], last_id=last_id)
+        if len(batch) < BATCH_ROWS:
+            break
+
+    if totals['rows']:
+        logger.info(
+            "🗜️  Archive", rows=totals['written'], files=totals['files'],
+            mb=round(totals['bytes'] / 1e6, 1), duplicates=totals['duplicates'], pruned=totals['pruned'],
+        )
+    return totals
+
+
+async def archive_loop(interval: float, storage_factory, table_name: str, archive_dir: str, older_than_days: float):
+    """Run the retention job every interval seconds"""
+    if pa is None:
+        logger.warning("⚠️  pyarrow is not installed, trade archiving is disabled")
+        return
+    while True:
+        try:
+            await asyncio.to_thread(archive_trades, storage_factory(), table_name, archive_dir, older_than_days)
+        except Exception as e:
+            logger.error("❌ Archiving failed", error=str(e))
+        await asyncio.sleep(interval)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Archive old historic_trades rows into day-partitioned Arrow files")
+    parser.add_argument("--older-than-days", type=float, help="Archive rows older than this (default: ARCHIVE_AFTER_DAYS)")
+    parser.add_argument("--dir", help="Archive directory (default: ARCHIVE_DIR)")
+    parser.add_argument("--keep-rows", action="store_true", help="Do not delete archived rows from the table")
+    parser.add_argument("--list", action="store_true", help="List the archived days and exit")
+    args = parser.parse_args(argv)
+
+    if pa is None:
+        print("❌ pyarrow is required for archiving: pip install pyarrow")
+        return 1
+
+    from config import get_config
+    config = get_config()
+    archive_dir = args.dir or config.ARCHIVE_DIR
+
+    if args.list:
+        stats = ArchiveReader(archive_dir).stats()
+        for day, day_stats in stats.items():
+            print(f"📅 {day}: {day_stats['rows']} rows in {day_stats['files']} files ({day_stats['bytes'] / 1e6:.2f} MB)")
+        print(f"🗜️  {len(stats)} days, {sum(s['rows'] for s in stats.values())} rows")
+        return 0
+
+    from storage import get_storage_client
+    older_than_days = args.older_than_days if args.older_than_days is not None else config.ARCHIVE_AFTER_DAYS
+    totals = archive_trades(get_storage_client(), config.TABLE_NAME_TRADES, archive_dir, older_than_days, prune=not args.keep_rows)
+    if not totals['rows']:
+        print(f"🗜️  Nothing older than {older_than_days:g} days to archive")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
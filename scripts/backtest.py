@@ -0,0 +1,333 @@
+"""
+Backtest Module for Polymarket Copytrading Bot
+
+Replays historic_trades (from the storage backend or an exported CSV/JSON
+file) against a grid of sizing parameters in one pass. Trades are loaded
+into columnar numpy arrays; everything that does not depend on the
+parameters (trader positions, SELL fractions, redeem payouts) is computed
+vectorized up front, and the replay then walks the trades once while every
+parameter set is updated together as one vector.
+
+Copy rules replayed (per trade, without the coalescing window):
+  - BUY:    stake = size * price * STAKE_WHALE_PCT, clamped to
+            [STAKE_MIN, STAKE_MAX] and to the cash left from BANKROLL
+  - SELL:   same fraction of our shares as the trader sold of theirs
+            (as in handle_new_trade)
+  - REDEEM: our shares of the market are paid out at the trader's payout per share
+
+Usage:
+    python scripts/backtest.py --file trades.csv --whale-pct 0.001:0.01:10 --stake-max 10,20,50
+    python scripts/backtest.py --wallet 0xabc... --since-days 90 --bankroll 500,1000
+    python scripts/backtest.py --archive --since-days 365   # include archived trades (archive.py)
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import sys
+import time
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency, only needed for backtesting
+    np = None
+
+# Columns needed from historic_trades
+COLUMNS = ['proxy_wallet', 'timestamp', 'condition_id', 'type', 'size', 'usdc_size', 'price', 'asset', 'side']
+
+# Smallest order the bot places (see COALESCE_MIN_USDC)
+MIN_ORDER_USDC = 1.0
+
+PARAMETERS = ['whale_pct', 'stake_min', 'stake_max', 'bankroll']
+
+
+class TradeColumns:
+    """historic_trades rows as columnar arrays, sorted by timestamp"""
+
+    def __init__(self, rows: List[dict]):
+        rows = sorted(rows, key=lambda row: float(row.get('timestamp') or 0))
+        self.n = len(rows)
+        self.timestamp = np.array([float(row.get('timestamp') or 0) for row in rows], dtype=np.float64)
+        self.size = np.array([float(row.get('size') or 0) for row in rows], dtype=np.float64)
+        self.usdc_size = np.array([float(row.get('usdc_size') or 0) for row in rows], dtype=np.float64)
+        self.price = np.array([float(row.get('price') or 0) for row in rows], dtype=np.float64)
+        self.is_trade = np.array([row.get('type') == 'TRADE' for row in rows], dtype=bool)
+        self.is_redeem = np.array([row.get('type') == 'REDEEM' for row in rows], dtype=bool)
+        self.is_buy = np.array([row.get('side') == 'BUY' for row in rows], dtype=bool)
+        self.wallet, self.wallets = self._codes(str(row.get('proxy_wallet') or '').lower() for row in rows)
+        self.asset, self.assets = self._codes(str(row.get('asset') or '') for row in rows)
+        self.condition, self.conditions = self._codes(str(row.get('condition_id') or '') for row in rows)
+
+    @staticmethod
+    def _codes(values) -> tuple:
+        """Dictionary-encode a column into int codes and the list of distinct values"""
+        index: Dict[str, int] = {}
+        codes = np.fromiter((index.setdefault(value, len(index)) for value in values), dtype=np.int64)
+        return codes, list(index)
+
+
+def trader_positions_before(trades: TradeColumns) -> 'np.ndarray':
+    """
+    Trader's share balance of the traded asset right before each row
+
+    Grouped cumulative sum over (wallet, asset) of the signed TRADE sizes,
+    in time order. Balances held before the loaded window are unknown, so
+    load enough history for the SELL fractions to be meaningful.
+    """
+    delta = np.where(trades.is_trade, np.where(trades.is_buy, trades.size, -trades.size), 0.0)
+    keys = trades.wallet * max(1, len(trades.assets)) + trades.asset
+    order = np.argsort(keys, kind='stable')
+    sorted_keys, sorted_delta = keys[order], delta[order]
+    running = np.cumsum(sorted_delta)
+    starts = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+    group_start = np.maximum.accumulate(np.where(starts, np.arange(trades.n), 0))
+    base = (running - sorted_delta)[group_start]
+    before = np.empty(trades.n)
+    before[order] = running - sorted_delta - base
+    return before
+
+
+def sell_fractions(trades: TradeColumns) -> 'np.ndarray':
+    """
+    Fraction of its position the trader sold on each SELL row (0 elsewhere)
+
+    Mirrors handle_new_trade: size_sold / size_before, capped at 1. When the
+    loaded window does not show a position, the whole position is assumed sold.
+    """
+    before = np.maximum(trader_positions_before(trades), trades.size)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fraction = np.where(before > 0, trades.size / before, 1.0)
+    return np.where(trades.is_trade & ~trades.is_buy, np.clip(fraction, 0.0, 1.0), 0.0)
+
+
+def redeem_payouts(trades: TradeColumns) -> 'np.ndarray':
+    """Payout per share of each REDEEM row (1 for the winning outcome, 0 for the losing one)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        payout = np.where(trades.size > 0, trades.usdc_size / trades.size, 0.0)
+    return np.where(trades.is_redeem, np.clip(payout, 0.0, 1.0), 0.0)
+
+
+def parameter_grid(whale_pct: List[float], stake_min: List[float], stake_max: List[float], bankroll: List[float]) -> Dict[str, 'np.ndarray']:
+    """Cartesian product of the parameter values, as one array per parameter (skipping STAKE_MIN > STAKE_MAX)"""
+    combos = np.array([
+        combo for combo in itertools.product(whale_pct, stake_min, stake_max, bankroll)
+        if combo[1] <= combo[2]
+    ], dtype=np.float64).reshape(-1, len(PARAMETERS))
+    return {name: combos[:, idx] for idx, name in enumerate(PARAMETERS)}
+
+
+def replay(trades: TradeColumns, grid: Dict[str, 'np.ndarray']) -> Dict[str, 'np.ndarray']:
+    """
+    Simulate the copy rules for every parameter set in one pass over the trades
+
+    Returns:
+        Dictionary of per-parameter-set result arrays
+    """
+    sets = len(grid['whale_pct'])
+    fractions = sell_fractions(trades)
+    payouts = redeem_payouts(trades)
+    assets_by_condition: Dict[int, np.ndarray] = {}
+    for condition in np.unique(trades.condition[trades.is_redeem]):
+        assets_by_condition[condition] = np.unique(trades.asset[(trades.condition == condition) & trades.is_trade])
+
+    # Shares held per asset (rows) and parameter set (columns)
+    positions = np.zeros((max(1, len(trades.assets)), sets))
+    last_price = np.zeros(max(1, len(trades.assets)))
+    cash = grid['bankroll'].copy()
+    holdings = np.zeros(sets)
+    peak = cash.copy()
+    max_drawdown = np.zeros(sets)
+    max_exposure = np.zeros(sets)
+    orders = np.zeros(sets, dtype=np.int64)
+    capped = np.zeros(sets, dtype=np.int64)
+    whale_pct, stake_min, stake_max = grid['whale_pct'], grid['stake_min'], grid['stake_max']
+
+    is_trade, is_buy, is_redeem = trades.is_trade, trades.is_buy, trades.is_redeem
+    for t in range(trades.n):
+        if is_trade[t]:
+            asset, price = trades.asset[t], trades.price[t]
+            if price <= 0:
+                continue
+            held = positions[asset]
+            # Mark the position to the new price before trading it
+            holdings += held * (price - last_price[asset])
+            last_price[asset] = price
+            if is_buy[t]:
+                wanted = np.clip(trades.size[t] * price * whale_pct, stake_min, stake_max)
+                stake = np.minimum(wanted, cash)
+                stake = np.where(stake >= MIN_ORDER_USDC, stake, 0.0)
+                capped += stake < wanted
+                orders += stake > 0
+                held += stake / price
+                cash -= stake
+                holdings += stake
+            elif fractions[t] > 0:
+                sold = held * fractions[t]
+                orders += sold > 0
+                held -= sold
+                cash += sold * price
+                holdings -= sold * price
+        elif is_redeem[t]:
+            for asset in assets_by_condition.get(trades.condition[t], ()):
+                held = positions[asset]
+                cash += held * payouts[t]
+                holdings -= held * last_price[asset]
+                held[:] = 0.0
+        else:
+            continue
+        equity = cash + holdings
+        np.maximum(peak, equity, out=peak)
+        np.maximum(max_drawdown, peak - equity, out=max_drawdown)
+        np.maximum(max_exposure, holdings, out=max_exposure)
+
+    equity = cash + holdings
+    return {
+        **grid,
+        'equity': equity,
+        'pnl': equity - grid['bankroll'],
+        'return_pct': (equity / grid['bankroll'] - 1) * 100,
+        'max_drawdown': max_drawdown,
+        'max_exposure': max_exposure,
+        'orders': orders,
+        'capped': capped,
+    }
+
+
+def load_trades_file(path: str) -> List[dict]:
+    """Load historic_trades rows from a CSV export, a JSON array or JSON lines"""
+    with open(path, newline='') as f:
+        if path.endswith('.csv'):
+            return list(csv.DictReader(f))
+        text = f.read()
+    text = text.strip()
+    if text.startswith('['):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def load_trades_table(wallets: Optional[List[str]] = None, since: Optional[float] = None, page_size: int = 1000) -> List[dict]:
+    """Page through historic_trades in the configured storage backend"""
+    from get_player_history_new import TABLE_NAME
+    from storage import get_storage_client
+    storage = get_storage_client()
+    rows = []
+    offset = 0
+    while True:
+        query = storage.table(TABLE_NAME).select(",".join(COLUMNS)).order('timestamp')
+        if wallets:
+            query = query.in_('proxy_wallet', wallets)
+        if since:
+            query = query.gte('timestamp', int(since))
+        page = query.range(offset, offset + page_size - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        offset += page_size
+
+
+def load_trades_archive(wallets: Optional[List[str]] = None, since: Optional[float] = None) -> List[dict]:
+    """Read the trades moved to the archive (see archive.py), needs pyarrow"""
+    from archive import ArchiveReader
+    from config import get_config
+    return ArchiveReader(get_config().ARCHIVE_DIR).rows(start=since, wallets=wallets, columns=COLUMNS)
+
+
+def parse_values(text: str) -> List[float]:
+    """Parse "a,b,c" or a "start:stop:count" range into a list of values"""
+    if text.count(':') == 2:
+        start, stop, count = text.split(':')
+        return [float(value) for value in np.linspace(float(start), float(stop), int(count))]
+    return [float(value) for value in text.split(',') if value.strip()]
+
+
+def print_results(results: Dict[str, 'np.ndarray'], top: int = 10):
+    """Print the best parameter sets by PnL"""
+    ranking = np.argsort(-results['pnl'])[:top]
+    print("=" * 100)
+    print(f"{'whale %':>9}{'min $':>8}{'max $':>8}{'bankroll':>10}{'pnl $':>12}{'return':>9}{'max dd $':>10}{'max exp $':>11}{'orders':>8}{'capped':>8}")
+    print("-" * 100)
+    for idx in ranking:
+        print(
+            f"{results['whale_pct'][idx] * 100:>8.3f}%{results['stake_min'][idx]:>8.2f}{results['stake_max'][idx]:>8.2f}"
+            f"{results['bankroll'][idx]:>10.0f}{results['pnl'][idx]:>12.2f}{results['return_pct'][idx]:>8.1f}%"
+            f"{results['max_drawdown'][idx]:>10.2f}{results['max_exposure'][idx]:>11.2f}"
+            f"{results['orders'][idx]:>8d}{results['capped'][idx]:>8d}"
+        )
+    print("=" * 100)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay historic trades over a grid of sizing parameters")
+    parser.add_argument("--file", help="CSV/JSON export of historic_trades (default: read the stored table)")
+    parser.add_argument("--wallet", action="append", help="Only replay this trader wallet (repeatable)")
+    parser.add_argument("--since-days", type=float, help="Only replay the last N days")
+    parser.add_argument("--archive", action="store_true", help="Also replay archived trades (ARCHIVE_DIR, needs pyarrow)")
+    parser.add_argument("--whale-pct", help="STAKE_WHALE_PCT values: a,b,c or start:stop:count")
+    parser.add_argument("--stake-min", help="STAKE_MIN values")
+    parser.add_argument("--stake-max", help="STAKE_MAX values")
+    parser.add_argument("--bankroll", help="BANKROLL values")
+    parser.add_argument("--top", type=int, default=10, help="Parameter sets to print (default: 10)")
+    parser.add_argument("--json", help="Write every parameter set's results to this file")
+    args = parser.parse_args(argv)
+
+    if np is None:
+        print("❌ numpy is required for backtesting: pip install numpy")
+        return 1
+
+    # Unset axes default to the current configuration
+    defaults = {}
+    if not all([args.whale_pct, args.stake_min, args.stake_max, args.bankroll]):
+        from config import get_config
+        config = get_config()
+        defaults = {
+            'whale_pct': [config.STAKE_WHALE_PCT], 'stake_min': [config.STAKE_MIN],
+            'stake_max': [config.STAKE_MAX], 'bankroll': [config.get_bankroll()],
+        }
+
+    since = time.time() - args.since_days * 86400 if args.since_days else None
+    started_at = time.perf_counter()
+    if args.file:
+        rows = load_trades_file(args.file)
+        wallets = {wallet.lower() for wallet in args.wallet or []}
+        rows = [
+            row for row in rows
+            if (not wallets or str(row.get('proxy_wallet', '')).lower() in wallets)
+            and (since is None or float(row.get('timestamp') or 0) >= since)
+        ]
+    else:
+        rows = load_trades_table(args.wallet, since)
+    if args.archive:
+        rows = load_trades_archive(args.wallet, since) + rows
+    trades = TradeColumns(rows)
+    loaded_at = time.perf_counter()
+
+    grid = parameter_grid(
+        parse_values(args.whale_pct) if args.whale_pct else defaults['whale_pct'],
+        parse_values(args.stake_min) if args.stake_min else defaults['stake_min'],
+        parse_values(args.stake_max) if args.stake_max else defaults['stake_max'],
+        parse_values(args.bankroll) if args.bankroll else defaults['bankroll'],
+    )
+    results = replay(trades, grid)
+    finished_at = time.perf_counter()
+
+    print(
+        f"📼 Replayed {trades.n} rows ({len(trades.wallets)} wallets, {len(trades.assets)} assets) "
+        f"over {len(grid['whale_pct'])} parameter sets: load {loaded_at - started_at:.2f}s, "
+        f"replay {finished_at - loaded_at:.2f}s"
+    )
+    print_results(results, args.top)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([
+                {name: values[idx].item() for name, values in results.items()}
+                for idx in range(len(grid['whale_pct']))
+            ], f, indent=2)
+        print(f"💾 Results written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,620 @@
+"""
+Fake Services Module for the Polymarket Copytrading Bot benchmark
+
+Local stand-ins for everything the bot talks to, served over real HTTP so
+the bot's own clients (httpx, supabase-py/postgrest, py-clob-client) are
+exercised unchanged:
+
+  - FakeDataApi:   data-api GET /activity and /positions, fed by simulated traders
+  - FakePostgrest: PostgREST /rest/v1/<table> upserts and selects, plus the
+                   realtime INSERT/UPDATE events those writes cause
+  - FakeClob:      CLOB auth, order book / tick size / fee rate, POST /order
+  - FakeMarketFeed: CLOB market websocket, books following the traders' prices
+
+Each service has its own LatencyProfile; traders follow a BurstProfile.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+import websockets
+
+
+class LatencyProfile:
+    """
+    Response delay and fault injection of one fake service
+
+    Args:
+        base_ms: Delay added to every request
+        jitter_ms: Extra uniform random delay
+        slow_ms: Delay of the occasional slow request
+        slow_rate: Fraction of requests that are slow
+        throttle_rate: Fraction of requests answered 429 with Retry-After
+        error_rate: Fraction of requests answered 503
+    """
+
+    def __init__(
+        self,
+        base_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        slow_ms: float = 0.0,
+        slow_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        error_rate: float = 0.0,
+    ):
+        self.base_ms = base_ms
+        self.jitter_ms = jitter_ms
+        self.slow_ms = slow_ms
+        self.slow_rate = slow_rate
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+
+    def delay(self) -> float:
+        """Seconds to wait before answering"""
+        ms = self.base_ms + random.uniform(0, self.jitter_ms)
+        if self.slow_rate and random.random() < self.slow_rate:
+            ms += self.slow_ms
+        return ms / 1000
+
+    def fault(self) -> Optional[int]:
+        """Status code to answer with instead of the real response, if any"""
+        roll = random.random()
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 503
+        return None
+
+
+class BurstProfile:
+    """
+    How the simulated traders trade
+
+    Every interval seconds each wallet makes one decision, split into
+    `fills` fills of the same token and side (the way whales' orders are
+    matched against many makers).
+
+    Args:
+        interval: Seconds between decisions of one wallet
+        fills: Fills per decision
+        tokens: Number of distinct tokens traded
+        sell_ratio: Fraction of decisions that sell an open position
+        shares: (min, max) shares per fill
+    """
+
+    def __init__(self, interval: float = 1.0, fills: int = 1, tokens: int = 20, sell_ratio: float = 0.2, shares: Tuple[float, float] = (500, 3000)):
+        self.interval = interval
+        self.fills = fills
+        self.tokens = tokens
+        self.sell_ratio = sell_ratio
+        self.shares = shares
+
+
+def token_id(idx: int) -> str:
+    """Deterministic uint256-like token id"""
+    return str(int(hashlib.sha256(f"bench-token-{idx}".encode()).hexdigest(), 16))
+
+
+def condition_id(idx: int) -> str:
+    return "0x" + hashlib.sha256(f"bench-condition-{idx}".encode()).hexdigest()
+
+
+class _Response:
+    __slots__ = ('status', 'body', 'headers')
+
+    def __init__(self, status: int = 200, body=None, headers: Optional[dict] = None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+
+_REASONS = {200: "OK", 201: "Created", 204: "No Content", 404: "Not Found", 429: "Too Many Requests", 503: "Service Unavailable"}
+
+
+class FakeHttpServer:
+    """
+    Minimal keep-alive HTTP/1.1 server answering from a route table
+
+    Routes map (method, path prefix) to handler(path, query, headers, body)
+    returning a _Response; the latency profile is applied to every request.
+    """
+
+    def __init__(self, name: str, profile: LatencyProfile):
+        self.name = name
+        self.profile = profile
+        self.routes: List[Tuple[str, str, Callable]] = []
+        self.port = 0
+        self.requests = 0
+        self.faults = 0
+        self._server = None
+        self._connections = set()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def route(self, method: str, prefix: str, handler: Callable):
+        self.routes.append((method, prefix, handler))
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            # Keep-alive connections would otherwise outlive the server
+            for task in list(self._connections):
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+
+    def _dispatch(self, method: str, target: str, headers: dict, body: bytes) -> _Response:
+        parts = urlsplit(target)
+        query = dict(parse_qsl(parts.query, keep_blank_values=True))
+        for route_method, prefix, handler in self.routes:
+            if route_method == method and parts.path.startswith(prefix):
+                return handler(parts.path, query, headers, body)
+        return _Response(404, {"error": f"no route for {method} {parts.path}"})
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length") or 0))
+
+                self.requests += 1
+                await asyncio.sleep(self.profile.delay())
+                status = self.profile.fault()
+                if status is not None:
+                    self.faults += 1
+                    response = _Response(status, {"error": "injected fault"}, {"Retry-After": "1"} if status == 429 else {})
+                else:
+                    response = self._dispatch(method, target, headers, body)
+
+                payload = response.body if isinstance(response.body, bytes) else json.dumps(response.body).encode()
+                head = [f"HTTP/1.1 {response.status} {_REASONS.get(response.status, 'OK')}",
+                        "Content-Type: application/json", f"Content-Length: {len(payload)}"]
+                head += [f"{name}: {value}" for name, value in response.headers.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + payload)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+
+class FakeDataApi:
+    """Simulated traders and the data-api endpoints reading them"""
+
+    def __init__(self, wallets: List[str], trading: BurstProfile, profile: LatencyProfile, on_trade: Optional[Callable] = None):
+        self.trading = trading
+        self.on_trade = on_trade
+        self.server = FakeHttpServer("data-api", profile)
+        self.server.route("GET", "/activity", self._activity)
+        self.server.route("GET", "/positions", self._positions)
+        self._lock = threading.Lock()
+        self._activities: Dict[str, list] = {wallet.lower(): [] for wallet in wallets}
+        self._positions_by_wallet: Dict[str, Dict[str, dict]] = {wallet.lower(): {} for wallet in wallets}
+        now = time.time()
+        # Spread the first decisions so wallets do not trade in lockstep
+        self._next_decision = {wallet.lower(): now + random.uniform(0, trading.interval) for wallet in wallets}
+        self._sequence = 0
+        self.fills = 0
+
+    def _decide(self, wallet: str, at: float):
+        positions = self._positions_by_wallet[wallet]
+        held = [asset for asset, position in positions.items() if position['size'] > 0]
+        if held and random.random() < self.trading.sell_ratio:
+            side, asset = "SELL", random.choice(held)
+            idx = positions[asset]['_idx']
+        else:
+            side, idx = "BUY", random.randrange(self.trading.tokens)
+            asset = token_id(idx)
+        price = round(random.uniform(0.1, 0.9), 2)
+        for fill in range(self.trading.fills):
+            shares = round(random.uniform(*self.trading.shares), 2)
+            if side == "SELL":
+                shares = min(shares, positions[asset]['size'])
+                if shares <= 0:
+                    break
+            self._sequence += 1
+            self.fills += 1
+            self._activities[wallet].append({
+                'proxyWallet': wallet,
+                # Fractional timestamps keep the latency measurement honest
+                'timestamp': at + fill * 0.001,
+                'conditionId': condition_id(idx),
+                'type': 'TRADE',
+                'size': shares,
+                'usdcSize': round(shares * price, 4),
+                'transactionHash': "0x" + hashlib.sha256(f"{wallet}-{self._sequence}".encode()).hexdigest(),
+                'price': price,
+                'asset': asset,
+                'side': side,
+                'outcomeIndex': 0,
+                'title': f"Benchmark market {idx}",
+                'slug': f"benchmark-market-{idx}",
+                'outcome': 'Yes',
+                'name': f"bench-{wallet[-4:]}",
+            })
+            self._apply(wallet, idx, asset, side, shares, price)
+        if self.on_trade is not None:
+            self.on_trade(asset, side, price)
+
+    def _apply(self, wallet: str, idx: int, asset: str, side: str, shares: float, price: float):
+        position = self._positions_by_wallet[wallet].setdefault(asset, {
+            '_idx': idx, 'proxyWallet': wallet, 'asset': asset, 'conditionId': condition_id(idx),
+            'size': 0.0, 'avgPrice': price, 'initialValue': 0.0, 'title': f"Benchmark market {idx}",
+            'slug': f"benchmark-market-{idx}", 'outcome': 'Yes', 'outcomeIndex': 0,
+        })
+        position['size'] = round(position['size'] + (shares if side == "BUY" else -shares), 4)
+        position['initialValue'] = round(position['size'] * position['avgPrice'], 4)
+        position['currentValue'] = round(position['size'] * price, 4)
+        position['curPrice'] = price
+
+    def _catch_up(self, wallet: str):
+        """Generate every decision the wallet made up to now"""
+        now = time.time()
+        while self._next_decision[wallet] <= now:
+            self._decide(wallet, self._next_decision[wallet])
+            self._next_decision[wallet] += self.trading.interval
+
+    def credit(self, wallet: str, asset: str, side: str, shares: float, price: float):
+        """Apply a fill of a wallet that is not simulated (our own orders)"""
+        with self._lock:
+            self._positions_by_wallet.setdefault(wallet.lower(), {})
+            self._apply(wallet.lower(), -1, asset, side, shares, price)
+
+    def _activity(self, path, query, headers, body) -> _Response:
+        wallet = query.get('user', '').lower()
+        start = float(query.get('start') or 0)
+        offset, limit = int(query.get('offset') or 0), int(query.get('limit') or 100)
+        with self._lock:
+            if wallet in self._next_decision:
+                self._catch_up(wallet)
+            rows = [a for a in self._activities.get(wallet, []) if a['timestamp'] >= start]
+        rows.sort(key=lambda a: a['timestamp'], reverse=query.get('sortDirection', 'DESC') == 'DESC')
+        return _Response(200, rows[offset:offset + limit])
+
+    def _positions(self, path, query, headers, body) -> _Response:
+        wallet = query.get('user', '').lower()
+        offset, limit = int(query.get('offset') or 0), int(query.get('limit') or 100)
+        with self._lock:
+            if wallet in self._next_decision:
+                self._catch_up(wallet)
+            rows = [
+                {k: v for k, v in position.items() if not k.startswith('_')}
+                for position in self._positions_by_wallet.get(wallet, {}).values() if position['size'] > 0
+            ]
+        if query.get('sortBy') == 'INITIAL':
+            rows.sort(key=lambda p: p['initialValue'], reverse=query.get('sortDirection', 'DESC') == 'DESC')
+        return _Response(200, rows[offset:offset + limit])
+
+
+class FakePostgrest:
+    """
+    In-memory PostgREST tables with upsert conflict handling
+
+    Writes are reported to on_change(table, event, record, old_record), the
+    way Supabase realtime reports them, after the realtime latency profile.
+    """
+
+    # unique_activity_key is a generated column in the real schema
+    GENERATED_KEYS = {'unique_activity_key': ('transaction_hash', 'condition_id', 'price')}
+
+    def __init__(self, profile: LatencyProfile, realtime: LatencyProfile):
+        self.realtime = realtime
+        self.server = FakeHttpServer("postgrest", profile)
+        self.server.route("POST", "/rest/v1/", self._upsert)
+        self.server.route("GET", "/rest/v1/", self._select)
+        self.tables: Dict[str, Dict[tuple, dict]] = {}
+        self.inserted: Dict[str, int] = {}
+        # BIGSERIAL id per table
+        self._serials: Dict[str, int] = {}
+        self.on_change: Optional[Callable[[str, str, dict, dict], None]] = None
+        self._lock = threading.Lock()
+
+    def _conflict_key(self, row: dict, on_conflict: str) -> tuple:
+        columns = [column.strip() for column in on_conflict.split(",") if column.strip()]
+        key = []
+        for column in columns:
+            if column in self.GENERATED_KEYS:
+                key.append("_".join("null" if row.get(c) is None else str(row.get(c)) for c in self.GENERATED_KEYS[column]))
+            else:
+                key.append(str(row.get(column)).lower())
+        return tuple(key) if key else (id(row),)
+
+    def _emit(self, table: str, event: str, record: dict, old_record: dict):
+        if self.on_change is None:
+            return
+        delay = self.realtime.delay()
+        callback = self.on_change
+        loop = asyncio.get_running_loop()
+        loop.call_later(delay, callback, table, event, record, old_record)
+
+    def _upsert(self, path, query, headers, body) -> _Response:
+        table = path.rsplit("/", 1)[-1]
+        rows = json.loads(body or b"[]")
+        rows = rows if isinstance(rows, list) else [rows]
+        prefer = headers.get('prefer', '')
+        ignore_duplicates = 'ignore-duplicates' in prefer
+        returned = []
+        with self._lock:
+            stored = self.tables.setdefault(table, {})
+            for row in rows:
+                key = self._conflict_key(row, query.get('on_conflict', ''))
+                old = stored.get(key)
+                if old is not None and ignore_duplicates:
+                    continue
+                record = dict(old or {}, **row)
+                # Column defaults and the updated_at trigger of the real schema
+                now = datetime.now(timezone.utc).isoformat(timespec="microseconds")
+                if old is None:
+                    self._serials[table] = self._serials.get(table, 0) + 1
+                    record.setdefault('id', self._serials[table])
+                    record['created_at'] = now
+                record['updated_at'] = now
+                stored[key] = record
+                returned.append(record)
+                if old is None:
+                    self.inserted[table] = self.inserted.get(table, 0) + 1
+                    self._emit(table, "INSERT", record, {})
+                else:
+                    self._emit(table, "UPDATE", record, old)
+        if 'return=minimal' in prefer:
+            return _Response(201, b"")
+        return _Response(201, returned)
+
+    def _select(self, path, query, headers, body) -> _Response:
+        table = path.rsplit("/", 1)[-1]
+        filters = [
+            (column,) + tuple(value.split(".", 1))
+            for column, value in query.items()
+            if column not in ('select', 'order', 'limit', 'offset', 'on_conflict') and "." in value
+        ]
+        with self._lock:
+            rows = [
+                row for row in self.tables.get(table, {}).values()
+                if all(_matches(row.get(column), op, value) for column, op, value in filters)
+            ]
+        if query.get('order'):
+            column, _, direction = query['order'].partition(".")
+            rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=direction.startswith("desc"))
+        offset = int(query.get('offset') or 0)
+        limit = int(query['limit']) if query.get('limit') else None
+        if headers.get('range'):
+            start, _, end = headers['range'].partition("-")
+            offset, limit = int(start), int(end) - int(start) + 1
+        rows = rows[offset:offset + limit if limit is not None else None]
+        columns = [column for column in query.get('select', '*').split(",") if column and column != "*"]
+        if columns:
+            rows = [{column: row.get(column) for column in columns} for row in rows]
+        return _Response(200, rows)
+
+
+def _matches(stored, op: str, value: str) -> bool:
+    """Evaluate one PostgREST filter (eq, gt, gte, lt, lte, in) against a stored value"""
+    if op == "in":
+        return str(stored).lower() in {v.strip('"').lower() for v in value.strip("()").split(",")}
+    if op == "eq":
+        return str(stored).lower() == value.lower()
+    if stored is None:
+        return False
+    compared = type(stored)(value) if isinstance(stored, (int, float)) else value
+    return {
+        "gt": stored > compared, "gte": stored >= compared,
+        "lt": stored < compared, "lte": stored <= compared,
+    }.get(op, False)
+
+
+class FakeClob:
+    """CLOB endpoints used to derive API creds, read market metadata and post orders"""
+
+    def __init__(self, profile: LatencyProfile, tick_size: str = "0.01", min_order_size: float = 5,
+                 on_fill: Optional[Callable] = None, levels: Optional[Callable] = None):
+        self.tick_size = tick_size
+        self.min_order_size = min_order_size
+        self.on_fill = on_fill
+        self.levels = levels
+        self.server = FakeHttpServer("clob", profile)
+        self.server.route("POST", "/auth/api-key", self._creds)
+        self.server.route("GET", "/auth/derive-api-key", self._creds)
+        self.server.route("GET", "/auth/api-keys", lambda *a: _Response(200, {"apiKeys": ["benchmark"]}))
+        self.server.route("GET", "/book", self._book)
+        self.server.route("GET", "/tick-size", lambda *a: _Response(200, {"minimum_tick_size": float(self.tick_size)}))
+        self.server.route("GET", "/neg-risk", lambda *a: _Response(200, {"neg_risk": False}))
+        self.server.route("GET", "/fee-rate", lambda *a: _Response(200, {"base_fee": 0}))
+        self.server.route("GET", "/time", lambda *a: _Response(200, int(time.time())))
+        self.server.route("POST", "/order", self._order)
+        self.orders: List[Tuple[float, str, str, float]] = []
+        self.book_requests = 0
+
+    def _creds(self, path, query, headers, body) -> _Response:
+        secret = base64.urlsafe_b64encode(b"benchmark-secret-benchmark-secr").decode()
+        return _Response(200, {"apiKey": "benchmark", "secret": secret, "passphrase": "benchmark"})
+
+    def _book(self, path, query, headers, body) -> _Response:
+        self.book_requests += 1
+        bids, asks = self.levels(query.get('token_id')) if self.levels is not None else ([], [])
+        return _Response(200, {
+            "market": "", "asset_id": query.get('token_id'), "timestamp": str(int(time.time() * 1000)),
+            "hash": "", "bids": bids, "asks": asks, "last_trade_price": "0.5",
+            "min_order_size": str(self.min_order_size), "tick_size": self.tick_size, "neg_risk": False,
+        })
+
+    def _order(self, path, query, headers, body) -> _Response:
+        order = (json.loads(body or b"{}").get('order') or {})
+        side = str(order.get('side', 'BUY')).upper()
+        maker, taker = float(order.get('makerAmount') or 0) / 1e6, float(order.get('takerAmount') or 0) / 1e6
+        shares, usdc = (taker, maker) if side == "BUY" else (maker, taker)
+        self.orders.append((time.time(), str(order.get('tokenId')), side, shares))
+        if self.on_fill is not None and shares:
+            self.on_fill(str(order.get('tokenId')), side, shares, usdc / shares)
+        return _Response(200, {
+            "success": True, "errorMsg": "", "orderID": "0x" + hashlib.sha256(body).hexdigest(),
+            "status": "matched", "takingAmount": str(taker), "makingAmount": str(maker),
+        })
+
+
+class FakeMarketFeed:
+    """
+    CLOB market websocket with one book per token
+
+    A trader's trade moves its token's book to the trade price (asks from
+    it for a BUY, bids for a SELL), published as a price_change. A
+    fraction of those messages can be dropped per connection to make the
+    bot detect the gap and resync from the REST book.
+    """
+
+    def __init__(self, tick_size: str = "0.01", depth: int = 3, level_size: float = 1000, drop_rate: float = 0.0):
+        self.tick = float(tick_size)
+        self.depth = depth
+        self.level_size = level_size
+        self.drop_rate = drop_rate
+        self.books: Dict[str, Tuple[Dict[float, float], Dict[float, float]]] = {}
+        self.port = 0
+        self.messages = 0
+        self.dropped = 0
+        self._server = None
+        self._connections: Dict[object, set] = {}
+        self._sends = set()
+
+    @property
+    def url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}"
+
+    async def start(self):
+        self._server = await websockets.serve(self._handle, "127.0.0.1", 0)
+        self.port = list(self._server.sockets)[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def levels(self, asset: str) -> Tuple[list, list]:
+        """REST-style bids and asks of a token"""
+        bids, asks = self.books.get(str(asset), ({}, {}))
+        return ([{"price": f"{price:.2f}", "size": str(size)} for price, size in sorted(bids.items())],
+                [{"price": f"{price:.2f}", "size": str(size)} for price, size in sorted(asks.items(), reverse=True)])
+
+    def _book_event(self, asset: str) -> dict:
+        bids, asks = self.levels(asset)
+        return {"event_type": "book", "asset_id": asset, "market": "", "bids": bids, "asks": asks,
+                "timestamp": str(int(time.time() * 1000)), "hash": ""}
+
+    def move(self, asset: str, side: str, price: float):
+        """Rebuild a token's book around a trade and publish the changed levels"""
+        best_bid = round(price if side == "SELL" else price - self.tick, 2)
+        best_ask = round(price if side == "BUY" else price + self.tick, 2)
+        bids = {round(best_bid - i * self.tick, 2): self.level_size for i in range(self.depth) if best_bid - i * self.tick > 0}
+        asks = {round(best_ask + i * self.tick, 2): self.level_size for i in range(self.depth) if best_ask + i * self.tick < 1}
+        old_bids, old_asks = self.books.get(asset, ({}, {}))
+        self.books[asset] = (bids, asks)
+        changes = []
+        for book_side, old, new in (("BUY", old_bids, bids), ("SELL", old_asks, asks)):
+            for level in set(old) | set(new):
+                if old.get(level) != new.get(level):
+                    changes.append({"asset_id": asset, "price": f"{level:.2f}", "size": str(new.get(level, 0)),
+                                    "side": book_side, "hash": ""})
+        if not changes:
+            return
+        for change in changes:
+            change["best_bid"] = f"{max(bids):.2f}" if bids else "0"
+            change["best_ask"] = f"{min(asks):.2f}" if asks else "1"
+        message = json.dumps({"event_type": "price_change", "market": "", "price_changes": changes,
+                              "timestamp": str(int(time.time() * 1000))})
+        for connection, assets in list(self._connections.items()):
+            if asset not in assets:
+                continue
+            self.messages += 1
+            if self.drop_rate and random.random() < self.drop_rate:
+                self.dropped += 1
+                continue
+            task = asyncio.get_running_loop().create_task(connection.send(message))
+            self._sends.add(task)
+            task.add_done_callback(self._sends.discard)
+
+    async def _handle(self, connection, *args):
+        assets = self._connections[connection] = set()
+        try:
+            async for message in connection:
+                if message == "PING":
+                    await connection.send("PONG")
+                    continue
+                subscribed = [str(asset) for asset in json.loads(message).get('assets_ids') or ()]
+                assets.update(subscribed)
+                await connection.send(json.dumps([self._book_event(asset) for asset in subscribed]))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._connections.pop(connection, None)
+
+
+class FakeServices:
+    """
+    Runs the fakes on their own event loop thread
+
+    The bot runs on the main thread's loop, so time spent in the fakes
+    never competes with the bot's own event loop.
+    """
+
+    def __init__(self, wallets: List[str], funder: str, trading: BurstProfile, data_api: LatencyProfile,
+                 postgrest: LatencyProfile, realtime: LatencyProfile, clob: LatencyProfile, book_drop_rate: float = 0.0):
+        self.funder = funder
+        self.market = FakeMarketFeed(drop_rate=book_drop_rate)
+        self.data_api = FakeDataApi(wallets, trading, data_api, on_trade=self.market.move)
+        self.postgrest = FakePostgrest(postgrest, realtime)
+        self.clob = FakeClob(
+            clob, levels=self.market.levels,
+            on_fill=lambda asset, side, shares, price: self.data_api.credit(funder, asset, side, shares, price),
+        )
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="fake-services", daemon=True)
+
+    @property
+    def servers(self) -> List[FakeHttpServer]:
+        return [self.data_api.server, self.postgrest.server, self.clob.server]
+
+    def start(self):
+        self._thread.start()
+        for server in self.servers + [self.market]:
+            asyncio.run_coroutine_threadsafe(server.start(), self.loop).result()
+
+    def stop(self):
+        for server in self.servers + [self.market]:
+            asyncio.run_coroutine_threadsafe(server.stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+
+    def env(self) -> Dict[str, str]:
+        """Environment pointing the bot at the fakes"""
+        return {
+            'DATA_API_URL': self.data_api.server.url,
+            'SUPABASE_URL': self.postgrest.server.url,
+            'CLOB_API_URL': self.clob.server.url,
+            'CLOB_WS_URL': self.market.url,
+        }
@@ -0,0 +1,270 @@
+"""
+Benchmark Runner for the Polymarket Copytrading Bot
+
+Runs the real bot (run_bot from main.py) against the local fakes in
+benchmark/fake_services.py and reports ingest rows/s, orders/s and the
+p50/p99 copy latency (trader fill -> our post_order response).
+
+Every scenario runs in its own process, so module-level state of the bot
+(config, caches, ledgers, metrics) never leaks between runs.
+
+Usage (from the scripts/ directory):
+    python -m benchmark.run                                  # every scenario, realtime mode
+    python -m benchmark.run --scenario burst --mode direct --duration 60
+    python -m benchmark.run --storage sqlite                 # embedded SQLite instead of the fake Supabase
+    python -m benchmark.run --json bench.json                # save the results
+    python -m benchmark.run --baseline bench.json            # exit 1 on regressions
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from benchmark.fake_services import FakeServices
+from benchmark.scenarios import SCENARIOS
+
+# (metric, higher is better) compared against the baseline
+COMPARED_METRICS = [
+    ('ingest_rows_per_s', True),
+    ('orders_per_s', True),
+    ('copy_latency_p50_s', False),
+    ('copy_latency_p99_s', False),
+]
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values: list, q: float):
+    """Nearest-rank percentile of a sorted list, None if empty"""
+    if not values:
+        return None
+    return values[max(0, math.ceil(q * len(values)) - 1)]
+
+
+async def _drive(bot, services: FakeServices, mode: str, storage: str, duration: float) -> float:
+    """Run the bot for duration seconds, delivering realtime events from the fake database"""
+    loop = asyncio.get_running_loop()
+
+    def deliver(table: str, event: str, payload: dict):
+        # The realtime channel is filtered server-side to the tracked wallets
+        if payload['data']['record'].get('proxy_wallet') not in bot.registry:
+            return
+        if table == bot.TABLE_NAME_TRADES:
+            if event == "INSERT" and mode == "realtime":
+                bot.on_trade_insert(payload)
+        elif table == bot.TABLE_NAME_POSITIONS:
+            bot.pipeline.submit(bot.handle_new_position if event == "INSERT" else bot.handle_update_position, payload)
+
+    def on_change(table: str, event: str, record: dict, old_record: dict):
+        payload = {'data': {'type': event, 'table': table, 'record': record, 'old_record': old_record}}
+        loop.call_soon_threadsafe(deliver, table, event, payload)
+
+    if storage == "supabase":
+        # With sqlite the bot's own in-process change feed delivers the events
+        services.postgrest.on_change = on_change
+    started_at = time.perf_counter()
+    task = asyncio.create_task(bot.run_bot())
+    await asyncio.sleep(duration)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    services.postgrest.on_change = None
+    return time.perf_counter() - started_at
+
+
+def run_child(scenario_name: str, mode: str, duration: float, seed: int = 1, storage: str = "supabase") -> dict:
+    """Run one scenario in this process (the bot is imported after pointing it at the fakes)"""
+    random.seed(seed)
+    scenario = SCENARIOS[scenario_name]
+    wallets = [f"0x{idx + 1:040x}" for idx in range(scenario.wallets)]
+    funder = "0x" + "f" * 40
+    services = FakeServices(
+        wallets, funder, scenario.trading,
+        scenario.data_api, scenario.postgrest, scenario.realtime, scenario.clob,
+        book_drop_rate=scenario.book_drop_rate,
+    )
+    services.start()
+    state_dir = tempfile.mkdtemp(prefix="copybot-bench-")
+    os.environ.update(services.env())
+    os.environ.update({
+        'SUPABASE_KEY': 'benchmark.benchmark.benchmark',
+        # Throwaway key, orders are only ever signed for the fake CLOB
+        'PK': '0x' + '11' * 32,
+        'POLY_FUNDER': funder,
+        'TRADER_WALLET': '',
+        'TRADER_WALLETS': ",".join(wallets),
+        'TRADER_WALLETS_FILE': '',
+        'TABLE_NAME_WALLETS': '',
+        'COPY_MODE': mode,
+        'STORAGE_BACKEND': storage,
+        # Realtime is emulated in-process by the fake database
+        'REALTIME_LISTENERS': 'true' if storage == "sqlite" else 'false',
+        'STATE_DIR': state_dir,
+        'METRICS_PORT': '0',
+        # Measure the copy path, not the exposure limits
+        'BANKROLL': '1000000000',
+        'LOG_LEVEL': 'WARNING',
+    })
+    os.environ.update(scenario.env)
+
+    import main as bot
+    from metrics import tracer
+    from storage import get_local_store
+
+    try:
+        elapsed = asyncio.run(_drive(bot, services, mode, storage, duration))
+    finally:
+        services.stop()
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+    inserted = get_local_store().inserted if storage == "sqlite" else services.postgrest.inserted
+    first_latency = tracer.recent_latencies[0] if tracer.recent_latencies else None
+    latencies = sorted(tracer.recent_latencies)
+    return {
+        'scenario': scenario_name,
+        'mode': mode,
+        'storage': storage,
+        'duration_s': round(elapsed, 2),
+        'fills': services.data_api.fills,
+        'ingest_rows_per_s': inserted.get(bot.TABLE_NAME_TRADES, 0) / elapsed,
+        'orders': len(services.clob.orders),
+        'orders_per_s': len(services.clob.orders) / elapsed,
+        'copied': len(latencies),
+        'copy_latency_p50_s': percentile(latencies, 0.50),
+        'copy_latency_p99_s': percentile(latencies, 0.99),
+        # Copy latency of the first trade after start (cold clients and caches)
+        'first_copy_latency_s': first_latency,
+        'stage_p50_s': {
+            stage: tracer.stage_seconds.quantile(0.5, stage=stage)
+            for stage in ('detected', 'stored', 'received', 'started', 'coalesced', 'signed', 'posted')
+            if tracer.stage_seconds.count(stage=stage)
+        },
+        'events': tracer.events.sum_by('outcome'),
+        'data_api_requests': services.data_api.server.requests,
+        'data_api_faults': services.data_api.server.faults,
+        'market_lookups': services.clob.book_requests,
+        'book_updates_dropped': services.market.dropped,
+        'book_resyncs': bot.order_books.resyncs,
+    }
+
+
+def run_scenario(scenario_name: str, mode: str, duration: float, seed: int = 1, verbose: bool = False, storage: str = "supabase") -> dict:
+    """Run one scenario in a fresh interpreter and return its results"""
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        out_path = f.name
+    try:
+        subprocess.run(
+            [sys.executable, "-m", "benchmark.run", "--child", scenario_name,
+             "--mode", mode, "--storage", storage, "--duration", str(duration), "--seed", str(seed), "--out", out_path],
+            cwd=SCRIPTS_DIR,
+            check=True,
+            stdout=None if verbose else subprocess.DEVNULL,
+            stderr=None if verbose else subprocess.DEVNULL,
+        )
+        with open(out_path) as f:
+            return json.load(f)
+    finally:
+        os.unlink(out_path)
+
+
+def _fmt(value, unit: str = "") -> str:
+    return "-" if value is None else f"{value:.3f}{unit}" if isinstance(value, float) else f"{value}{unit}"
+
+
+def _mode(result: dict) -> str:
+    storage = result.get('storage', 'supabase')
+    return result['mode'] if storage == 'supabase' else f"{result['mode']}+{storage}"
+
+
+def print_results(results: list):
+    print("=" * 107)
+    print(f"{'scenario':<16}{'mode':<17}{'fills':>7}{'rows/s':>10}{'orders':>8}{'orders/s':>10}{'p50':>10}{'p99':>10}  slowest stage")
+    print("-" * 107)
+    for r in results:
+        stages = r.get('stage_p50_s') or {}
+        slowest = max(stages.items(), key=lambda item: item[1] or 0) if stages else None
+        print(
+            f"{r['scenario']:<16}{_mode(r):<17}{r['fills']:>7}{r['ingest_rows_per_s']:>10.1f}"
+            f"{r['orders']:>8}{r['orders_per_s']:>10.2f}{_fmt(r['copy_latency_p50_s'], 's'):>10}"
+            f"{_fmt(r['copy_latency_p99_s'], 's'):>10}  "
+            f"{f'{slowest[0]} ({slowest[1]:.3f}s)' if slowest else '-'}"
+        )
+    print("=" * 107)
+
+
+def compare(results: list, baseline: list, tolerance: float) -> list:
+    """
+    Compare results against a baseline run
+
+    Returns:
+        List of human-readable regressions (empty if none)
+    """
+    previous = {(r['scenario'], _mode(r)): r for r in baseline}
+    regressions = []
+    for r in results:
+        base = previous.get((r['scenario'], _mode(r)))
+        if base is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS:
+            new, old = r.get(metric), base.get(metric)
+            if new is None or not old:
+                continue
+            change = (new - old) / old
+            if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+                regressions.append(f"{r['scenario']}/{_mode(r)} {metric}: {old:.3f} -> {new:.3f} ({change:+.0%})")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmark of the copytrading bot against local fake services")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Scenario to run (repeatable, default: all)")
+    parser.add_argument("--mode", action="append", choices=["realtime", "direct"], help="Copy mode (repeatable, default: realtime)")
+    parser.add_argument("--storage", choices=["supabase", "sqlite"], default="supabase", help="Storage backend (default: supabase, the fake PostgREST)")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per scenario (default: 30)")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Results file of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (default: 0.2)")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the simulated traders (default: 1)")
+    parser.add_argument("--verbose", action="store_true", help="Show the bot's output")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        result = run_child(args.child, (args.mode or ["realtime"])[0], args.duration, args.seed, args.storage)
+        with open(args.out, "w") as f:
+            json.dump(result, f)
+        return 0
+
+    results = []
+    for scenario_name in args.scenario or list(SCENARIOS):
+        for mode in args.mode or ["realtime"]:
+            print(f"⏱️  Running {scenario_name} ({mode}, {args.storage}) for {args.duration:.0f}s: {SCENARIOS[scenario_name].description}")
+            results.append(run_scenario(scenario_name, mode, args.duration, args.seed, args.verbose, args.storage))
+    print_results(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print(f"✅ No regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Benchmark Scenarios for the Polymarket Copytrading Bot
+
+Each scenario fixes the simulated traders, the latency of every fake
+service and any bot settings it needs. Keep existing scenarios stable so
+results stay comparable with saved baselines; add new ones instead.
+"""
+
+from typing import Dict, Optional
+from benchmark.fake_services import BurstProfile, LatencyProfile
+
+
+class Scenario:
+    """Traders, service latencies and bot settings of one benchmark run"""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        wallets: int,
+        trading: BurstProfile,
+        data_api: LatencyProfile,
+        postgrest: LatencyProfile,
+        realtime: LatencyProfile,
+        clob: LatencyProfile,
+        env: Optional[Dict[str, str]] = None,
+        book_drop_rate: float = 0.0,
+    ):
+        self.name = name
+        self.description = description
+        self.wallets = wallets
+        self.trading = trading
+        self.data_api = data_api
+        self.postgrest = postgrest
+        self.realtime = realtime
+        self.clob = clob
+        self.env = env or {}
+        # Fraction of market websocket updates lost before reaching the bot
+        self.book_drop_rate = book_drop_rate
+
+
+SCENARIOS = {scenario.name: scenario for scenario in [
+    Scenario(
+        "steady",
+        "5 wallets, one fill every 2s each, healthy services",
+        wallets=5,
+        trading=BurstProfile(interval=2.0, fills=1),
+        data_api=LatencyProfile(base_ms=40, jitter_ms=20),
+        postgrest=LatencyProfile(base_ms=25, jitter_ms=10),
+        realtime=LatencyProfile(base_ms=50, jitter_ms=30),
+        clob=LatencyProfile(base_ms=60, jitter_ms=30),
+    ),
+    Scenario(
+        "burst",
+        "5 wallets, decisions split into 40 fills every 5s",
+        wallets=5,
+        trading=BurstProfile(interval=5.0, fills=40),
+        data_api=LatencyProfile(base_ms=40, jitter_ms=20),
+        postgrest=LatencyProfile(base_ms=25, jitter_ms=10),
+        realtime=LatencyProfile(base_ms=50, jitter_ms=30),
+        clob=LatencyProfile(base_ms=60, jitter_ms=30),
+    ),
+    Scenario(
+        "many-wallets",
+        "50 wallets sharing the data-api budget",
+        wallets=50,
+        trading=BurstProfile(interval=10.0, fills=3),
+        data_api=LatencyProfile(base_ms=40, jitter_ms=20),
+        postgrest=LatencyProfile(base_ms=25, jitter_ms=10),
+        realtime=LatencyProfile(base_ms=50, jitter_ms=30),
+        clob=LatencyProfile(base_ms=60, jitter_ms=30),
+    ),
+    Scenario(
+        "slow-backends",
+        "Slow Supabase and CLOB with a tail of very slow requests",
+        wallets=5,
+        trading=BurstProfile(interval=2.0, fills=5),
+        data_api=LatencyProfile(base_ms=80, jitter_ms=40, slow_ms=1000, slow_rate=0.02),
+        postgrest=LatencyProfile(base_ms=200, jitter_ms=100, slow_ms=2000, slow_rate=0.02),
+        realtime=LatencyProfile(base_ms=150, jitter_ms=100),
+        clob=LatencyProfile(base_ms=300, jitter_ms=150, slow_ms=2000, slow_rate=0.02),
+    ),
+    Scenario(
+        "throttled",
+        "data-api answers 10% of requests with 429 and 2% with 503",
+        wallets=10,
+        trading=BurstProfile(interval=3.0, fills=2),
+        data_api=LatencyProfile(base_ms=40, jitter_ms=20, throttle_rate=0.10, error_rate=0.02),
+        postgrest=LatencyProfile(base_ms=25, jitter_ms=10),
+        realtime=LatencyProfile(base_ms=50, jitter_ms=30),
+        clob=LatencyProfile(base_ms=60, jitter_ms=30),
+    ),
+    Scenario(
+        "book-gaps",
+        "5 wallets, 20% of order book updates lost so books are resynced",
+        wallets=5,
+        trading=BurstProfile(interval=2.0, fills=1),
+        data_api=LatencyProfile(base_ms=40, jitter_ms=20),
+        postgrest=LatencyProfile(base_ms=25, jitter_ms=10),
+        realtime=LatencyProfile(base_ms=50, jitter_ms=30),
+        clob=LatencyProfile(base_ms=60, jitter_ms=30),
+        book_drop_rate=0.2,
+    ),
+]}
@@ -26,6 +26,15 @@ class Config:
         """Initialize configuration by loading from environment"""
         self._load_env_vars()
         self._load_sizing_config()
+        self._load_pipeline_config()
+        self._load_order_book_config()
+        self._load_http_config()
+        self._load_polling_config()
+        self._load_storage_config()
+        self._load_archive_config()
+        self._load_copy_mode_config()
+        self._load_logging_config()
+        self._load_metrics_config()
         self._validate_config()
     
     def _load_env_vars(self):
@@ -39,9 +48,15 @@ class Config:
         self.POLY_FUNDER = os.getenv("POLY_FUNDER")
         self.CLOB_API_URL = os.getenv("CLOB_API_URL", "https://clob.polymarket.com")
         self.POLY_CHAIN_ID = int(os.getenv("POLY_CHAIN_ID", "137"))
+        # Derived CLOB API creds are cached under STATE_DIR so restarts skip the derivation
+        self.CLOB_CREDS_CACHE = os.getenv("CLOB_CREDS_CACHE", "true").lower() in ("1", "true", "yes")
         
         # Trader Wallet Configuration
         self.TRADER_WALLET = os.getenv("TRADER_WALLET")
+        # Additional wallets to copy (see wallet_registry.py)
+        self.TRADER_WALLETS = os.getenv("TRADER_WALLETS")
+        self.TRADER_WALLETS_FILE = os.getenv("TRADER_WALLETS_FILE")
+        self.TABLE_NAME_WALLETS = os.getenv("TABLE_NAME_WALLETS")
         
         # Database Table Names
         self.TABLE_NAME_TRADES = os.getenv("TABLE_NAME_TRADES", "historic_trades")
@@ -53,16 +68,122 @@ class Config:
         self.STAKE_MIN = float(os.getenv("STAKE_MIN", "5"))
         self.STAKE_MAX = float(os.getenv("STAKE_MAX", "20"))
         self.STAKE_WHALE_PCT = float(os.getenv("STAKE_WHALE_PCT", "0.005"))
+        # Exposure caps per market (condition) and per event, 0 = bankroll only
+        self.RISK_MAX_MARKET_USDC = float(os.getenv("RISK_MAX_MARKET_USDC", "0"))
+        self.RISK_MAX_EVENT_USDC = float(os.getenv("RISK_MAX_EVENT_USDC", "0"))
+    
+    def _load_pipeline_config(self):
+        """Load order pipeline configuration from environment or use defaults"""
+        self.ORDER_WORKERS = int(os.getenv("ORDER_WORKERS", "4"))
+        self.ORDER_QUEUE_SIZE = int(os.getenv("ORDER_QUEUE_SIZE", "1000"))
+        self.PIPELINE_REPORT_INTERVAL = float(os.getenv("PIPELINE_REPORT_INTERVAL", "60"))
+        # Per-token tick size / neg risk / min size / fee rate cache
+        self.MARKET_CACHE_TTL = float(os.getenv("MARKET_CACHE_TTL", "3600"))
+        self.MARKET_CACHE_SIZE = int(os.getenv("MARKET_CACHE_SIZE", "5000"))
+        # Fills of one token and side within the window become one order;
+        # anything below the minimum is carried forward as a residual
+        self.COALESCE_WINDOW = float(os.getenv("COALESCE_WINDOW", "0.25"))
+        self.COALESCE_MIN_USDC = float(os.getenv("COALESCE_MIN_USDC", "1"))
+        self.COALESCE_RESIDUAL_TTL = float(os.getenv("COALESCE_RESIDUAL_TTL", "3600"))
+        # Dedupe of trade/position events, snapshotted under STATE_DIR
+        self.DEDUPE_TTL = float(os.getenv("DEDUPE_TTL", "86400"))
+        self.DEDUPE_MAX_SIZE = int(os.getenv("DEDUPE_MAX_SIZE", "100000"))
+        self.DEDUPE_SNAPSHOT_INTERVAL = float(os.getenv("DEDUPE_SNAPSHOT_INTERVAL", "30"))
+    
+    def _load_order_book_config(self):
+        """Load the local order book mirror used to price copy orders"""
+        # Copy orders are priced from a websocket-fed book instead of the trader's fill price
+        self.ORDER_BOOK_MIRROR = os.getenv("ORDER_BOOK_MIRROR", "true").lower() in ("1", "true", "yes")
+        self.CLOB_WS_URL = os.getenv("CLOB_WS_URL", "wss://ws-subscriptions-clob.polymarket.com/ws/market")
+        # Orders are skipped when the book moved further than this from the trader's price (0.05 = 5%)
+        self.MAX_SLIPPAGE = float(os.getenv("MAX_SLIPPAGE", "0.05"))
+    
+    def _load_http_config(self):
+        """Load data API client configuration from environment or use defaults"""
+        self.DATA_API_URL = os.getenv("DATA_API_URL", "https://data-api.polymarket.com")
+        self.HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "5"))
+        self.HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+        # Global budget shared by every data-api request (0 disables it)
+        self.DATA_API_RPS = float(os.getenv("DATA_API_RPS", "20"))
+        self.DATA_API_BURST = int(os.getenv("DATA_API_BURST", "20"))
+    
+    def _load_polling_config(self):
+        """Load polling intervals and local state location from environment or use defaults"""
+        self.HISTORY_POLL_INTERVAL = float(os.getenv("HISTORY_POLL_INTERVAL", "1"))
+        # Adaptive bounds: active wallets are polled at the min, idle ones drift to the max
+        self.HISTORY_POLL_MIN_INTERVAL = float(os.getenv("HISTORY_POLL_MIN_INTERVAL", str(self.HISTORY_POLL_INTERVAL)))
+        self.HISTORY_POLL_MAX_INTERVAL = float(os.getenv("HISTORY_POLL_MAX_INTERVAL", "30"))
+        self.POLL_IDLE_GROWTH = float(os.getenv("POLL_IDLE_GROWTH", "1.5"))
+        self.POLL_MAX_BACKOFF = float(os.getenv("POLL_MAX_BACKOFF", "300"))
+        self.SCHEDULER_REPORT_INTERVAL = float(os.getenv("SCHEDULER_REPORT_INTERVAL", "60"))
+        self.POSITIONS_POLL_INTERVAL = float(os.getenv("POSITIONS_POLL_INTERVAL", "360"))
+        # Position snapshots are paged concurrently up to the cap; rows below
+        # POSITIONS_MIN_VALUE (initial USDC value, 0 = all) are not stored
+        self.POSITIONS_MAX_PAGES = int(os.getenv("POSITIONS_MAX_PAGES", "20"))
+        self.POSITIONS_CONCURRENCY = int(os.getenv("POSITIONS_CONCURRENCY", "8"))
+        self.POSITIONS_MIN_VALUE = float(os.getenv("POSITIONS_MIN_VALUE", "0"))
+        self.HISTORY_MAX_PAGES = int(os.getenv("HISTORY_MAX_PAGES", "10"))
+        self.ACTIVITY_UPSERT_CHUNK_SIZE = int(os.getenv("ACTIVITY_UPSERT_CHUNK_SIZE", "500"))
+        self.LEDGER_RECONCILE_INTERVAL = float(os.getenv("LEDGER_RECONCILE_INTERVAL", "120"))
+        default_state_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".state")
+        self.STATE_DIR = os.getenv("STATE_DIR", default_state_dir)
+        # Position deltas within this many seconds of a copied trade are treated as that trade
+        self.DEDUPE_POSITION_EPOCH = float(os.getenv("DEDUPE_POSITION_EPOCH", str(self.POSITIONS_POLL_INTERVAL)))
+    
+    def _load_storage_config(self):
+        """Load where trades and positions are stored"""
+        # "supabase": hosted project (default), "sqlite": embedded database under STATE_DIR
+        self.STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").lower()
+        self.SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join(self.STATE_DIR, "copybot.db"))
+    
+    def _load_archive_config(self):
+        """Load the historic_trades archive / retention job configuration"""
+        self.ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(self.STATE_DIR, "archive"))
+        # Rows older than this are moved to day-partitioned Arrow files
+        self.ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+        # Seconds between retention runs in the bot, 0 = only via scripts/archive.py
+        self.ARCHIVE_INTERVAL = float(os.getenv("ARCHIVE_INTERVAL", "0"))
+    
+    def _load_copy_mode_config(self):
+        """Load how detected activities reach the order pipeline"""
+        # "direct": poller -> pipeline in-process, Supabase written behind
+        # "realtime": poller -> Supabase -> realtime listener -> pipeline
+        self.COPY_MODE = os.getenv("COPY_MODE", "realtime").lower()
+        self.REALTIME_LISTENERS = os.getenv("REALTIME_LISTENERS", "true").lower() in ("1", "true", "yes")
+        # Heartbeat on the realtime channel; missed rows are backfilled after a resubscribe
+        self.REALTIME_HEARTBEAT_INTERVAL = float(os.getenv("REALTIME_HEARTBEAT_INTERVAL", "15"))
+        self.REALTIME_STALE_AFTER = float(os.getenv("REALTIME_STALE_AFTER", "45"))
+        self.REALTIME_BACKFILL_LIMIT = int(os.getenv("REALTIME_BACKFILL_LIMIT", "1000"))
+        self.WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500"))
+        self.WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "1"))
+    
+    def _load_logging_config(self):
+        """Load logging configuration from environment or use defaults"""
+        # "json" (one object per line) or "text" (human-readable banners)
+        self.LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+        self.LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+        # Per-module overrides, e.g. "main=DEBUG,get_player_positions=WARNING"
+        self.LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+    
+    def _load_metrics_config(self):
+        """Load the latency metrics endpoint configuration"""
+        # Prometheus-format /metrics endpoint, METRICS_PORT=0 disables it
+        self.METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+        self.METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+        self.METRICS_REPORT_INTERVAL = float(os.getenv("METRICS_REPORT_INTERVAL", "60"))
     
     def _validate_config(self):
         """Validate that all required configuration is present"""
         errors = []
         
         # Check required Supabase credentials
-        if not self.SUPABASE_URL:
-            errors.append("SUPABASE_URL is not set in .env file")
-        if not self.SUPABASE_KEY:
-            errors.append("SUPABASE_KEY is not set in .env file")
+        if self.STORAGE_BACKEND not in ("supabase", "sqlite"):
+            errors.append(f"STORAGE_BACKEND must be 'supabase' or 'sqlite' (got '{self.STORAGE_BACKEND}')")
+        if self.STORAGE_BACKEND == "supabase":
+            if not self.SUPABASE_URL:
+                errors.append("SUPABASE_URL is not set in .env file")
+            if not self.SUPABASE_KEY:
+                errors.append("SUPABASE_KEY is not set in .env file")
         
         # Check required Polymarket credentials
         if not self.PRIVATE_KEY:
@@ -71,8 +192,14 @@ class Config:
             errors.append("POLY_FUNDER is not set in .env file")
         
         # Check trader wallet configuration
-        if not self.TRADER_WALLET:
-            errors.append("TRADER_WALLET is not set in .env file")
+        if not (self.TRADER_WALLET or self.TRADER_WALLETS or self.TRADER_WALLETS_FILE or self.TABLE_NAME_WALLETS):
+            errors.append("TRADER_WALLET (or TRADER_WALLETS / TRADER_WALLETS_FILE / TABLE_NAME_WALLETS) is not set in .env file")
+        
+        if self.LOG_FORMAT not in ("json", "text"):
+            errors.append(f"LOG_FORMAT must be 'json' or 'text' (got '{self.LOG_FORMAT}')")
+        
+        if self.COPY_MODE not in ("direct", "realtime"):
+            errors.append(f"COPY_MODE must be 'direct' or 'realtime' (got '{self.COPY_MODE}')")
         
         if errors:
             error_message = "\n❌ Configuration Errors:\n" + "\n".join(f"  - {error}" for error in errors)
@@ -97,14 +224,25 @@ class Config:
         print("=" * 80)
         print("⚙️  CONFIGURATION LOADED")
         print("=" * 80)
-        print(f"📊 Supabase URL: {self.SUPABASE_URL}")
+        if self.STORAGE_BACKEND == "sqlite":
+            print(f"🗄️  Storage: SQLite ({self.SQLITE_PATH})")
+        else:
+            print(f"📊 Supabase URL: {self.SUPABASE_URL}")
         print(f"🔗 CLOB API: {self.CLOB_API_URL}")
         print(f"⛓️  Chain ID: {self.POLY_CHAIN_ID}")
         print(f"📈 Trader Wallet (to copy): {self.TRADER_WALLET[:10] if self.TRADER_WALLET else 'Not set'}...")
+        if self.TRADER_WALLETS or self.TRADER_WALLETS_FILE or self.TABLE_NAME_WALLETS:
+            print(f"📈 Wallet Sources: {', '.join(name for name, value in [('TRADER_WALLETS', self.TRADER_WALLETS), ('TRADER_WALLETS_FILE', self.TRADER_WALLETS_FILE), ('TABLE_NAME_WALLETS', self.TABLE_NAME_WALLETS)] if value)}")
+        print(f"🌐 Data API budget: {self.DATA_API_RPS} req/s (burst {self.DATA_API_BURST})")
         print(f"💰 Bankroll: ${self.get_bankroll()}")
         print(f"📊 Min Stake: ${self.STAKE_MIN}")
         print(f"📊 Max Stake: ${self.STAKE_MAX}")
         print(f"📊 Whale %: {self.STAKE_WHALE_PCT * 100}%")
+        print(f"🛡️  Exposure caps: market ${self.RISK_MAX_MARKET_USDC or 'bankroll'} / event ${self.RISK_MAX_EVENT_USDC or 'bankroll'}")
+        print(f"📖 Order Book Mirror: {f'on (max slippage {self.MAX_SLIPPAGE * 100}%)' if self.ORDER_BOOK_MIRROR else 'off'}")
+        print(f"⚙️  Order Workers: {self.ORDER_WORKERS} (queue size {self.ORDER_QUEUE_SIZE})")
+        print(f"🚦 Copy Mode: {self.COPY_MODE} (realtime listeners: {'on' if self.REALTIME_LISTENERS else 'off'})")
+        print(f"📈 Metrics: {f'http://{self.METRICS_HOST}:{self.METRICS_PORT}/metrics' if self.METRICS_PORT else 'disabled'}")
         print("=" * 80)
 
 
@@ -0,0 +1,260 @@
+"""
+Risk Engine Module for Polymarket Copytrading Bot
+
+Keeps running totals of our USDC exposure per token, per market
+(condition id), per event (event slug) and across the portfolio. Every
+BUY intent is capped at the headroom left under the bankroll and the
+market/event caps before it is queued, and its stake is reserved right
+away so a burst of copy intents cannot over-allocate while their orders
+are still in flight. The stake bounds apply once, to the order the
+intents are merged into (see clamp_order).
+
+All checks and updates are O(1) dictionary arithmetic; only seeding from
+a positions snapshot walks the portfolio.
+"""
+
+import threading
+from typing import Iterable, List, Optional, Tuple
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Amounts below this are treated as zero
+EPSILON = 1e-9
+
+
+class RiskEngine:
+    """
+    Incremental exposure accounting and stake clamping
+
+    Exposure is committed (orders posted, at cost) plus reserved (sized
+    intents whose orders are not posted yet).
+
+    Args:
+        bankroll: Total USDC the bot may have at risk
+        stake_min: Smallest stake of one copied BUY
+        stake_max: Largest stake of one copied BUY
+        max_market_usdc: Cap per market (condition id), 0 = bankroll only
+        max_event_usdc: Cap per event (event slug), 0 = bankroll only
+    """
+
+    def __init__(
+        self,
+        bankroll: float,
+        stake_min: float,
+        stake_max: float,
+        max_market_usdc: float = 0.0,
+        max_event_usdc: float = 0.0,
+    ):
+        self.bankroll = bankroll
+        self.stake_min = stake_min
+        self.stake_max = stake_max
+        self.max_market_usdc = max_market_usdc
+        self.max_event_usdc = max_event_usdc
+        self._lock = threading.Lock()
+        # token -> (market, event)
+        self._keys = {}
+        # token -> committed cost / reserved stake
+        self._committed = {}
+        self._reserved = {}
+        # market / event -> committed + reserved
+        self._by_market = {}
+        self._by_event = {}
+        self.total = 0.0
+        self.clamped = 0
+        self.rejected = 0
+
+    def _move(self, token_id: str, delta: float):
+        """Add delta to the market, event and portfolio totals of a token"""
+        market, event = self._keys.get(token_id, (None, None))
+        if market:
+            self._by_market[market] = self._by_market.get(market, 0.0) + delta
+        if event:
+            self._by_event[event] = self._by_event.get(event, 0.0) + delta
+        self.total += delta
+
+    def _register(self, token_id: str, market: Optional[str], event: Optional[str]):
+        if token_id in self._keys or not (market or event):
+            return
+        # Exposure booked before the token's market was known moves under it
+        exposure = self._committed.get(token_id, 0.0) + self._reserved.get(token_id, 0.0)
+        self._move(token_id, -exposure)
+        self._keys[token_id] = (market, event)
+        self._move(token_id, exposure)
+
+    def headroom(self, token_id: str) -> float:
+        """USDC that can still be added to a token without breaching a limit"""
+        market, event = self._keys.get(token_id, (None, None))
+        room = self.bankroll - self.total
+        if market and self.max_market_usdc > 0:
+            room = min(room, self.max_market_usdc - self._by_market.get(market, 0.0))
+        if event and self.max_event_usdc > 0:
+            room = min(room, self.max_event_usdc - self._by_event.get(event, 0.0))
+        return max(0.0, room)
+
+    def _reserve(self, token_id: str, amount: float):
+        self._reserved[token_id] = self._reserved.get(token_id, 0.0) + amount
+        self._move(token_id, amount)
+
+    def _release(self, token_id: str, amount: float):
+        released = min(amount, self._reserved.get(token_id, 0.0))
+        if released > 0:
+            self._reserved[token_id] -= released
+            if self._reserved[token_id] <= EPSILON:
+                self._reserved.pop(token_id)
+            self._move(token_id, -released)
+
+    def _size(self, token_id: str, stake: float, market: Optional[str], event: Optional[str],
+              stake_max: Optional[float] = None) -> float:
+        token_id = str(token_id)
+        self._register(token_id, market, event)
+        if stake <= EPSILON:
+            return 0.0
+        # No floor here: a fill below stake_min still adds up with the others of its order
+        wanted = min(stake, self.stake_max if stake_max is None else stake_max)
+        allowed = min(wanted, self.headroom(token_id))
+        if allowed <= EPSILON:
+            self.rejected += 1
+            return 0.0
+        if allowed < wanted:
+            self.clamped += 1
+        self._reserve(token_id, allowed)
+        return allowed
+
+    def size_buy(self, token_id: str, stake: float, market: str = None, event: str = None,
+                 stake_max: Optional[float] = None) -> float:
+        """
+        Cap a BUY intent and reserve it
+
+        The stake is capped at stake_max and at the bankroll, market and
+        event headroom, but not raised to stake_min: that happens once for
+        the merged order in clamp_order(). Release or commit the result
+        with settle() once the order is placed.
+
+        Args:
+            stake_max: Per-wallet override of the engine's stake_max
+
+        Returns:
+            float: USDC reserved for the order (0 if no headroom is left)
+        """
+        with self._lock:
+            return self._size(token_id, stake, market, event, stake_max)
+
+    def size_batch(self, intents: Iterable[Tuple[str, float, Optional[str], Optional[str]]]) -> List[float]:
+        """
+        Cap and reserve many BUY intents under one lock
+
+        Args:
+            intents: (token_id, stake, market, event) tuples, sized in order so
+                earlier intents use the headroom first
+
+        Returns:
+            list: USDC reserved per intent
+        """
+        with self._lock:
+            return [self._size(token_id, stake, market, event) for token_id, stake, market, event in intents]
+
+    def clamp_order(self, token_id: str, reserved: float, stake_min: Optional[float] = None,
+                    stake_max: Optional[float] = None) -> float:
+        """
+        Clip the stake of an order to [stake_min, stake_max]
+
+        Called once per order with what its intents reserved: stake above
+        stake_max is released, stake below stake_min is topped up as far
+        as the headroom allows. Bounds left as None use the engine's own.
+
+        Returns:
+            float: USDC now reserved for the order
+        """
+        token_id = str(token_id)
+        with self._lock:
+            low = self.stake_min if stake_min is None else stake_min
+            high = self.stake_max if stake_max is None else stake_max
+            wanted = min(max(reserved, low), high)
+            if wanted < reserved:
+                self._release(token_id, reserved - wanted)
+                return wanted
+            top_up = min(wanted - reserved, self.headroom(token_id))
+            if top_up > EPSILON:
+                self._reserve(token_id, top_up)
+            else:
+                top_up = 0.0
+            if reserved + top_up < wanted - EPSILON:
+                self.clamped += 1
+            return reserved + top_up
+
+    def settle(self, token_id: str, reserved: float, committed: float):
+        """
+        Turn a reservation into committed exposure once its order is placed
+
+        Args:
+            reserved: Stake reserved for the order (released, up to what is still reserved)
+            committed: Cost of the posted order, 0 if nothing was posted
+        """
+        token_id = str(token_id)
+        with self._lock:
+            self._release(token_id, reserved)
+            if committed > 0:
+                self._committed[token_id] = self._committed.get(token_id, 0.0) + committed
+                self._move(token_id, committed)
+
+    def release(self, token_id: str, reserved: float):
+        """Drop a reservation whose intent will never be placed"""
+        self.settle(token_id, reserved, 0.0)
+
+    def apply_sell(self, token_id: str, size: float, held: float):
+        """
+        Reduce the committed cost of a token after selling part of it
+
+        Args:
+            size: Shares sold
+            held: Shares held before the sale
+        """
+        token_id = str(token_id)
+        with self._lock:
+            cost = self._committed.get(token_id, 0.0)
+            if cost <= 0 or held <= 0 or size <= 0:
+                return
+            freed = cost * min(size / held, 1.0)
+            self._committed[token_id] = cost - freed
+            if self._committed[token_id] <= EPSILON:
+                self._committed.pop(token_id)
+            self._move(token_id, -freed)
+
+    def seed(self, positions: list):
+        """
+        Replace the committed exposure with a positions API snapshot
+
+        Reservations of intents still in flight are kept.
+
+        Args:
+            positions: Our Position records as returned by fetch_all_positions
+        """
+        with self._lock:
+            for token_id, cost in self._committed.items():
+                self._move(token_id, -cost)
+            self._committed = {}
+            for position in positions:
+                token_id = str(position.get('asset'))
+                self._register(token_id, position.get('condition_id'), position.get('event_slug'))
+                cost = float(position.get('initial_value') or 0)
+                if cost > 0:
+                    self._committed[token_id] = self._committed.get(token_id, 0.0) + cost
+                    self._move(token_id, cost)
+        logger.debug("Risk engine seeded", positions=len(positions), exposure=round(self.total, 2))
+
+    def market_exposure(self, market: str) -> float:
+        return self._by_market.get(market, 0.0)
+
+    def event_exposure(self, event: str) -> float:
+        return self._by_event.get(event, 0.0)
+
+    def stats(self) -> dict:
+        return {
+            'exposure': self.total,
+            'reserved': sum(self._reserved.values()),
+            'bankroll': self.bankroll,
+            'markets': sum(1 for value in self._by_market.values() if value > EPSILON),
+            'clamped': self.clamped,
+            'rejected': self.rejected,
+        }
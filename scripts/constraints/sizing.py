@@ -1,11 +1,19 @@
 from config import get_config
+from logger import get_logger
 
 config = get_config()
+logger = get_logger(__name__)
 sizing_whale_pct = config.STAKE_WHALE_PCT
 
-def sizing_constraints(usdc_size: float) -> float:
-    new_size = usdc_size * sizing_whale_pct
-    print(new_size)
+def sizing_constraints(usdc_size: float, whale_pct: float = None) -> float:
+    """
+    USDC to copy for a trader's usdc_size
+
+    The result is not clamped to [STAKE_MIN, STAKE_MAX]: the risk engine
+    clamps the order the copy intents end up in.
+    """
+    new_size = usdc_size * (sizing_whale_pct if whale_pct is None else whale_pct)
+    logger.debug("Sized copy order", usdc_size=usdc_size, new_size=new_size)
     return new_size
 
 if __name__ == "__main__":
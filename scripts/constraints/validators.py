@@ -1,24 +1,31 @@
-import requests
+import asyncio
+from http_client import get_json, close_http_client
 
-def has_already_an_open_position(user: str, market: str) -> bool:
+async def has_already_an_open_position(user: str, market: str, timeout: float = None) -> bool:
     """Checks if the user has an open position in the specified market."""
     try:
-        resp = requests.get(
-            "https://data-api.polymarket.com/positions",
+        data = await get_json(
+            "/positions",
             params={"user": user, "market": market},
+            timeout=timeout,
         )
-        resp.raise_for_status()
-        return bool(resp.json())
+        return bool(data)
     except Exception:
         return False
 
 if __name__ == "__main__":
+    async def _check_once(user: str, market: str) -> bool:
+        try:
+            return await has_already_an_open_position(user, market)
+        finally:
+            await close_http_client()
+
     # Example usage - replace with actual addresses
     user_address = input("Enter user address: ")
     market_address = input("Enter market address: ")
     
     if user_address and market_address:
-        result = has_already_an_open_position(user_address, market_address)
+        result = asyncio.run(_check_once(user_address, market_address))
         print(f"Has open position: {result}")
     else:
         print("Please provide both user and market addresses.")
\ No newline at end of file
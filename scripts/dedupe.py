@@ -0,0 +1,139 @@
+"""
+Dedupe Index Module for Polymarket Copytrading Bot
+
+One trader action can reach the handlers more than once: through the
+historic_trades INSERT and through the positions INSERT/UPDATE it causes,
+and again whenever realtime redelivers rows after a reconnect. The dedupe
+index remembers what was already acted on, bounded in size and age, and
+is snapshotted to a small local file so it survives restarts.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class DedupeIndex:
+    """
+    Bounded, time-evicted set of keys
+
+    Args:
+        ttl: Seconds a key is remembered
+        max_size: Max number of keys; the oldest are evicted first
+        snapshot_path: JSON file used by load() / save()
+    """
+
+    def __init__(self, ttl: float = 86400, max_size: int = 100000, snapshot_path: Optional[str] = None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.snapshot_path = snapshot_path
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.duplicates = 0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _evict(self, now: float):
+        while self._keys:
+            key, added_at = next(iter(self._keys.items()))
+            if now - added_at <= self.ttl and len(self._keys) <= self.max_size:
+                break
+            self._keys.popitem(last=False)
+
+    def contains(self, *keys: str) -> bool:
+        """Check if any of the keys was seen and has not expired"""
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            return any(key in self._keys for key in keys)
+
+    def add(self, *keys: str):
+        """Remember keys"""
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                self._keys[key] = now
+                self._keys.move_to_end(key)
+            self._evict(now)
+            self._dirty = True
+
+    def seen_or_add(self, key: str) -> bool:
+        """
+        Atomically check and remember a key
+
+        Returns:
+            bool: True if the key was already seen (a duplicate)
+        """
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            if key in self._keys:
+                self.duplicates += 1
+                return True
+            self._keys[key] = now
+            self._dirty = True
+            return False
+
+    def load(self) -> int:
+        """Load the snapshot, dropping expired keys; returns how many were kept"""
+        if not self.snapshot_path:
+            return 0
+        try:
+            with open(self.snapshot_path) as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            logger.warning("⚠️  Could not read dedupe snapshot", error=str(e))
+            return 0
+        now = time.time()
+        with self._lock:
+            for key, added_at in sorted(entries.items(), key=lambda item: item[1]):
+                self._keys[key] = added_at
+            self._evict(now)
+            return len(self._keys)
+
+    def save(self):
+        """Atomically write the snapshot if anything changed"""
+        if not self.snapshot_path or not self._dirty:
+            return
+        with self._lock:
+            entries = dict(self._keys)
+            self._dirty = False
+        os.makedirs(os.path.dirname(self.snapshot_path) or ".", exist_ok=True)
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.snapshot_path)
+
+    async def snapshot_loop(self, interval: float = 30):
+        """Save the snapshot periodically"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.save)
+            except Exception:
+                logger.exception("❌ Dedupe snapshot failed")
+
+
+def trade_key(activity_key: str) -> str:
+    return f"trade:{activity_key}"
+
+
+def position_epoch_keys(asset: str, side: str, timestamp: float, epoch: float) -> Iterable[str]:
+    """
+    Keys of an (asset, side) position delta for the epoch containing timestamp
+    and the one before it, so a delta observed just after an epoch boundary
+    still matches the trade that caused it
+    """
+    current = int(timestamp // epoch)
+    return [f"delta:{asset}:{side}:{current}", f"delta:{asset}:{side}:{current - 1}"]
@@ -1,18 +1,17 @@
-import requests
-from supabase import create_client, Client
-from datetime import datetime
+import asyncio
 from config import get_config
+from http_client import get_json, close_http_client
+from logger import get_logger
+from models import Activity, decode_activities, to_db_row
+from storage import get_storage_client
+from watermark import Watermark, activity_key
 
 # Load configuration
 config = get_config()
-
-# config supabase
-url: str = config.SUPABASE_URL
-key: str = config.SUPABASE_KEY
-supabase: Client = create_client(url, key)
+logger = get_logger(__name__)
 
 # config api
-API_URL = "https://data-api.polymarket.com/activity"
+API_PATH = "/activity"
 MAX_LIMIT = 500  # max limit of the api
 TABLE_NAME = config.TABLE_NAME_TRADES
 
@@ -26,86 +25,164 @@ def transform_activity_to_db_format(activity: dict) -> dict:
     Returns:
         Dictionary formatted for database insertion
     """
-    # Converter timestamp para datetime
-    
-    activity_datetime = datetime.fromtimestamp(activity['timestamp'])
-    
-    return {
-        'proxy_wallet': activity.get('proxyWallet'),
-        'timestamp': activity.get('timestamp'),
-        'activity_datetime': activity_datetime.isoformat(),
-        'condition_id': activity.get('conditionId'),
-        'type': activity.get('type'),
-        'size': activity.get('size'),
-        'usdc_size': activity.get('usdcSize'),
-        'transaction_hash': activity.get('transactionHash'),
-        'price': activity.get('price'),
-        'asset': activity.get('asset'),
-        'side': activity.get('side'),
-        'outcome_index': activity.get('outcomeIndex'),
-        'title': activity.get('title'),
-        'slug': activity.get('slug'),
-        'icon': activity.get('icon'),
-        'event_slug': activity.get('eventSlug'),
-        'outcome': activity.get('outcome'),
-        'trader_name': activity.get('name'),
-        'pseudonym': activity.get('pseudonym'),
-        'bio': activity.get('bio'),
-        'profile_image': activity.get('profileImage'),
-        'profile_image_optimized': activity.get('profileImageOptimized'),
-    }
+    return Activity.from_api(activity).to_db()
 
-def fetch_activities(user_address: str, limit: int = 500, offset: int = 0):
+async def fetch_activities(user_address: str, limit: int = 500, offset: int = 0, timeout: float = None, start: int = None,
+                           sort_direction: str = "DESC"):
     """
     Fetch activities from the api
+
+    Args:
+        start: Only return activities with a timestamp >= start (unix seconds)
+        sort_direction: "DESC" for newest first, "ASC" for oldest first
+
+    Returns:
+        List of Activity records (read like database-format dicts)
+
+    Raises:
+        httpx.HTTPError: On network errors, timeouts or non-2xx responses
     """
-    resp = requests.get(API_URL, params={
+    params = {
         "user": user_address,
         "limit": str(limit),
         "offset": str(offset),
         "sortBy": "TIMESTAMP",
-        "sortDirection": "DESC",
-    })
+        "sortDirection": sort_direction,
+    }
+    if start:
+        params["start"] = str(start)
+    activities = await get_json(API_PATH, params=params, timeout=timeout, decoder=decode_activities)
+    logger.debug("Fetched activities", wallet=user_address, count=len(activities), offset=offset)
+    return activities
+
 
-    data = resp.json()
-    db_activities = [transform_activity_to_db_format(activity) for activity in data]
-    # print('db_activities', db_activities[0])
-    print('===============================================')
-    print('fetching activities from', user_address)
-    print('db_activities length', len(db_activities))
-    print('===============================================')
-    return db_activities
+async def fetch_new_activities(user_address: str, watermark: Watermark, page_size: int = MAX_LIMIT, max_pages: int = 10):
+    """
+    Fetch only the activities newer than the watermark
 
+    An empty watermark is seeded from the newest page. Otherwise activity
+    starting at the watermark timestamp is read oldest first, so when more
+    than max_pages pages are new the rows returned end where the next poll
+    (from the advanced watermark) picks up, instead of skipping the rows
+    between the watermark and the newest pages.
 
-def insert_activities_batch(activities: list):
+    Returns:
+        List of new Activity records, oldest first
+    """
+    if watermark.is_empty:
+        batch = await fetch_activities(user_address, limit=page_size)
+        return list(reversed(batch))
+
+    new_activities = []
+    for page in range(max_pages):
+        batch = await fetch_activities(
+            user_address,
+            limit=page_size,
+            offset=page * page_size,
+            start=watermark.timestamp,
+            sort_direction="ASC",
+        )
+        new_activities.extend(activity for activity in batch if watermark.is_new(activity))
+        if len(batch) < page_size:
+            break
+    else:
+        logger.warning(
+            "⚠️  More new activity than HISTORY_MAX_PAGES, the next poll continues after it",
+            wallet=user_address, pages=max_pages, activities=len(new_activities),
+        )
+    return new_activities
+
+
+class ActivityWriteError(Exception):
+    """Some activities could not be inserted; rows holds them in database format"""
+
+    def __init__(self, rows: list, inserted: int = 0):
+        super().__init__(f"{len(rows)} activities could not be inserted")
+        self.rows = rows
+        self.inserted = inserted
+
+
+def _is_duplicate_error(error: Exception) -> bool:
+    error_msg = str(error).lower()
+    return 'duplicate' in error_msg or 'unique' in error_msg or 'conflict' in error_msg
+
+
+def _upsert_chunk(chunk: list) -> tuple:
+    """
+    Upsert a chunk of activities in one request, splitting it on failure
+
+    Existing rows are left untouched (ON CONFLICT DO NOTHING), so the
+    returned representation only contains the rows that were inserted.
+
+    Returns:
+        Tuple of (inserted, skipped) row counts and the list of failed rows
+    """
+    try:
+        response = get_storage_client().table(TABLE_NAME).upsert(
+            chunk, on_conflict="unique_activity_key", ignore_duplicates=True
+        ).execute()
+        inserted = len(response.data or [])
+        return inserted, len(chunk) - inserted, []
+    except Exception as e:
+        if len(chunk) == 1:
+            if _is_duplicate_error(e):
+                return 0, 1, []
+            logger.error("❌ Error inserting activity", error=str(e))
+            return 0, 0, chunk
+        # Retry as two smaller chunks to isolate the bad rows
+        logger.warning("⚠️  Chunk failed, retrying in smaller chunks", rows=len(chunk), error=str(e))
+        middle = len(chunk) // 2
+        left = _upsert_chunk(chunk[:middle])
+        right = _upsert_chunk(chunk[middle:])
+        return tuple(a + b for a, b in zip(left, right))
+
+
+def insert_activities_batch(activities: list, chunk_size: int = None):
     """
     Insert activities into the database, skipping duplicates.
-    Uses upsert with unique_activity_key to avoid errors on re-polls.
+    Sends chunked multi-row upserts on unique_activity_key, so the cost
+    scales with the number of chunks instead of the number of rows.
+
+    Raises:
+        ActivityWriteError: Listing the rows that failed after the others were written
     """
     if not activities:
-        print("No activities to insert")
+        logger.debug("No activities to insert")
         return 0
 
+    chunk_size = chunk_size or config.ACTIVITY_UPSERT_CHUNK_SIZE
+
+    # Drop repeated keys inside the batch, Postgres rejects them in one statement
+    unique_activities = list({activity_key(activity): to_db_row(activity) for activity in activities}.values())
+
     success_count = 0
-    skip_count = 0
-    for activity in activities:
-        try:
-            supabase.table(TABLE_NAME).upsert(
-                activity, on_conflict="unique_activity_key"
-            ).execute()
-            success_count += 1
-        except Exception as e:
-            error_msg = str(e).lower()
-            if 'duplicate' in error_msg or 'unique' in error_msg or 'conflict' in error_msg:
-                skip_count += 1
-            else:
-                print(f"Error inserting activity: {e}")
+    skip_count = len(activities) - len(unique_activities)
+    failed_rows = []
+    for idx in range(0, len(unique_activities), chunk_size):
+        chunk = unique_activities[idx:idx + chunk_size]
+        inserted, skipped, failed = _upsert_chunk(chunk)
+        success_count += inserted
+        skip_count += skipped
+        failed_rows.extend(failed)
+        logger.debug("📦 Chunk written", chunk=idx // chunk_size + 1, inserted=inserted, skipped=skipped, failed=len(failed))
     if skip_count:
-        print(f"Skipped {skip_count} duplicate activities")
+        logger.debug("Skipped duplicate activities", skipped=skip_count)
+    if failed_rows:
+        logger.error("❌ Activities could not be inserted", failed=len(failed_rows))
+        raise ActivityWriteError(failed_rows, inserted=success_count)
     return success_count
 
 if __name__ == "__main__":
+    async def _fetch_once(user_address: str):
+        try:
+            return await fetch_activities(user_address)
+        finally:
+            await close_http_client()
+
     user_address = input("Enter the user address: ")
-    activities = fetch_activities(user_address)
-    success_count = insert_activities_batch(activities)
+    activities = asyncio.run(_fetch_once(user_address))
+    try:
+        success_count = insert_activities_batch(activities)
+    except ActivityWriteError as e:
+        success_count = e.inserted
     print(f"Success count: {success_count}")
\ No newline at end of file
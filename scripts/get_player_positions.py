@@ -1,19 +1,38 @@
 # Code to get player positions and detect if any position exceeds the defined limit
-import requests
-from supabase import create_client, Client
+import asyncio
+import time
+import httpx
 from config import get_config
+from http_client import get_json, close_http_client, throttle_delay
+from logger import get_logger
+from models import Position, decode_positions, to_db_row
+from storage import get_storage_client
 
 # Load configuration
 config = get_config()
+logger = get_logger(__name__)
 
-# config supabase
-supabase: Client = create_client(config.SUPABASE_URL, config.SUPABASE_KEY)
-
-API_URL = 'https://data-api.polymarket.com/positions'
+API_PATH = '/positions'
 MAX_LIMIT = 500  # Limite máximo da API
+# Retries of a throttled page before the snapshot fails with the throttle error
+PAGE_RETRIES = 2
 TABLE_NAME = config.TABLE_NAME_POSITIONS
 
-def fetch_player_positions(user_address: str, limit: int = 500, offset: int = 0, condition_id: str = None):
+# Important fields to compare and the tolerance for floats
+FIELDS_TO_COMPARE = ['size']
+SIZE_TOLERANCE = 0.1
+
+async def fetch_player_positions(user_address: str, limit: int = 500, offset: int = 0, condition_id: str = None):
+    """
+    Fetch one page of a wallet's positions
+
+    Returns:
+        List of Position records, None on a request error
+
+    Raises:
+        httpx.HTTPError: When the data-api throttles us (429, 5xx, timeouts),
+            so the caller can back off
+    """
     try:
         params = {
             "user": user_address,
@@ -26,21 +45,105 @@ def fetch_player_positions(user_address: str, limit: int = 500, offset: int = 0,
         if condition_id is not None:
             params["conditionId"] = condition_id
         
-        response = requests.get(API_URL, params=params, timeout=5)
-        response.raise_for_status()
-        data = response.json()
-        # print('data', data)
-        print('===============================================')
-        print('fetching positions from', user_address)
-        print('===============================================')
-        print('data length', len(data))
+        data = await get_json(API_PATH, params=params, decoder=decode_positions)
+        logger.debug("Fetched positions", wallet=user_address, count=len(data), offset=offset)
         return data
     
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Request error (offset {offset}): {e}")
+    except httpx.HTTPError as e:
+        if throttle_delay(e) is not None:
+            raise
+        logger.error("❌ Request error", wallet=user_address, offset=offset, error=str(e))
         return None
 
 
+# Pages the last full snapshot of each wallet took, so the next one fetches them all at once
+_page_hints = {}
+
+
+async def fetch_all_positions(user_address: str, min_value: float = 0.0, max_pages: int = None,
+                              concurrency: int = None, page_size: int = MAX_LIMIT):
+    """
+    Fetch every open position of a wallet, paging concurrently
+
+    The data-api has no total count, so pages are requested in waves: the
+    first wave is as many pages as the wallet's last snapshot took (one for
+    a new wallet), each further wave twice as many. Waves stop at the first
+    short page, at max_pages, or once the rows (sorted by initial value)
+    fall below min_value. Pages share the data-api rate budget and at most
+    `concurrency` are in flight. Rows shifting between pages while they are
+    read are deduplicated by (proxy_wallet, asset). A throttled page is
+    retried after the throttle delay (a 429 also pauses the shared rate
+    limiter), up to PAGE_RETRIES times.
+
+    Args:
+        min_value: Stop at positions with an initial value below this (USDC, 0 = all)
+        max_pages: Page cap (defaults to POSITIONS_MAX_PAGES)
+        concurrency: Max pages in flight (defaults to POSITIONS_CONCURRENCY)
+
+    Returns:
+        tuple: (positions, complete), complete when every open position was read;
+        None if any page failed
+
+    Raises:
+        httpx.HTTPError: When a page is still throttled after its retries
+    """
+    max_pages = max_pages or config.POSITIONS_MAX_PAGES
+    semaphore = asyncio.Semaphore(concurrency or config.POSITIONS_CONCURRENCY)
+    started_at = time.perf_counter()
+
+    async def fetch_page(page: int):
+        for attempt in range(PAGE_RETRIES + 1):
+            try:
+                async with semaphore:
+                    return await fetch_player_positions(user_address, limit=page_size, offset=page * page_size)
+            except httpx.HTTPError as e:
+                if attempt == PAGE_RETRIES:
+                    raise
+                delay = throttle_delay(e) or 2 ** attempt
+                logger.warning("⚠️  Positions page throttled, retrying", wallet=user_address, page=page, delay=delay)
+                await asyncio.sleep(delay)
+
+    def below(position) -> bool:
+        return bool(min_value) and float(position.get('initial_value') or 0) < min_value
+
+    pages = []
+    end = None
+    complete = False
+    wave = min(_page_hints.get(user_address, 1), max_pages)
+    while end is None and len(pages) < max_pages:
+        first = len(pages)
+        batch = await asyncio.gather(*(fetch_page(page) for page in range(first, min(first + wave, max_pages))))
+        if any(rows is None for rows in batch):
+            return None
+        for rows in batch:
+            pages.append(rows)
+            if len(rows) < page_size or (rows and below(rows[-1])):
+                # Pages fetched past this one are dropped
+                end = len(pages)
+                complete = not (rows and below(rows[-1]))
+                break
+        wave *= 2
+
+    positions, seen = [], set()
+    for rows in pages[:end]:
+        for position in rows:
+            if below(position):
+                break
+            key = position_key(position)
+            if key not in seen:
+                seen.add(key)
+                positions.append(position)
+    if end is None:
+        logger.warning("⚠️  Positions truncated at the page cap", wallet=user_address, pages=max_pages)
+    else:
+        _page_hints[user_address] = end
+    logger.debug(
+        "Fetched positions snapshot", wallet=user_address, positions=len(positions), pages=len(pages),
+        complete=complete, seconds=round(time.perf_counter() - started_at, 3),
+    )
+    return positions, complete
+
+
 
 def transform_position_to_db_format(position: dict) -> dict:
     """
@@ -52,129 +155,149 @@ def transform_position_to_db_format(position: dict) -> dict:
     Returns:
         Dictionary formatted for database insertion
     """
-    # Handle end_date: convert empty string or None to NULL
-    end_date = position.get('endDate')
-    if not end_date or end_date == '':
-        end_date = None
-    
-    # Handle eventId: convert string to int, or None if empty
-    event_id = position.get('eventId')
-    if event_id:
-        try:
-            event_id = int(event_id)
-        except (ValueError, TypeError):
-            event_id = None
-    else:
-        event_id = None
-    
-    return {
-       'proxy_wallet': position.get('proxyWallet'),
-       'asset': position.get('asset'),
-       'condition_id': position.get('conditionId'),
-       'size': position.get('size'),
-       'avg_price': position.get('avgPrice'),
-       'initial_value': position.get('initialValue'),
-       'current_value': position.get('currentValue'),
-       'cash_pnl': position.get('cashPnl'),
-       'percent_pnl': position.get('percentPnl'),
-       'total_bought': position.get('totalBought'),
-       'realized_pnl': position.get('realizedPnl'),
-       'percent_realized_pnl': position.get('percentRealizedPnl'),
-       'cur_price': position.get('curPrice'),
-       'redeemable': position.get('redeemable'),
-       'mergeable': position.get('mergeable'),
-       'title': position.get('title'),
-       'slug': position.get('slug'),
-       'icon': position.get('icon'),
-       'event_id': event_id,
-       'event_slug': position.get('eventSlug'),
-       'outcome': position.get('outcome'),
-       'outcome_index': position.get('outcomeIndex'),
-       'opposite_outcome': position.get('oppositeOutcome'),
-       'opposite_asset': position.get('oppositeAsset'),
-       'end_date': end_date,
-       'negative_risk': position.get('negativeRisk'),
-    }
-
-def insert_player_positions_batch(positions: list):
+    return Position.from_api(position).to_db()
+
+def position_key(position: dict) -> tuple:
+    """Key of a database-format position: (proxy_wallet, asset)"""
+    return (str(position.get('proxy_wallet') or '').lower(), str(position.get('asset')))
+
+
+def load_existing_positions(proxy_wallet: str, page_size: int = 1000) -> dict:
+    """
+    Load every stored position of a wallet in one pass
+
+    Returns:
+        Dictionary of database rows keyed by (proxy_wallet, asset)
+    """
+    existing = {}
+    offset = 0
+    while True:
+        response = get_storage_client().table(TABLE_NAME).select("*").eq(
+            "proxy_wallet", proxy_wallet
+        ).range(offset, offset + page_size - 1).execute()
+        rows = response.data or []
+        for row in rows:
+            existing[position_key(row)] = row
+        if len(rows) < page_size:
+            return existing
+        offset += page_size
+
+
+def _has_changed(old_data: dict, new_data: dict) -> bool:
+    """Compare the tracked fields, with a tolerance for floats"""
+    for field in FIELDS_TO_COMPARE:
+        old_val = old_data.get(field)
+        new_val = new_data.get(field)
+        if isinstance(old_val, (int, float)) and isinstance(new_val, (int, float)):
+            if abs(old_val - new_val) > SIZE_TOLERANCE:
+                logger.debug("🔄 Change detected", field=field, old=old_val, new=new_val)
+                return True
+        elif old_val != new_val:
+            logger.debug("🔄 Change detected", field=field, old=old_val, new=new_val)
+            return True
+    return False
+
+
+def diff_positions(existing: dict, snapshot: list, complete: bool = True) -> dict:
+    """
+    Diff an API snapshot against the stored positions in memory
+
+    Args:
+        existing: Stored rows keyed by (proxy_wallet, asset)
+        snapshot: Positions in database format
+        complete: Whether the snapshot holds every open position of the wallet.
+            Closed positions are only detected on complete snapshots.
+
+    Returns:
+        Dictionary with 'inserted', 'updated', 'closed' rows and the 'unchanged' count
+    """
+    inserted, updated, closed = [], [], []
+    unchanged = 0
+    seen = set()
+    for db_position in snapshot:
+        key = position_key(db_position)
+        seen.add(key)
+        old_data = existing.get(key)
+        if old_data is None:
+            inserted.append(db_position)
+        elif _has_changed(old_data, db_position):
+            updated.append(db_position)
+        else:
+            unchanged += 1
+
+    if complete:
+        for key, old_data in existing.items():
+            if key in seen or not old_data.get('size'):
+                continue
+            # The trader no longer holds it: keep the row, flatten it to zero
+            closed_position = dict(old_data)
+            closed_position.update({'size': 0, 'current_value': 0, 'cash_pnl': 0, 'percent_pnl': 0})
+            closed_position.pop('created_at', None)
+            closed_position.pop('updated_at', None)
+            closed.append(closed_position)
+
+    return {'inserted': inserted, 'updated': updated, 'closed': closed, 'unchanged': unchanged}
+
+
+def insert_player_positions_batch(positions: list, complete: bool = False, wallet: str = None):
     """
     Inserts or updates positions only if there are significant changes.
-    Compares with existing data to avoid unnecessary UPDATEs.
+    The stored positions of each wallet are loaded once and diffed in memory,
+    then only the changed rows are written in one bulk upsert.
+
+    Args:
+        positions: Position records as returned by fetch_all_positions
+        complete: Whether positions is the full snapshot of the wallet(s).
+            When True, stored positions missing from it are marked closed (size 0).
+        wallet: Address the snapshot was fetched for, so that an empty complete
+            snapshot still closes the wallet's stored positions
     """
-    if not positions:
-        print("No positions to insert")
+    if not positions and not (complete and wallet):
+        logger.debug("No positions to insert")
         return 0
 
-    success_count = 0
+    snapshot = []
     error_count = 0
-    skipped_count = 0
-    
     for idx, position in enumerate(positions, 1):
         try:
-            # Transform to database format
-            db_position = transform_position_to_db_format(position)
-            asset_id = db_position['asset']
-            proxy_wallet = db_position['proxy_wallet']
-            
-            # Search for existing record in database
-            existing = supabase.table(TABLE_NAME).select("*").eq(
-                "asset", asset_id
-            ).eq(
-                "proxy_wallet", proxy_wallet
-            ).execute()
-            
-            # If doesn't exist, INSERT
-            if not existing.data or len(existing.data) == 0:
-                supabase.table(TABLE_NAME).insert(db_position).execute()
-                success_count += 1
-                print(f"➕ New position inserted: {db_position['title'][:50]}")
-            else:
-                # Exists, check if there was a change
-                old_data = existing.data[0]
-                
-                # Important fields to compare
-                fields_to_compare = [
-                    'size',
-                ]
-                
-                # Check if any field changed
-                has_changes = False
-                for field in fields_to_compare:
-                    old_val = old_data.get(field)
-                    new_val = db_position.get(field)
-                    
-                    # Compare with tolerance for floats
-                    if isinstance(old_val, (int, float)) and isinstance(new_val, (int, float)):
-                        if abs(old_val - new_val) > 0.1:  # Tolerance of 0.1
-                            has_changes = True
-                            print(f"🔄 Change detected in '{field}': {old_val} → {new_val}")
-                            break
-                    elif old_val != new_val:
-                        has_changes = True
-                        print(f"🔄 Change detected in '{field}': {old_val} → {new_val}")
-                        break
-                
-                # Only UPDATE if there are changes
-                if has_changes:
-                    supabase.table(TABLE_NAME).update(db_position).eq(
-                        "asset", asset_id
-                    ).eq(
-                        "proxy_wallet", proxy_wallet
-                    ).execute()
-                    success_count += 1
-                    print(f"🔄 Position updated: {db_position['title'][:50]}")
-                else:
-                    skipped_count += 1
-                    # print(f"⏭️  Position unchanged: {db_position['title'][:50]}")
-                    
+            snapshot.append(to_db_row(position))
         except Exception as e:
             error_count += 1
-            print(f"❌ Error in position {idx}/{len(positions)}: {e}")
-            print(f"   Title: {position.get('title', 'N/A')}")
-            print(f"   Asset: {position.get('asset', 'N/A')[:20]}...")
-            # Continue processing next positions
-    
-    print(f"\n✅ Summary: {success_count} inserted/updated, {skipped_count} unchanged, {error_count} with error")
+            logger.error(
+                "❌ Error in position", index=idx, total=len(positions),
+                title=position.get('title'), asset=position.get('asset'), error=str(e),
+            )
+
+    by_wallet = {}
+    for db_position in snapshot:
+        by_wallet.setdefault(db_position['proxy_wallet'], []).append(db_position)
+    if complete and wallet and not any(address.lower() == wallet.lower() for address in by_wallet):
+        by_wallet[wallet.lower()] = []
+
+    success_count = 0
+    skipped_count = 0
+    for proxy_wallet, wallet_positions in by_wallet.items():
+        try:
+            existing = load_existing_positions(proxy_wallet)
+            diff = diff_positions(existing, wallet_positions, complete=complete)
+            changes = diff['inserted'] + diff['updated'] + diff['closed']
+            skipped_count += diff['unchanged']
+            if changes:
+                get_storage_client().table(TABLE_NAME).upsert(
+                    changes, on_conflict="proxy_wallet,asset"
+                ).execute()
+                success_count += len(changes)
+            for db_position in diff['inserted']:
+                logger.info("➕ New position inserted", title=db_position['title'], asset=db_position['asset'])
+            for db_position in diff['updated']:
+                logger.info("🔄 Position updated", title=db_position['title'], asset=db_position['asset'])
+            for db_position in diff['closed']:
+                logger.info("✖️  Position closed", title=db_position.get('title'), asset=db_position.get('asset'))
+        except Exception as e:
+            error_count += len(wallet_positions)
+            logger.error("❌ Error writing positions", wallet=proxy_wallet, error=str(e))
+
+    logger.info("✅ Positions written", changed=success_count, unchanged=skipped_count, failed=error_count)
     return success_count
 
 
@@ -190,11 +313,11 @@ def print_positions_readable(positions: list):
         print(f"   🏷️  Market: {pos.get('title', 'N/A')} ({pos.get('slug', '-')})")
         print(f"   ➡️  Outcome: {pos.get('outcome', 'N/A')}")
         print(f"   📈 Size: {pos.get('size', 0):,.4f}")
-        print(f"   💵 Initial value:  {pos.get('initialValue', 0):,.2f}")
-        print(f"   📊 Current value:  {pos.get('currentValue', 0):,.2f}")
-        print(f"   ℹ️  PnL:           {pos.get('cashPnl', 0):,.2f} USDC ({pos.get('percentPnl', 0):.2f}%)")
+        print(f"   💵 Initial value:  {pos.get('initial_value', 0):,.2f}")
+        print(f"   📊 Current value:  {pos.get('current_value', 0):,.2f}")
+        print(f"   ℹ️  PnL:           {pos.get('cash_pnl', 0):,.2f} USDC ({pos.get('percent_pnl', 0):.2f}%)")
         print(f"   🔗 Asset ID:       {pos.get('asset', 'N/A')}")
-        print(f"   📅 Expiration date: {pos.get('endDate', 'N/A')}")
+        print(f"   📅 Expiration date: {pos.get('end_date', 'N/A')}")
         print("-"*80)
     print()
 
@@ -202,17 +325,23 @@ def detect_big_positions(positions: list, size_limit: float = 1000.0):
     """Returns a list of positions above the defined limit."""
     big_positions = []
     for position in positions:
-        if position.get('initialValue', 0) > size_limit:
+        if position.get('initial_value', 0) > size_limit:
             big_positions.append(position)
     return big_positions
 
 if __name__ == '__main__':
     # Example usage - replace with actual wallet address
+    async def _fetch_once(user_address: str):
+        try:
+            return await fetch_all_positions(user_address)
+        finally:
+            await close_http_client()
+
     user = input("Enter user address to fetch positions: ") or config.TRADER_WALLET
-    positions = fetch_player_positions(user_address=user)
+    positions, complete = asyncio.run(_fetch_once(user)) or ([], False)
+    insert_player_positions_batch(positions, complete=complete, wallet=user)
     if positions:
         print("positions", positions[0])
-        insert_player_positions_batch(positions)
         print_positions_readable(positions)
     else:
         print("No positions found for this user.")
@@ -0,0 +1,124 @@
+"""
+HTTP Client Module for Polymarket Copytrading Bot
+
+Provides one keep-alive, connection-pooled async client shared by every
+data-api read, so polls and position lookups reuse open TLS connections
+instead of paying a new handshake on each request.
+"""
+
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Optional
+import httpx
+from config import get_config
+from rate_limiter import RateLimiter
+
+# Load configuration
+config = get_config()
+
+DATA_API_URL = config.DATA_API_URL
+
+# One requests-per-second budget for every data-api read
+rate_limiter = RateLimiter(config.DATA_API_RPS, burst=config.DATA_API_BURST)
+
+# Shared client and the event loop it is bound to
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns a singleton pooled async client for the running event loop
+
+    A new client is created if the previous one was bound to another loop
+    (e.g. a CLI script calling asyncio.run more than once).
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            base_url=DATA_API_URL,
+            timeout=config.HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=60,
+            ),
+            headers={"Accept": "application/json"},
+        )
+        _client_loop = loop
+    return _client
+
+
+async def get_json(path: str, params: Optional[dict] = None, timeout: Optional[float] = None,
+                   decoder: Optional[Callable[[bytes], Any]] = None):
+    """
+    GET a data-api path and decode the JSON body
+
+    Waits for the shared rate limiter before sending the request.
+
+    Args:
+        path: Path relative to the data API (e.g. "/positions")
+        params: Query string parameters
+        timeout: Per-call timeout in seconds (defaults to HTTP_TIMEOUT)
+        decoder: Decodes the raw body instead of json (e.g. models.decode_activities)
+
+    Raises:
+        httpx.HTTPError: On network errors, timeouts or non-2xx responses
+    """
+    client = get_http_client()
+    await rate_limiter.acquire()
+    response = await client.get(
+        path,
+        params=params,
+        timeout=timeout if timeout is not None else config.HTTP_TIMEOUT,
+    )
+    if response.status_code == 429:
+        # The whole process is being throttled, slow every caller down
+        rate_limiter.pause(parse_retry_after(response.headers.get("Retry-After")) or 1.0)
+    response.raise_for_status()
+    if decoder is not None:
+        return decoder(response.content)
+    return response.json()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date) into seconds"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def throttle_delay(error: Exception) -> Optional[float]:
+    """
+    Classify an error raised by a data-api call
+
+    Returns:
+        None if the error is not a throttle/server error, otherwise the
+        Retry-After delay in seconds (0 when the server did not send one)
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        if status == 429 or status >= 500:
+            return parse_retry_after(error.response.headers.get("Retry-After")) or 0.0
+        return None
+    if isinstance(error, (httpx.TimeoutException, httpx.TransportError)):
+        return 0.0
+    return None
+
+
+async def close_http_client():
+    """Close the shared client and its pooled connections"""
+    global _client, _client_loop
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
@@ -0,0 +1,434 @@
+"""
+Local Store Module for Polymarket Copytrading Bot
+
+Embedded SQLite storage for single-node deployments (STORAGE_BACKEND=sqlite).
+It mirrors the historic_trades, polymarket_positions and tracked_wallets
+tables of supabase/create_table.sql and answers the part of the Supabase
+query builder the bot uses:
+
+    store.table(name).select("a,b").eq(...).in_(...).gte(...).order(...).range(...).execute()
+    store.table(name).upsert(rows, on_conflict="a,b", ignore_duplicates=True).execute()
+    store.table(name).delete().lt(...).execute()
+
+so the positions, history and wallet modules run unchanged against either
+backend. The database runs in WAL mode, so other processes (the backtest,
+sqlite3 shells) can read it while the bot writes.
+
+Committed writes are published on an in-process change feed in the shape
+of Supabase realtime events (table, "INSERT"/"UPDATE", record, old_record),
+which replaces the realtime channel when the store is local.
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence
+from logger import get_logger
+from watermark import activity_key
+
+logger = get_logger(__name__)
+
+# Column -> declared type. Token ids (NUMERIC(78, 0) in Postgres) are kept
+# as TEXT, they do not fit in a SQLite integer.
+HISTORIC_TRADES_COLUMNS = {
+    'id': 'INTEGER PRIMARY KEY AUTOINCREMENT',
+    'proxy_wallet': 'TEXT NOT NULL',
+    'timestamp': 'INTEGER NOT NULL',
+    'activity_datetime': 'TEXT',
+    'condition_id': 'TEXT',
+    'type': 'TEXT NOT NULL',
+    'size': 'REAL',
+    'usdc_size': 'REAL',
+    'transaction_hash': 'TEXT',
+    'price': 'REAL',
+    'asset': 'TEXT',
+    'side': 'TEXT',
+    'outcome_index': 'INTEGER',
+    'title': 'TEXT',
+    'slug': 'TEXT',
+    'icon': 'TEXT',
+    'event_slug': 'TEXT',
+    'outcome': 'TEXT',
+    'trader_name': 'TEXT',
+    'pseudonym': 'TEXT',
+    'bio': 'TEXT',
+    'profile_image': 'TEXT',
+    'profile_image_optimized': 'TEXT',
+    'unique_activity_key': 'TEXT NOT NULL UNIQUE',
+    'created_at': 'TEXT NOT NULL',
+    'updated_at': 'TEXT NOT NULL',
+}
+
+POLYMARKET_POSITIONS_COLUMNS = {
+    'proxy_wallet': 'TEXT NOT NULL',
+    'asset': 'TEXT NOT NULL',
+    'condition_id': 'TEXT NOT NULL',
+    'size': 'REAL NOT NULL',
+    'avg_price': 'REAL NOT NULL',
+    'initial_value': 'REAL NOT NULL',
+    'current_value': 'REAL NOT NULL',
+    'cash_pnl': 'REAL NOT NULL',
+    'percent_pnl': 'REAL NOT NULL',
+    'total_bought': 'REAL NOT NULL',
+    'realized_pnl': 'REAL NOT NULL',
+    'percent_realized_pnl': 'REAL NOT NULL',
+    'cur_price': 'REAL NOT NULL',
+    'redeemable': 'BOOLEAN NOT NULL',
+    'mergeable': 'BOOLEAN NOT NULL',
+    'title': 'TEXT NOT NULL',
+    'slug': 'TEXT NOT NULL',
+    'icon': 'TEXT NOT NULL',
+    'event_id': 'INTEGER',
+    'event_slug': 'TEXT NOT NULL',
+    'outcome': 'TEXT NOT NULL',
+    'outcome_index': 'INTEGER NOT NULL',
+    'opposite_outcome': 'TEXT NOT NULL',
+    'opposite_asset': 'TEXT NOT NULL',
+    'end_date': 'TEXT',
+    'negative_risk': 'BOOLEAN NOT NULL',
+    'created_at': 'TEXT NOT NULL',
+    'updated_at': 'TEXT NOT NULL',
+}
+
+TRACKED_WALLETS_COLUMNS = {
+    'proxy_wallet': 'TEXT PRIMARY KEY',
+    'label': 'TEXT',
+    'stake_whale_pct': 'REAL',
+    'stake_min': 'REAL',
+    'stake_max': 'REAL',
+    'enabled': 'BOOLEAN NOT NULL DEFAULT 1',
+    'created_at': 'TEXT NOT NULL',
+}
+
+
+class TableSchema:
+    """Columns, keys and indexes of one mirrored table"""
+
+    def __init__(
+        self,
+        columns: Dict[str, str],
+        primary_key: Sequence[str],
+        indexes: Sequence[Sequence[str]] = (),
+        generated: Optional[Dict[str, Callable[[dict], object]]] = None,
+    ):
+        self.columns = columns
+        self.primary_key = tuple(primary_key)
+        self.indexes = [tuple(index) for index in indexes]
+        # Columns computed from the row on every write (GENERATED ALWAYS in Postgres)
+        self.generated = generated or {}
+        self.booleans = {name for name, kind in columns.items() if kind.startswith('BOOLEAN')}
+
+    def create_statements(self, table: str) -> List[str]:
+        definitions = [f"{name} {kind}" for name, kind in self.columns.items()]
+        if not any('PRIMARY KEY' in kind for kind in self.columns.values()):
+            definitions.append(f"PRIMARY KEY ({', '.join(self.primary_key)})")
+        statements = [f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(definitions)})"]
+        for index in self.indexes:
+            statements.append(f"CREATE INDEX IF NOT EXISTS idx_{table}_{'_'.join(index)} ON {table} ({', '.join(index)})")
+        return statements
+
+
+SCHEMAS = {
+    'historic_trades': TableSchema(
+        HISTORIC_TRADES_COLUMNS, ('id',),
+        indexes=[('proxy_wallet', 'timestamp')],
+        generated={'unique_activity_key': activity_key},
+    ),
+    'polymarket_positions': TableSchema(
+        POLYMARKET_POSITIONS_COLUMNS, ('proxy_wallet', 'asset'),
+        indexes=[('updated_at',)],
+    ),
+    'tracked_wallets': TableSchema(TRACKED_WALLETS_COLUMNS, ('proxy_wallet',)),
+}
+
+
+def _bind(value):
+    """SQLite parameter for a value; integers past 64 bits (token ids) are bound as text"""
+    if isinstance(value, int) and not isinstance(value, bool) and not -2**63 <= value < 2**63:
+        return str(value)
+    return value
+
+
+def _now() -> str:
+    # Same fixed-width format for every row, so timestamps also sort as text
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+class LocalStoreError(Exception):
+    """Invalid query against the local store"""
+    pass
+
+
+class LocalResponse:
+    """Query result, shaped like the Supabase client's APIResponse"""
+
+    def __init__(self, data: list, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class LocalQuery:
+    """One query on a local table, built with the Supabase query builder methods"""
+
+    _OPERATORS = {'eq': '=', 'neq': '!=', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<='}
+
+    def __init__(self, store: "LocalStore", table: str):
+        self._store = store
+        self._table = table
+        self._schema = store.schema(table)
+        self._columns: Optional[List[str]] = None
+        self._where: List[str] = []
+        self._params: list = []
+        self._order: List[str] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+        self._upsert: Optional[tuple] = None
+        self._delete: Optional[str] = None
+
+    def _column(self, name: str) -> str:
+        name = name.strip()
+        if name not in self._schema.columns:
+            raise LocalStoreError(f"Column '{name}' does not exist on {self._table}")
+        return name
+
+    def select(self, columns: str = "*", **kwargs) -> "LocalQuery":
+        if columns.strip() != "*":
+            self._columns = [self._column(name) for name in columns.split(",") if name.strip()]
+        return self
+
+    def _filter(self, column: str, operator: str, value) -> "LocalQuery":
+        self._where.append(f"{self._column(column)} {self._OPERATORS[operator]} ?")
+        self._params.append(_bind(value))
+        return self
+
+    def eq(self, column: str, value) -> "LocalQuery":
+        return self._filter(column, 'eq', value)
+
+    def neq(self, column: str, value) -> "LocalQuery":
+        return self._filter(column, 'neq', value)
+
+    def gt(self, column: str, value) -> "LocalQuery":
+        return self._filter(column, 'gt', value)
+
+    def gte(self, column: str, value) -> "LocalQuery":
+        return self._filter(column, 'gte', value)
+
+    def lt(self, column: str, value) -> "LocalQuery":
+        return self._filter(column, 'lt', value)
+
+    def lte(self, column: str, value) -> "LocalQuery":
+        return self._filter(column, 'lte', value)
+
+    def in_(self, column: str, values: Sequence) -> "LocalQuery":
+        values = list(values)
+        if not values:
+            self._where.append("0")
+            return self
+        self._where.append(f"{self._column(column)} IN ({', '.join('?' * len(values))})")
+        self._params.extend(_bind(value) for value in values)
+        return self
+
+    def order(self, column: str, desc: bool = False, **kwargs) -> "LocalQuery":
+        # PostgREST puts NULLs last ascending and first descending
+        self._order.append(f"{self._column(column)} {'DESC NULLS FIRST' if desc else 'ASC NULLS LAST'}")
+        return self
+
+    def limit(self, size: int, **kwargs) -> "LocalQuery":
+        self._limit = int(size)
+        return self
+
+    def range(self, start: int, end: int, **kwargs) -> "LocalQuery":
+        self._offset = int(start)
+        self._limit = int(end) - int(start) + 1
+        return self
+
+    def upsert(self, rows, on_conflict: str = "", ignore_duplicates: bool = False, **kwargs) -> "LocalQuery":
+        rows = rows if isinstance(rows, list) else [rows]
+        conflict = tuple(self._column(name) for name in on_conflict.split(",") if name.strip()) or self._schema.primary_key
+        self._upsert = (rows, conflict, ignore_duplicates)
+        return self
+
+    def delete(self, count: Optional[str] = None, returning: str = "representation", **kwargs) -> "LocalQuery":
+        self._delete = str(getattr(returning, 'value', returning))
+        return self
+
+    def execute(self) -> LocalResponse:
+        if self._upsert is not None:
+            return LocalResponse(self._store._upsert(self._table, *self._upsert))
+        if self._delete is not None:
+            if not self._where:
+                # PostgREST refuses unfiltered deletes as well
+                raise LocalStoreError(f"DELETE on {self._table} requires a filter")
+            return self._store._delete(self._table, " AND ".join(self._where), self._params, self._delete == "representation")
+        sql = f"SELECT {', '.join(self._columns) if self._columns else '*'} FROM {self._table}"
+        if self._where:
+            sql += " WHERE " + " AND ".join(self._where)
+        if self._order:
+            sql += " ORDER BY " + ", ".join(self._order)
+        if self._limit is not None or self._offset:
+            sql += f" LIMIT {self._limit if self._limit is not None else -1} OFFSET {self._offset}"
+        return LocalResponse(self._store._select(self._table, sql, self._params))
+
+
+class LocalStore:
+    """
+    SQLite database mirroring the Supabase tables, with a change feed
+
+    Args:
+        path: Database file (created with its tables if missing)
+        table_names: Configured table name -> mirrored schema name
+            (historic_trades, polymarket_positions, tracked_wallets)
+    """
+
+    def __init__(self, path: str, table_names: Optional[Dict[str, str]] = None):
+        self.path = path
+        self._tables = {name: SCHEMAS[schema] for name, schema in (table_names or {}).items()}
+        for schema_name, schema in SCHEMAS.items():
+            self._tables.setdefault(schema_name, schema)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Durable at checkpoints; a crash can lose only the last commits, which the pollers refetch
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        with self._conn:
+            for table, schema in self._tables.items():
+                for statement in schema.create_statements(table):
+                    self._conn.execute(statement)
+        self._subscribers: List[Callable[[str, str, dict, dict], None]] = []
+        self.writes = 0
+        self.inserted: Dict[str, int] = {}
+        logger.debug("Local store opened", path=path, tables=list(self._tables))
+
+    def schema(self, table: str) -> TableSchema:
+        schema = self._tables.get(table)
+        if schema is None:
+            raise LocalStoreError(f"Table '{table}' is not mirrored by the local store")
+        return schema
+
+    def table(self, table: str) -> LocalQuery:
+        return LocalQuery(self, table)
+
+    def _row(self, schema: TableSchema, row: sqlite3.Row) -> dict:
+        record = dict(row)
+        for name in schema.booleans.intersection(record):
+            if record[name] is not None:
+                record[name] = bool(record[name])
+        return record
+
+    def _select(self, table: str, sql: str, params: list) -> List[dict]:
+        schema = self.schema(table)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._row(schema, row) for row in rows]
+
+    def _upsert(self, table: str, rows: list, conflict: tuple, ignore_duplicates: bool) -> List[dict]:
+        """
+        Insert rows, updating (or with ignore_duplicates skipping) the ones whose
+        conflict columns match a stored row, in one transaction
+
+        Returns:
+            list: The written rows as stored (skipped duplicates excluded)
+        """
+        schema = self.schema(table)
+        written, changes = [], []
+        with self._lock:
+            with self._conn:
+                for row in rows:
+                    values = {}
+                    for name, value in row.items():
+                        if name not in schema.columns:
+                            raise LocalStoreError(f"Column '{name}' does not exist on {table}")
+                        if name not in schema.generated:
+                            values[name] = _bind(value)
+                    for name, compute in schema.generated.items():
+                        values[name] = compute(values)
+                    now = _now()
+                    old = self._conn.execute(
+                        f"SELECT rowid AS _rowid, * FROM {table} WHERE "
+                        + " AND ".join(f"{name} IS ?" for name in conflict),
+                        [values.get(name) for name in conflict],
+                    ).fetchone()
+                    old_record = None
+                    if old is not None:
+                        if ignore_duplicates:
+                            continue
+                        old_record = self._row(schema, old)
+                        rowid = old_record.pop('_rowid')
+                        merged = dict(old_record, **values)
+                        for name, compute in schema.generated.items():
+                            values[name] = compute(merged)
+                        if 'updated_at' in schema.columns:
+                            values['updated_at'] = now
+                        values.pop('created_at', None)
+                        assignments = ", ".join(f"{name} = ?" for name in values)
+                        self._conn.execute(f"UPDATE {table} SET {assignments} WHERE rowid = ?", [*values.values(), rowid])
+                    else:
+                        for name in ('created_at', 'updated_at'):
+                            if name in schema.columns:
+                                values[name] = now
+                        rowid = self._conn.execute(
+                            f"INSERT INTO {table} ({', '.join(values)}) VALUES ({', '.join('?' * len(values))})",
+                            list(values.values()),
+                        ).lastrowid
+                    record = self._row(schema, self._conn.execute(f"SELECT * FROM {table} WHERE rowid = ?", [rowid]).fetchone())
+                    written.append(record)
+                    if old_record is None:
+                        changes.append((table, "INSERT", record, {}))
+                    else:
+                        changes.append((table, "UPDATE", record, old_record))
+            self.writes += len(written)
+            inserts = sum(1 for change in changes if change[1] == "INSERT")
+            if inserts:
+                self.inserted[table] = self.inserted.get(table, 0) + inserts
+        self._publish(changes)
+        return written
+
+    def _delete(self, table: str, where: str, params: list, returning: bool) -> LocalResponse:
+        """Delete the matching rows (not published on the change feed, no handler listens to DELETEs)"""
+        schema = self.schema(table)
+        with self._lock:
+            with self._conn:
+                rows = []
+                if returning:
+                    rows = [self._row(schema, row) for row in self._conn.execute(f"SELECT * FROM {table} WHERE {where}", params)]
+                deleted = self._conn.execute(f"DELETE FROM {table} WHERE {where}", params).rowcount
+        return LocalResponse(rows, deleted)
+
+    # Change feed
+
+    def subscribe(self, callback: Callable[[str, str, dict, dict], None]) -> Callable[[], None]:
+        """
+        Call callback(table, event, record, old_record) for every committed write
+
+        The callback runs on the writing thread; hand the event over to
+        your own loop if needed. Returns a function that unsubscribes.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def _publish(self, changes: list):
+        if not changes:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            for change in changes:
+                try:
+                    callback(*change)
+                except Exception:
+                    logger.exception("❌ Change feed subscriber failed", table=change[0], event=change[1])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
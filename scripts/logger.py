@@ -0,0 +1,161 @@
+"""
+Logging Module for Polymarket Copytrading Bot
+
+Queue-backed structured logging for the hot path. Handlers only put the
+log record on an in-memory queue; a background thread formats it and
+writes it to stdout, so a slow pipe to a log shipper never shows up in
+handler latency.
+
+Formats (LOG_FORMAT):
+  - json: one JSON object per line with the message and its fields
+  - text: the human-readable emoji banners, for local debugging
+
+Levels: LOG_LEVEL sets the default, LOG_LEVELS overrides it per module,
+e.g. LOG_LEVELS=main=DEBUG,get_player_positions=WARNING
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime
+from config import get_config
+
+ROOT_LOGGER = "copybot"
+
+# Keyword arguments the stdlib logger understands, everything else is a field
+_RESERVED_KWARGS = {'exc_info', 'stack_info', 'stacklevel', 'extra'}
+
+# Labels used by the text formatter, so banners read like they used to
+FIELD_LABELS = {
+    'title': '📝 Title',
+    'transaction_hash': '🔑 Transaction Hash',
+    'usdc_size': '💰 USDC Size',
+    'side': '📊 Side',
+    'token_id': '🎯 Token ID',
+    'asset': '🎯 Asset',
+    'price': '💵 Price',
+    'outcome': '🎲 Outcome',
+    'initial_value': '💰 Initial Value',
+    'size': '📊 Size',
+    'avg_price': '💵 Avg Price',
+    'wallet': '👛 Wallet',
+    'value': '💰 Value',
+    'pnl': '📈 PnL',
+}
+
+_listener = None
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """Logger accepting structured fields as keyword arguments"""
+
+    def process(self, msg, kwargs):
+        fields = {key: kwargs.pop(key) for key in list(kwargs) if key not in _RESERVED_KWARGS}
+        if fields:
+            extra = dict(kwargs.get('extra') or {})
+            extra['fields'] = fields
+            kwargs['extra'] = extra
+        return msg, kwargs
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves all formatting to the listener thread"""
+
+    def prepare(self, record):
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname.lower(),
+            'logger': record.name[len(ROOT_LOGGER) + 1:] or record.name,
+            'msg': record.getMessage(),
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines; records logged with banner=True render as the emoji banners"""
+
+    def format(self, record):
+        fields = dict(getattr(record, 'fields', None) or {})
+        banner = fields.pop('banner', False)
+        message = record.getMessage()
+        if banner:
+            lines = ["", "=" * 100, f"{message} [{datetime.fromtimestamp(record.created).strftime('%H:%M:%S')}]"]
+            lines += [f"{FIELD_LABELS.get(key, key)}: {value}" for key, value in fields.items()]
+            lines.append("=" * 100)
+            text = "\n".join(lines)
+        elif fields:
+            text = f"{message} " + " ".join(f"{key}={value}" for key, value in fields.items())
+        else:
+            text = message
+        if record.levelno >= logging.WARNING and not banner:
+            text = f"[{record.levelname}] {text}"
+        if record.exc_info:
+            text += "\n" + self.formatException(record.exc_info)
+        return text
+
+
+def setup_logging(log_format: str = None, level: str = None, module_levels: str = None):
+    """
+    Configure the queue-backed handler once (called lazily by get_logger)
+    """
+    global _listener
+    if _listener is not None:
+        return
+    config = get_config()
+    log_format = (log_format or config.LOG_FORMAT).lower()
+    level = (level or config.LOG_LEVEL).upper()
+    module_levels = module_levels if module_levels is not None else config.LOG_LEVELS
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(TextFormatter() if log_format == "text" else JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger(ROOT_LOGGER)
+    root.handlers = [_DeferredQueueHandler(log_queue)]
+    root.setLevel(level)
+    root.propagate = False
+
+    for entry in (module_levels or "").split(","):
+        name, _, module_level = entry.partition("=")
+        if name.strip() and module_level.strip():
+            logging.getLogger(f"{ROOT_LOGGER}.{name.strip()}").setLevel(module_level.strip().upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=False)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(name: str) -> StructuredLogger:
+    """
+    Get the structured logger of a module
+
+    Args:
+        name: Usually __name__; "__main__" is logged as "main"
+    """
+    setup_logging()
+    if name == "__main__":
+        name = "main"
+    return StructuredLogger(logging.getLogger(f"{ROOT_LOGGER}.{name}"), {})
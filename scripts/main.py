@@ -1,32 +1,196 @@
+import time
+
+# Start of the startup report: importing and setting up the modules below is its first phase
+_started_at = time.perf_counter()
+# Trades older than this found while seeding a new watermark are history, not copied
+_started_at_ts = time.time()
+
 import asyncio
 from datetime import datetime
-import threading
-import time
-import traceback
+from functools import partial
+import os
 from supabase import acreate_client, AsyncClient
-from make_orders import make_order
-from get_player_positions import fetch_player_positions, insert_player_positions_batch
+from make_orders import make_order, market_cache, order_books, price_order, warm_up as warm_up_orders
+from http_client import close_http_client
+from get_player_positions import (
+    fetch_all_positions,
+    insert_player_positions_batch,
+)
 from get_player_history_new import (
-    fetch_activities as fetch_history_activities,
+    ActivityWriteError,
+    fetch_new_activities as fetch_new_history_activities,
     insert_activities_batch as insert_history_batch,
 )
+from watermark import Watermark, WatermarkStore, activity_key
+from dedupe import DedupeIndex, trade_key, position_epoch_keys
+from wallet_registry import TrackedWallet, load_wallet_registry
+from scheduler import PollScheduler
+from position_ledger import PositionLedger, is_filled
 from constraints.sizing import sizing_constraints
+from constraints.risk import RiskEngine
+from order_pipeline import OrderPipeline
+from order_coalescer import OrderCoalescer
+from write_behind import WriteBehindBuffer
+from realtime_listener import LocalChangeListener, RealtimeListener, TableFeed
+from metrics import registry as metrics_registry, serve_metrics, tracer, StartupReport
+from storage import get_local_store, get_storage_client, is_local
 from py_clob_client.order_builder.constants import BUY, SELL
 from config import get_config
+from logger import get_logger
 
 # Load configuration
 config = get_config()
+logger = get_logger(__name__)
 
 # Config Supabase (from centralized config)
 url: str = config.SUPABASE_URL
 key: str = config.SUPABASE_KEY
-trader_wallet = config.TRADER_WALLET
 TABLE_NAME_TRADES = config.TABLE_NAME_TRADES
 TABLE_NAME_POSITIONS = config.TABLE_NAME_POSITIONS
 
 # Cliente Supabase compartilhado
 _supabase_client: AsyncClient = None
 
+# Realtime callbacks only enqueue; workers run the handlers
+pipeline = OrderPipeline(workers=config.ORDER_WORKERS, maxsize=config.ORDER_QUEUE_SIZE)
+
+# Direct mode: activities are persisted behind the copy path
+history_writer = WriteBehindBuffer(
+    insert_history_batch,
+    batch_size=config.WRITE_BEHIND_BATCH_SIZE,
+    flush_interval=config.WRITE_BEHIND_FLUSH_INTERVAL,
+    name="history-writer",
+)
+
+async def _execute_coalesced(token_id: str, side: str, price: float, size: float, traces: list = (),
+                             reserved: float = 0.0, bounds: tuple = None):
+    response = None
+    try:
+        response = await asyncio.to_thread(
+            place_order, price=price, size=size, side=side, token_id=token_id, traces=traces,
+            reserved=reserved if side == BUY else None, bounds=bounds,
+        )
+        logger.info("📤 Response", token_id=token_id, side=side, response=response)
+        return response
+    finally:
+        # Traces skipped or failed inside make_order are already closed
+        for trace in traces:
+            tracer.finish(trace, "placed" if response is not None else "failed", "" if response is not None else "no_response")
+
+
+def _release_residual(token_id: str, side: str, reserved: float, traces: list = ()):
+    if side == BUY:
+        risk.release(token_id, reserved)
+    for trace in traces:
+        tracer.finish(trace, "skipped", "residual_expired")
+
+
+def _market_min_size(token_id: str) -> float:
+    metadata = market_cache.get(token_id)
+    return metadata.min_order_size if metadata else 0.0
+
+
+# Exposure per market, event and portfolio; every BUY is reserved and clamped here
+risk = RiskEngine(
+    config.get_bankroll(),
+    config.STAKE_MIN,
+    config.STAKE_MAX,
+    max_market_usdc=config.RISK_MAX_MARKET_USDC,
+    max_event_usdc=config.RISK_MAX_EVENT_USDC,
+)
+
+# Trade fills of the same token and side are merged into one order
+coalescer = OrderCoalescer(
+    _execute_coalesced,
+    window=config.COALESCE_WINDOW,
+    min_usdc=config.COALESCE_MIN_USDC,
+    min_size=_market_min_size,
+    residual_ttl=config.COALESCE_RESIDUAL_TTL,
+    on_expire=_release_residual,
+)
+
+# Events already acted on, shared by the trade and position handlers
+dedupe = DedupeIndex(
+    ttl=config.DEDUPE_TTL,
+    max_size=config.DEDUPE_MAX_SIZE,
+    snapshot_path=os.path.join(config.STATE_DIR, "dedupe.json"),
+)
+
+# Trader wallets to copy, with their sizing overrides; TABLE_NAME_WALLETS is read during warm-up
+registry = load_wallet_registry(config)
+
+# Local positions of every trader and of our own wallet, used to size SELLs
+trader_ledgers = {wallet.key: PositionLedger(wallet.address, name=wallet.label) for wallet in registry}
+my_ledger = PositionLedger(config.POLY_FUNDER, name="myself", on_seed=risk.seed)
+
+# One polling job per wallet, all sharing the data-api rate budget
+history_scheduler = PollScheduler("history")
+# Also re-seeds the trader ledgers, see poll_positions_once
+positions_scheduler = PollScheduler("positions")
+
+startup = StartupReport(_started_at)
+startup.record("imports", time.perf_counter() - _started_at)
+
+
+def _whale_pct(wallet: TrackedWallet):
+    """Per-wallet STAKE_WHALE_PCT override, None to use the global one"""
+    return wallet.stake_whale_pct if wallet else None
+
+
+def _stake_bounds(wallet: TrackedWallet):
+    """Per-wallet (STAKE_MIN, STAKE_MAX) overrides, None to use the global ones"""
+    return wallet.stake_bounds if wallet else None
+
+
+def _stake_max(wallet: TrackedWallet):
+    """Per-wallet STAKE_MAX override, None to use the global one"""
+    return wallet.stake_max if wallet else None
+
+
+def place_order(price: float, size: float, side: str, token_id: str, traces: list = (),
+                reserved: float = None, bounds: tuple = None):
+    """
+    Price an order from the local order book, place it, apply an immediate
+    fill to our own ledger and settle the order's exposure with the risk engine.
+    A SELL is capped at the shares we hold.
+
+    Args:
+        reserved: USDC the risk engine reserved for a BUY (default price * size),
+            released in full once the order settles
+        bounds: Per-wallet (stake_min, stake_max) of a BUY, None for the global ones
+    """
+    held = my_ledger.size(token_id)
+    if side == BUY:
+        if reserved is None:
+            reserved = price * size
+        # Stake bounds apply to the whole order, not to each intent in it
+        stake = risk.clamp_order(token_id, reserved, *(bounds or ()))
+        if stake <= 0:
+            return None
+        size, reserved = stake / price, stake
+    elif size > held:
+        # Merged SELL intents can add up to more than we hold
+        if held <= 0:
+            logger.info("⏭️  Nothing held to sell, dropping order", token_id=token_id, size=size)
+            return None
+        size = held
+    priced = price_order(price, size, side, token_id, traces=traces)
+    if priced is None:
+        if side == BUY:
+            risk.release(token_id, reserved)
+        return None
+    price, size = priced
+    response = make_order(price=price, size=size, side=side, token_id=token_id, traces=traces)
+    if is_filled(response):
+        my_ledger.apply_fill(token_id, side, size)
+    posted = bool(response) and response.get('success', True)
+    if side == BUY:
+        risk.settle(token_id, reserved=reserved, committed=price * size if posted else 0.0)
+    elif posted:
+        risk.apply_sell(token_id, size, held)
+    return response
+
+
 async def get_supabase() -> AsyncClient:
     """
     Returns a singleton instance of the Supabase client
@@ -37,12 +201,18 @@ async def get_supabase() -> AsyncClient:
     return _supabase_client
 
 
-def handle_new_trade(payload):
+async def handle_new_trade(payload):
     """
     Handler for new inserted trades
+
+    The event's trace is handed to the coalescer with the copy intent, and
+    finished here on every path that does not get that far.
     """
+    started_at = time.time()
+    record = payload.get('data', {}).get('record', {})
+    trace = tracer.start(activity_key(record), record.get('timestamp'))
+    outcome = ("failed", "handler_error")
     try:
-        record = payload.get('data', {}).get('record', {})
         transaction_hash = record.get('transaction_hash')
         usdc_size = record.get('usdc_size')
         side = record.get('side')
@@ -52,43 +222,84 @@ def handle_new_trade(payload):
         size = record.get('size')
         proxy_wallet = record.get('proxy_wallet')
         condition_id = record.get('condition_id')
+        wallet = registry.get(proxy_wallet)
         
-        print("\n" + "=" * 100)
-        print(f"🔍 New trade received! [{datetime.now().strftime('%H:%M:%S')}]")
-        print(f"📝 Title: {title}")
-        print(f"🔑 Transaction Hash: {transaction_hash}")
-        print(f"💰 USDC Size: {usdc_size}")
-        print(f"📊 Side: {side}")
-        print(f"🎯 Token ID: {token_id}")
-        print(f"💵 Price: {price}")
-        print("=" * 100)
+        logger.info(
+            "🔍 New trade received!", banner=True,
+            title=title, transaction_hash=transaction_hash, usdc_size=usdc_size,
+            side=side, token_id=token_id, price=price,
+        )
 
+        if wallet is None:
+            logger.info("⏭️  Wallet is not tracked, skipping", wallet=proxy_wallet)
+            outcome = ("skipped", "untracked_wallet")
+            return None
+
+        if dedupe.seen_or_add(trade_key(activity_key(record))):
+            logger.info("⏭️  Trade already handled, skipping duplicate", transaction_hash=transaction_hash)
+            outcome = ("skipped", "duplicate")
+            if 'started' in trace.stages:
+                # The original event is still being handled and holds the trace
+                tracer.count(*outcome)
+                trace = None
+            return None
+        trace.mark('started', at=started_at)
+        # Position events for this asset and direction in the same epoch come from this trade
+        dedupe.add(position_epoch_keys(token_id, side, record.get('timestamp') or time.time(), config.DEDUPE_POSITION_EPOCH)[0])
+
+        trader_ledger = trader_ledgers[wallet.key]
         if side == SELL:
-            print(f"⏭️  Side is SELL, checking the % of the position from the TRADER")
-            data_trader = fetch_player_positions(user_address=proxy_wallet, condition_id=condition_id)
-            data_myself = fetch_player_positions(user_address=trader_wallet, condition_id=condition_id)
-            size_trader = data_trader[0].get('size')
-            size_myself = data_myself[0].get('size')
-            percentage_position = usdc_size / size_trader
+            logger.debug("⏭️  Side is SELL, checking the % of the position from the TRADER")
+            if not trader_ledger.is_seeded or not my_ledger.is_seeded:
+                await asyncio.gather(trader_ledger.refresh(), my_ledger.refresh())
+            size_sold = float(size or 0)
+            # The trader's position just before this sell, not after the whole poll batch
+            size_trader = trader_ledger.size_before(record)
+            size_myself = my_ledger.size(token_id)
+            if size_trader <= 0 or size_myself <= 0 or size_sold <= 0:
+                logger.info("⏭️  No position to sell, skipping order", size_trader=size_trader, size_myself=size_myself)
+                outcome = ("skipped", "no_position")
+                return None
+            percentage_position = min(size_sold / size_trader, 1.0)
             final_size = percentage_position*size_myself
-            response = make_order(price=price, size=final_size, side=side, token_id=token_id)
-            print(f"📤 Response: {response}")
-            return response 
+            await coalescer.add(token_id, side, final_size, price, trace=trace)
         else:
-            print(f"⏭️  Side is BUY, checking if size is greater than 1")
-            sized_usdc = sizing_constraints(usdc_size)
-            sized_size = sizing_constraints(size)
-            if sized_usdc >= 1:
-                print(f"✅ Sized USDC ({sized_usdc}) >= 1, placing order with size {sized_size}...")
-                response = make_order(price=price, size=sized_size, side=side, token_id=token_id)
-                print(f"📤 Response: {response}")
-                return response
-            else:
-                print(f"⏭️  Sized USDC ({sized_usdc}) < 1, skipping order")
+            logger.debug("⏭️  Side is BUY, queueing for coalescing", min_usdc=config.COALESCE_MIN_USDC)
+            price = float(price)
+            stake = risk.size_buy(
+                token_id,
+                sizing_constraints(float(size or 0) * price, _whale_pct(wallet)),
+                market=condition_id,
+                event=record.get('event_slug'),
+                stake_max=_stake_max(wallet),
+            )
+            if stake <= 0:
+                logger.info("⏭️  No exposure headroom left, skipping order", token_id=token_id, exposure=round(risk.total, 2))
+                outcome = ("skipped", "risk_limit")
                 return None
+            await coalescer.add(
+                token_id, side, stake / price, price, trace=trace, reserved=stake, bounds=_stake_bounds(wallet),
+            )
+        # The coalescer finishes the trace with the merged order
+        trace = None
+        return None
     except Exception as e:
-        print(f"❌ Error processing new trade: {e}")
+        logger.exception("❌ Error processing new trade", error=str(e))
         return None
+    finally:
+        if trace is not None:
+            tracer.finish(trace, *outcome)
+
+
+def on_trade_insert(payload):
+    """
+    Realtime callback for trade INSERTs: timestamp the trace, then enqueue
+    """
+    record = payload.get('data', {}).get('record', {})
+    trace = tracer.start(activity_key(record), record.get('timestamp'))
+    trace.mark('received')
+    if not pipeline.submit(handle_new_trade, payload):
+        tracer.finish(trace, "failed", "queue_full")
 
 
 def handle_new_position(payload):
@@ -98,39 +309,51 @@ def handle_new_position(payload):
     try:
         record = payload.get('data', {}).get('record', {})
         
-        # Campos do Polymarket (camelCase)
+        # Database columns, as projected by POSITION_COLUMNS
         asset = record.get('asset')
-        initial_value = record.get('initialValue') 
+        initial_value = record.get('initial_value') or 0
         size = record.get('size')
-        avg_price = record.get('avgPrice', 0)
+        avg_price = record.get('avg_price') or 0
         title = record.get('title', 'N/A')
         outcome = record.get('outcome', 'N/A')
-        proxy_wallet = record.get('proxyWallet', 'N/A')
-
-        print("\n" + "=" * 100)
-        print(f"📈 New position received! [{datetime.now().strftime('%H:%M:%S')}]")
-        print(f"📝 Title: {title}")
-        print(f"🎲 Outcome: {outcome}")
-        print(f"🎯 Asset: {asset}")
-        print(f"💰 Initial Value: ${initial_value:.4f}")
-        print(f"📊 Size: {size}")
-        print(f"💵 Avg Price: ${avg_price:.4f}")
-        print(f"👛 Wallet: {proxy_wallet[:10]}...")
-        print("=" * 100)
-
-        sized_value = sizing_constraints(initial_value)
+        proxy_wallet = record.get('proxy_wallet')
+        wallet = registry.get(proxy_wallet)
+
+        logger.info(
+            "📈 New position received!", banner=True,
+            title=title, outcome=outcome, asset=asset, initial_value=initial_value,
+            size=size, avg_price=avg_price, wallet=proxy_wallet,
+        )
+
+        if dedupe.contains(*position_epoch_keys(asset, BUY, time.time(), config.DEDUPE_POSITION_EPOCH)):
+            logger.info("⏭️  Position already copied from its trades, skipping", asset=asset)
+            return None
+        if dedupe.seen_or_add(f"position:{proxy_wallet}:{asset}:new"):
+            logger.info("⏭️  Position already handled, skipping duplicate", asset=asset)
+            return None
+
+        sized_value = sizing_constraints(initial_value, _whale_pct(wallet))
         
         if sized_value > 1:
-            print(f"✅ Sized value ({sized_value}) > 1, placing buy order...")
-            response = make_order(price=avg_price, size=sizing_constraints(size), side=BUY, token_id=asset)
-            print(f"📤 Response: {response}")
+            stake = risk.size_buy(
+                asset, sized_value, market=record.get('condition_id'), event=record.get('event_slug'),
+                stake_max=_stake_max(wallet),
+            )
+            if stake <= 0:
+                logger.info("⏭️  No exposure headroom left, skipping position", asset=asset)
+                return None
+            logger.info("✅ Sized value > 1, placing buy order...", sized_value=sized_value, stake=stake)
+            response = place_order(
+                price=avg_price, size=stake / avg_price, side=BUY, token_id=asset,
+                reserved=stake, bounds=_stake_bounds(wallet),
+            )
+            logger.info("📤 Response", token_id=asset, side=BUY, response=response)
             return response 
         else:
-            print(f"⏭️  Sized value ({sized_value}) <= 1, skipping position")
+            logger.info("⏭️  Sized value <= 1, skipping position", sized_value=sized_value)
             return None
     except Exception as e:
-        print(f"❌ Error processing new position: {e}")
-        traceback.print_exc()
+        logger.exception("❌ Error processing new position", error=str(e))
         return None
 
 
@@ -146,6 +369,7 @@ def handle_update_position(payload):
         asset = new_record.get('asset')
         title = new_record.get('title', 'N/A')
         outcome = new_record.get('outcome', 'N/A')
+        wallet = registry.get(new_record.get('proxy_wallet'))
         
         old_value = old_record.get('current_value', 0)  # ✅ Corrigido: camelCase
         new_value = new_record.get('current_value', 0)  # ✅ Corrigido: camelCase
@@ -158,211 +382,429 @@ def handle_update_position(payload):
         cur_price = new_record.get('cur_price', 0)
         avg_price = new_record.get('avg_price', 0)
         
-        print("\n" + "=" * 100)
-        print(f"🔄 Position update received! [{datetime.now().strftime('%H:%M:%S')}]")
-        print(f"📝 Title: {title}")
-        print(f"🎲 Outcome: {outcome}")
-        print(f"🎯 Asset: {asset}")
-        print(f"💰 Value: ${old_value:.4f} → ${new_value:.4f} (Δ: ${new_value - old_value:+.4f})")
-        print(f"📊 Size: {old_size} → {new_size} (Δ: {new_size - old_size:+.2f})")
-        print(f"💵 Price: Avg ${avg_price:.4f} | Current ${cur_price:.4f}")
-        print(f"📈 PnL: ${cash_pnl:+.4f} ({percent_pnl:+.1f}%)")
-        print("=" * 100)
+        logger.info(
+            "🔄 Position update received!", banner=True,
+            title=title, outcome=outcome, asset=asset,
+            old_value=old_value, new_value=new_value, old_size=old_size, new_size=new_size,
+            avg_price=avg_price, cur_price=cur_price, cash_pnl=cash_pnl, percent_pnl=percent_pnl,
+        )
         
 
-        sized_value = sizing_constraints(new_value - old_value)
+        delta_side = BUY if new_size >= old_size else SELL
+        if dedupe.contains(*position_epoch_keys(asset, delta_side, time.time(), config.DEDUPE_POSITION_EPOCH)):
+            logger.info("⏭️  Position change already copied from its trades, skipping", asset=asset)
+            return None
+        if dedupe.seen_or_add(f"position:{new_record.get('proxy_wallet')}:{asset}:{old_size}->{new_size}"):
+            logger.info("⏭️  Position update already handled, skipping duplicate", asset=asset)
+            return None
+
+        sized_value = sizing_constraints(new_value - old_value, _whale_pct(wallet))
         if sized_value > 1:
-            print(f"✅ Sized value ({sized_value}) > 1, placing buy order...")
-            response = make_order(price=avg_price, size=sized_value, side=BUY, token_id=asset)
-            print(f"📤 Response: {response}")
+            stake = risk.size_buy(
+                asset, sized_value, market=new_record.get('condition_id'), event=new_record.get('event_slug'),
+                stake_max=_stake_max(wallet),
+            )
+            if stake <= 0:
+                logger.info("⏭️  No exposure headroom left, skipping position update", asset=asset)
+                return None
+            logger.info("✅ Sized value > 1, placing buy order...", sized_value=sized_value, stake=stake)
+            response = place_order(
+                price=avg_price, size=stake / avg_price, side=BUY, token_id=asset,
+                reserved=stake, bounds=_stake_bounds(wallet),
+            )
+            logger.info("📤 Response", token_id=asset, side=BUY, response=response)
             return response
         elif sized_value <= -1:
-            print(f"⏭️  Sized value ({sized_value}) <= -1, placing sell order...")
-            response = make_order(price=avg_price, size=sized_value, side=SELL, token_id=asset)
-            print(f"📤 Response: {response}")
+            # Sell the share of our position the trader sold (all of it on a close);
+            # nothing is left when the trade path already sold it
+            sold = 1.0 - new_size / old_size if old_size > 0 else 0.0
+            sell_size = min(max(sold, 0.0), 1.0) * my_ledger.size(asset)
+            if sell_size <= 0:
+                logger.info("⏭️  No position left to sell, skipping position update", asset=asset, new_size=new_size)
+                return None
+            logger.info("⏭️  Sized value <= -1, placing sell order...", sized_value=sized_value, size=sell_size)
+            response = place_order(price=avg_price, size=sell_size, side=SELL, token_id=asset)
+            logger.info("📤 Response", token_id=asset, side=SELL, response=response)
             return response
         else:
-            print(f"⏭️  Sized value ({sized_value}) did not meet the criteria")
+            logger.info("⏭️  Sized value did not meet the criteria", sized_value=sized_value)
             return None
     except Exception as e:
-        print(f"❌ Error processing position update: {e}")
-        traceback.print_exc()
+        logger.exception("❌ Error processing position update", error=str(e))
         return None
 
-async def listen_to_positions():
-    """
-    Starts listener for new positions (INSERTs)
-    """
-    print("🔍 Starting positions listener...")
-    print(f"📊 Monitoring table: {TABLE_NAME_POSITIONS} (INSERT)")
-    
-    try:
-        # Usar cliente compartilhado
-        supabase = await get_supabase()
+# Columns the realtime handlers read (the cursor, key and filter columns are added by TableFeed)
+TRADE_COLUMNS = (
+    'transaction_hash', 'condition_id', 'price', 'size', 'usdc_size', 'side',
+    'asset', 'title', 'event_slug', 'timestamp',
+)
+POSITION_COLUMNS = (
+    'condition_id', 'size', 'avg_price', 'initial_value', 'current_value', 'cash_pnl',
+    'percent_pnl', 'cur_price', 'title', 'outcome', 'event_slug',
+)
 
-        response = (
-            await supabase.channel("positions-inserts")
-            .on_postgres_changes("INSERT", schema="public", table=TABLE_NAME_POSITIONS, callback=handle_new_position)
-            .subscribe()
-        )
-        
-        print("✅ Positions listener connected!\n")
-        
-        # Keep running until interrupted
-        while True:
-            await asyncio.sleep(1)
-            
-    except asyncio.CancelledError:
-        print("🛑 Positions listener cancelled")
-        if 'response' in locals():
-            await response.unsubscribe()
-        raise
-    except Exception as e:
-        print(f"❌ Error in positions listener: {e}")
-        raise
 
-async def listen_to_updates():
+def _copy_feeds(trades: bool = True) -> list:
     """
-    Starts listener for position updates (UPDATEs)
+    Table feeds of the copy channel, filtered server-side to the tracked wallets
     """
-    print("🔍 Starting updates listener...")
-    print(f"📊 Monitoring table: {TABLE_NAME_POSITIONS} (UPDATE)")
-    
-    try:
-        # Usar cliente compartilhado
-        supabase = await get_supabase()
-        
-        response = (
-            await supabase.channel("positions-updates")
-            .on_postgres_changes("UPDATE", schema="public", table=TABLE_NAME_POSITIONS, callback=handle_update_position)
-            .subscribe()
-        )
+    # Addresses are stored lowercase, as the data API returns them
+    wallets = [wallet.key for wallet in registry]
+    feeds = [
+        # updated_at is bumped by a trigger on every write (see supabase/create_table.sql)
+        TableFeed(
+            TABLE_NAME_POSITIONS,
+            {"INSERT": pipeline.callback(handle_new_position), "UPDATE": pipeline.callback(handle_update_position)},
+            cursor_column="updated_at", key_columns=("proxy_wallet", "asset"), created_column="created_at",
+            filter_column="proxy_wallet", filter_values=wallets, columns=POSITION_COLUMNS,
+        ),
+    ]
+    if trades:
+        feeds.insert(0, TableFeed(
+            TABLE_NAME_TRADES, {"INSERT": on_trade_insert},
+            cursor_column="id", key_columns=("id",),
+            filter_column="proxy_wallet", filter_values=wallets, columns=TRADE_COLUMNS,
+        ))
+    return feeds
 
-        print("✅ Updates listener connected!\n")
-        
-        # Keep running until interrupted
-        while True:
-            await asyncio.sleep(1)
-            
-    except asyncio.CancelledError:
-        print("🛑 Updates listener cancelled")
-        if 'response' in locals():
-            await response.unsubscribe()
-        raise
-    except Exception as e:
-        print(f"❌ Error in updates listener: {e}")
-        raise
 
-async def listen_to_trades():
+async def listen_to_changes(trades: bool = True):
     """
-    Starts listener for new trades (INSERTs)
+    Starts one realtime channel for trade INSERTs and position INSERTs/UPDATEs
+    of the tracked wallets, routing each event to its handler
+
+    Args:
+        trades: Whether to subscribe to trades (off in direct mode, where the poller copies them)
     """
-    print("🔍 Starting trades listener...")
-    print(f"📊 Monitoring table: {TABLE_NAME_TRADES} (INSERT)")
-    
-    try:
-        # Usar cliente compartilhado
-        supabase = await get_supabase()
+    feeds = _copy_feeds(trades)
+    logger.info("🔍 Starting realtime listener...", tables=[feed.table for feed in feeds], wallets=len(registry))
 
-        response = (
-            await supabase.channel("trades-inserts")
-            .on_postgres_changes("INSERT", schema="public", table=TABLE_NAME_TRADES, callback=handle_new_trade)
-            .subscribe()
+    if is_local():
+        # Rows written to the embedded store are delivered in-process
+        listener = LocalChangeListener("copy-changes", feeds, get_local_store())
+    else:
+        listener = RealtimeListener(
+            "copy-changes", feeds, get_supabase,
+            heartbeat_interval=config.REALTIME_HEARTBEAT_INTERVAL,
+            stale_after=config.REALTIME_STALE_AFTER,
+            backfill_limit=config.REALTIME_BACKFILL_LIMIT,
         )
-        
-        print("✅ Trades listener connected!\n")
-        
-        # Keep running until interrupted
-        while True:
-            await asyncio.sleep(1)
-            
+
+    try:
+        await listener.run()
     except asyncio.CancelledError:
-        print("🛑 Trades listener cancelled")
-        if 'response' in locals():
-            await response.unsubscribe()
+        logger.info("🛑 Realtime listener cancelled")
         raise
     except Exception as e:
-        print(f"❌ Error in trades listener: {e}")
+        logger.error("❌ Error in realtime listener", error=str(e))
         raise
 
 
-async def run_all_listeners():
+async def run_all_listeners(listeners: list = None):
     """
     Runs all listeners in parallel
     """
-    print("=" * 100)
-    print("🚀 STARTING POLYMARKET MONITORING SYSTEM")
-    print("=" * 100)
-    print(f"⏰ Start time: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
-    print()
+    logger.info("🚀 STARTING POLYMARKET MONITORING SYSTEM", start_time=datetime.now().strftime('%d/%m/%Y %H:%M:%S'))
     
+    if listeners is None:
+        listeners = [listen_to_changes]
+    await pipeline.start()
+
     try:
-        # Run all listeners simultaneously
-        await asyncio.gather(
-            listen_to_trades(),
-            listen_to_positions(),
-            listen_to_updates()
-        )
+        if listeners:
+            # Run all listeners simultaneously
+            await asyncio.gather(*(listener() for listener in listeners))
+        else:
+            logger.info("ℹ️  Realtime listeners disabled, running pollers only")
+            await asyncio.Event().wait()
     except KeyboardInterrupt:
-        print("\n" + "=" * 100)
-        print("🛑 Interrupted by user (Ctrl+C)")
-        print("=" * 100)
+        logger.info("🛑 Interrupted by user (Ctrl+C)")
     except Exception as e:
-        print("\n" + "=" * 100)
-        print(f"❌ Fatal error: {e}")
-        print("=" * 100)
+        logger.critical("❌ Fatal error", error=str(e))
         raise
     finally:
-        print(f"⏰ End time: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
-        print("👋 System shutdown!")
+        logger.info("👋 System shutdown!", end_time=datetime.now().strftime('%d/%m/%Y %H:%M:%S'))
 
 
-def _start_polling_threads():
-    """Start 5s polling threads for history and positions."""
-    user_addr = config.TRADER_WALLET
-    print("starting polling threads")
-    if not user_addr:
-        print("No user address configured for polling; skipping background polling.")
-        return
+def dispatch_activities(activities: list) -> int:
+    """
+    Send newly detected trades straight to the order pipeline (direct mode)
 
-    def poll_history_loop():
-        while True:
-            try:
-                activities = fetch_history_activities(user_addr, limit=500, offset=0)
-                if activities:
-                    insert_history_batch(activities)
-            except Exception:
-                traceback.print_exc()
-            time.sleep(5)
-
-    def poll_positions_loop():
-        while True:
+    Returns:
+        int: Number of trades queued
+    """
+    queued = 0
+    for activity in activities:
+        if activity.get('type') != 'TRADE':
+            continue
+        payload = {'data': {'type': 'INSERT', 'table': TABLE_NAME_TRADES, 'record': activity}}
+        if pipeline.submit(handle_new_trade, payload):
+            queued += 1
+        else:
+            tracer.finish(tracer.start(activity_key(activity)), "failed", "queue_full")
+    return queued
+
+
+async def poll_history_once(wallet: TrackedWallet, watermark: Watermark, store: WatermarkStore) -> int:
+    """
+    Poll one wallet's activity feed incrementally and store the new rows
+
+    Only activity newer than the persisted watermark is fetched. In realtime
+    mode the watermark advances after the rows have been written, stopping
+    before the oldest row that could not be written so the next poll
+    retries it; in direct mode new trades are queued for copying first and
+    the rows are written behind, so the watermark advances as soon as they
+    are dispatched.
+
+    An empty watermark is seeded from the wallet's newest page: those rows
+    are stored but only the trades made since the process started are
+    copied, the older ones are marked as handled.
+
+    Returns:
+        int: Number of new activities
+    """
+    seeding = watermark.is_empty
+    activities = await fetch_new_history_activities(
+        wallet.address, watermark, max_pages=config.HISTORY_MAX_PAGES
+    )
+    if activities:
+        detected_at = time.time()
+        live = activities
+        if seeding:
+            live = [activity for activity in activities if (activity.get('timestamp') or 0) >= _started_at_ts]
+            history = [activity for activity in activities if (activity.get('timestamp') or 0) < _started_at_ts]
+            # The realtime handler sees these rows once stored, skip them there too
+            dedupe.add(*(trade_key(activity_key(activity)) for activity in history if activity.get('type') == 'TRADE'))
+            logger.info("💧 Seeded history watermark", wallet=wallet.label, history=len(history), live=len(live))
+        trades = [activity for activity in live if activity.get('type') == 'TRADE']
+        for activity in trades:
+            tracer.start(activity_key(activity), activity.get('timestamp')).mark('detected', at=detected_at)
+        market_cache.prefetch(activity.get('asset') for activity in activities)
+        trader_ledgers[wallet.key].apply_activities(activities)
+        failed = []
+        if config.COPY_MODE == "direct":
+            dispatch_activities(live)
+            history_writer.add(activities)
+        else:
             try:
-                positions = fetch_player_positions(user_address=user_addr, limit=50, offset=0)
-                if positions:
-                    insert_player_positions_batch(positions)
-            except Exception:
-                traceback.print_exc()
-            time.sleep(6 * 60)
+                await asyncio.to_thread(insert_history_batch, activities)
+            except ActivityWriteError as e:
+                failed = e.rows
+                logger.warning("⚠️  Holding the watermark before rows that were not stored", wallet=wallet.label, failed=len(failed))
+            stored_at = time.time()
+            failed_keys = {activity_key(row) for row in failed}
+            for activity in trades:
+                if activity_key(activity) not in failed_keys:
+                    tracer.mark(activity_key(activity), 'stored', at=stored_at)
+        watermark.advance(activities, failed)
+        store.save(wallet.address, watermark)
+    return len(activities)
+
+
+async def poll_positions_once(wallet: TrackedWallet) -> int:
+    """
+    Poll one wallet's full positions snapshot, re-seed its ledger from it and
+    store it in the database, so both share one fetch
+    """
+    fetched_at = time.time()
+    snapshot = await fetch_all_positions(wallet.address)
+    if snapshot is None:
+        raise RuntimeError(f"positions fetch failed for {wallet.label}")
+    positions, complete = snapshot
+    trader_ledgers[wallet.key].seed(positions, fetched_at)
+    if positions:
+        market_cache.prefetch(position.get('asset') for position in positions)
+    if config.POSITIONS_MIN_VALUE:
+        # The ledger needs every position, the table only the ones worth copying;
+        # positions left out must not be closed
+        stored = [position for position in positions if float(position.get('initial_value') or 0) >= config.POSITIONS_MIN_VALUE]
+        complete = complete and len(stored) == len(positions)
+        positions = stored
+    if positions or complete:
+        # Only a complete snapshot proves that missing rows are closed positions,
+        # an empty one closes them all
+        await asyncio.to_thread(insert_player_positions_batch, positions, complete, wallet.address)
+    return len(positions)
+
+
+def _positions_interval() -> float:
+    """One positions snapshot serves the positions table and the ledger reconcile, at the shorter interval"""
+    return min(config.POSITIONS_POLL_INTERVAL, config.LEDGER_RECONCILE_INTERVAL)
+
+
+def _start_polling_tasks() -> list:
+    """Start per-wallet history and positions polling on the running event loop."""
+    logger.info("starting polling tasks", wallets=len(registry))
+    if not len(registry):
+        logger.warning("No user address configured for polling; skipping background polling.")
+        return []
+
+    store = WatermarkStore(config.STATE_DIR)
+    for wallet in registry:
+        watermark = store.load(wallet.address)
+        logger.info("💧 History watermark", wallet=wallet.label, timestamp=watermark.timestamp or None)
+        history_scheduler.add(
+            wallet.key,
+            partial(poll_history_once, wallet, watermark, store),
+            config.HISTORY_POLL_INTERVAL,
+            min_interval=config.HISTORY_POLL_MIN_INTERVAL,
+            max_interval=config.HISTORY_POLL_MAX_INTERVAL,
+            idle_growth=config.POLL_IDLE_GROWTH,
+            max_backoff=config.POLL_MAX_BACKOFF,
+        )
+        positions_scheduler.add(
+            wallet.key, partial(poll_positions_once, wallet), _positions_interval(),
+            max_backoff=config.POLL_MAX_BACKOFF,
+        )
+
+    return (
+        history_scheduler.start()
+        # Warm-up just polled the positions, the next poll is one interval away
+        + positions_scheduler.start(initial_delay=_positions_interval())
+        + [asyncio.create_task(history_scheduler.report_loop(config.SCHEDULER_REPORT_INTERVAL), name="history-report")]
+    )
+
+
+def _select_listeners() -> list:
+    """Pick the realtime listeners for the configured copy mode."""
+    if not config.REALTIME_LISTENERS:
+        return []
+    if config.COPY_MODE == "direct":
+        # Trades already reach the pipeline from the poller
+        return [partial(listen_to_changes, trades=False)]
+    return [listen_to_changes]
+
+
+def _warm_up_database():
+    """Create the storage client and open its (pooled) connection"""
+    get_storage_client().table(TABLE_NAME_TRADES).select("id").limit(1).execute()
+
 
-    threading.Thread(target=poll_history_loop, daemon=True).start()
-    threading.Thread(target=poll_positions_loop, daemon=True).start()
+async def load_wallet_table():
+    """Reload the registry with the wallets of TABLE_NAME_WALLETS and give new ones a ledger"""
+    global registry
+    registry = await asyncio.to_thread(load_wallet_registry, config, get_storage_client())
+    for wallet in registry:
+        if wallet.key not in trader_ledgers:
+            trader_ledgers[wallet.key] = PositionLedger(wallet.address, name=wallet.label)
+
+
+async def seed_ledgers():
+    """Seed our ledger, and every trader's from a first positions poll"""
+    names = [my_ledger.name] + [wallet.label for wallet in registry]
+    results = await asyncio.gather(
+        my_ledger.refresh(), *(poll_positions_once(wallet) for wallet in registry), return_exceptions=True,
+    )
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            # Trader ledgers are seeded on the first SELL instead
+            logger.warning("⚠️  Ledger seed failed", ledger=name, error=str(result))
+
+
+async def warm_up():
+    """
+    Load the wallet table, seed the ledgers, load the CLOB API creds and open
+    every connection the copy path uses, so the first copied trade is as
+    fast as later ones
+    """
+    async def timed(phase: str, coro):
+        with startup.phase(phase):
+            return await coro
+
+    if config.TABLE_NAME_WALLETS:
+        # Before the ledgers are seeded, they are created per wallet
+        try:
+            await timed("wallets", load_wallet_table())
+        except Exception as e:
+            logger.warning("⚠️  Could not load the wallet table, copying the configured wallets only", error=str(e))
+    steps = {
+        "ledgers": seed_ledgers(),
+        "order_path": asyncio.to_thread(warm_up_orders),
+        "database": asyncio.to_thread(_warm_up_database),
+    }
+    if config.REALTIME_LISTENERS and not is_local():
+        steps["realtime_client"] = get_supabase()
+    results = await asyncio.gather(*(timed(phase, coro) for phase, coro in steps.items()), return_exceptions=True)
+    for phase, result in zip(steps, results):
+        if isinstance(result, Exception):
+            logger.warning("⚠️  Warm-up step failed, it will run on first use instead", phase=phase, error=str(result))
+        elif phase == "order_path":
+            for step, seconds in result.items():
+                startup.record(step, seconds)
+    # Market metadata of everything held, for the first SELLs
+    market_cache.prefetch(set(my_ledger.assets()).union(*(ledger.assets() for ledger in trader_ledgers.values())))
+
+
+async def run_bot():
+    """
+    Runs the pipeline, pollers and the selected listeners on one event loop
+    """
+    restored = dedupe.load()
+    if restored:
+        logger.info("🧷 Restored dedupe keys from snapshot", keys=restored)
+    await pipeline.start()
+    await history_writer.start()
+    metrics_registry.gauge("order_queue_depth", "Events waiting for an order worker", lambda: pipeline.depth)
+    metrics_registry.gauge("coalescer_pending_intents", "Copy intents waiting in the coalescer", lambda: coalescer.pending_intents)
+    metrics_registry.gauge("risk_exposure_usdc", "Committed plus reserved USDC exposure", lambda: risk.total)
+    metrics_registry.gauge("copy_open_traces", "Detected trades not placed, skipped or failed yet", lambda: tracer.open_traces)
+    metrics_registry.gauge("order_book_synced_tokens", "Tokens with an in-sync local order book", lambda: order_books.synced)
+    metrics_registry.gauge("startup_seconds", "Seconds from process start until ready to copy", lambda: startup.total)
+    metrics_server = await serve_metrics(config.METRICS_HOST, config.METRICS_PORT)
+    background_tasks = [
+        asyncio.create_task(tracer.report_loop(config.METRICS_REPORT_INTERVAL), name="latency-report"),
+        asyncio.create_task(dedupe.snapshot_loop(config.DEDUPE_SNAPSHOT_INTERVAL), name="dedupe-snapshot"),
+        asyncio.create_task(pipeline.report_loop(config.PIPELINE_REPORT_INTERVAL), name="pipeline-report"),
+        asyncio.create_task(coalescer.report_loop(config.PIPELINE_REPORT_INTERVAL), name="coalescer-report"),
+        asyncio.create_task(coalescer.expire_loop(max(1.0, min(config.COALESCE_RESIDUAL_TTL, 60))), name="coalescer-expiry"),
+    ]
+    if config.ORDER_BOOK_MIRROR:
+        background_tasks.append(asyncio.create_task(order_books.run(), name="order-books"))
+    try:
+        # Seed the ledgers before polling so new activity applies on top of the snapshot
+        logger.info("🔥 Warming up...")
+        await warm_up()
+        background_tasks += _start_polling_tasks()
+        background_tasks += [
+            asyncio.create_task(my_ledger.reconcile_loop(config.LEDGER_RECONCILE_INTERVAL), name="ledger-myself"),
+        ]
+        if config.ARCHIVE_INTERVAL > 0:
+            # pyarrow is only imported when the retention job is on
+            from archive import archive_loop
+            background_tasks.append(asyncio.create_task(archive_loop(
+                config.ARCHIVE_INTERVAL, get_storage_client, TABLE_NAME_TRADES,
+                config.ARCHIVE_DIR, config.ARCHIVE_AFTER_DAYS,
+            ), name="archive"))
+    except Exception:
+        logger.exception("❌ Error starting background tasks")
+    startup.ready()
+
+    try:
+        await run_all_listeners(_select_listeners())
+    finally:
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        await pipeline.stop()
+        await coalescer.flush_all()
+        coalescer.log_stats()
+        tracer.log_summary()
+        if metrics_server is not None:
+            metrics_server.close()
+        await history_writer.stop()
+        if is_local():
+            get_local_store().close()
+        dedupe.save()
+        await close_http_client()
 
 
 if __name__ == "__main__":
     # Print configuration summary
     config.print_config_summary()
-    
-    try:
-        _start_polling_threads()
-    except Exception:
-        traceback.print_exc()
 
-    # Run all listeners
-    asyncio.run(run_all_listeners())
+    # Run pollers and all listeners
+    asyncio.run(run_bot())
     
-    # To run only a specific listener, comment the line above and uncomment one of the lines below:
-    # asyncio.run(listen_to_trades())
-    # asyncio.run(listen_to_positions())
-    # asyncio.run(listen_to_updates())
+    # To run only the realtime listener, comment the line above and uncomment the line below:
+    # asyncio.run(listen_to_changes())
     
@@ -1,45 +1,268 @@
+import json
+import math
+import os
+import threading
+import time
+from typing import Optional, Tuple
 from py_clob_client.client import ClobClient
-from py_clob_client.clob_types import OrderArgs, OrderType
+from py_clob_client.clob_types import ApiCreds, CreateOrderOptions, OrderArgs, OrderType
 from py_clob_client.order_builder.constants import BUY, SELL
 from config import get_config
+from logger import get_logger
+from market_cache import MarketMetadata, MarketMetadataCache
+from metrics import order_seconds, orders_total, tracer
+from order_book import OrderBookMirror
 
 # Load configuration once at module level
 config = get_config()
+logger = get_logger(__name__)
 
 # Initialize client once and reuse across all orders
 _client = None
+# Orders are placed from several pipeline workers at once
+_client_lock = threading.Lock()
+
+# Cached API creds, only valid for the same signer and CLOB host
+CREDS_FILE = "clob_api_creds.json"
+
+
+def _creds_path() -> str:
+    return os.path.join(config.STATE_DIR, CREDS_FILE)
+
+
+def _load_cached_creds(address: str) -> Optional[ApiCreds]:
+    if not config.CLOB_CREDS_CACHE:
+        return None
+    try:
+        with open(_creds_path()) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get('address') != address or cached.get('host') != config.CLOB_API_URL:
+        return None
+    return ApiCreds(cached['api_key'], cached['api_secret'], cached['api_passphrase'])
+
+
+def _save_cached_creds(address: str, creds: ApiCreds):
+    """Atomically write the creds, readable by the owner only"""
+    if not config.CLOB_CREDS_CACHE:
+        return
+    os.makedirs(config.STATE_DIR, exist_ok=True)
+    path = _creds_path()
+    tmp_path = f"{path}.tmp"
+    with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+        json.dump({
+            'address': address,
+            'host': config.CLOB_API_URL,
+            'api_key': creds.api_key,
+            'api_secret': creds.api_secret,
+            'api_passphrase': creds.api_passphrase,
+        }, f)
+    os.replace(tmp_path, path)
+
+
+def _derive_creds(client: ClobClient) -> ApiCreds:
+    creds = client.create_or_derive_api_creds()
+    _save_cached_creds(client.get_address(), creds)
+    return creds
+
 
 def _get_client() -> ClobClient:
     global _client
-    if _client is None:
-        _client = ClobClient(
-            config.CLOB_API_URL,
-            key=config.PRIVATE_KEY,
-            chain_id=config.POLY_CHAIN_ID,
-            signature_type=1,
-            funder=config.POLY_FUNDER,
-        )
-        _client.set_api_creds(_client.create_or_derive_api_creds())
+    with _client_lock:
+        if _client is None:
+            client = ClobClient(
+                config.CLOB_API_URL,
+                key=config.PRIVATE_KEY,
+                chain_id=config.POLY_CHAIN_ID,
+                signature_type=1,
+                funder=config.POLY_FUNDER,
+            )
+            client.set_api_creds(_load_cached_creds(client.get_address()) or _derive_creds(client))
+            _client = client
     return _client
 
-def make_order(price: float, size: float, side: str, token_id: str):
+def load_market_metadata(token_id: str) -> MarketMetadata:
+    """
+    Fetch the order-construction metadata of a token from the CLOB
+
+    The order book summary carries tick size, neg risk and min order size
+    in one request; the fee rate is fetched when the client supports it.
+    """
+    client = _get_client()
+    book = client.get_order_book(token_id)
+    if config.ORDER_BOOK_MIRROR:
+        # The same snapshot starts the token's local book
+        order_books.seed(token_id, book)
+    tick_size = getattr(book, 'tick_size', None) or client.get_tick_size(token_id)
+    neg_risk = getattr(book, 'neg_risk', None)
+    if neg_risk is None:
+        neg_risk = client.get_neg_risk(token_id)
+    min_order_size = float(getattr(book, 'min_order_size', None) or 0)
+    fee_rate_bps = 0
+    if hasattr(client, 'get_fee_rate_bps'):
+        fee_rate_bps = int(client.get_fee_rate_bps(token_id) or 0)
+    return MarketMetadata(token_id, str(tick_size), bool(neg_risk), min_order_size, fee_rate_bps)
+
+
+# Per-token market metadata, shared by all orders
+market_cache = MarketMetadataCache(
+    load_market_metadata,
+    ttl=config.MARKET_CACHE_TTL,
+    max_size=config.MARKET_CACHE_SIZE,
+)
+
+# Local order books of every token with loaded metadata, fed by the market websocket
+order_books = OrderBookMirror(
+    config.CLOB_WS_URL,
+    snapshot=lambda token_id: _get_client().get_order_book(token_id),
+    on_tick_size=market_cache.invalidate,
+)
+
+
+def price_order(price: float, size: float, side: str, token_id: str, traces: list = ()) -> Optional[Tuple[float, float]]:
+    """
+    Price a copy order against the token's mirrored order book
+
+    A BUY takes the price that fills its size from the asks now and keeps
+    its USDC stake, a SELL the price the bids pay; both are capped at
+    MAX_SLIPPAGE from the trader's price. Without an in-sync book the
+    trader's price is used as is.
+
+    Returns:
+        tuple: (price, size), or None when the book moved past the cap
+    """
+    book = order_books.book(token_id) if config.ORDER_BOOK_MIRROR else None
+    best = None if book is None else book.best_ask() if side == BUY else book.best_bid()
+    if best is None:
+        return price, size
+
+    if side == BUY:
+        limit = price * (1 + config.MAX_SLIPPAGE)
+        beyond = best > limit + 1e-9
+    else:
+        limit = price * (1 - config.MAX_SLIPPAGE)
+        beyond = best < limit - 1e-9
+    if beyond:
+        logger.info("⏭️  Book moved past max slippage, skipping order", token_id=token_id, side=side, price=price, best=best)
+        _skip(traces, "slippage")
+        return None
+
+    swept = book.sweep(side, size)
+    repriced = min(swept, limit) if side == BUY else max(swept, limit)
+    metadata = market_cache.get(token_id)
+    tick_size = metadata.tick_size if metadata else "0.01"
+    # Round inside the cap: down for a BUY, up for a SELL
+    steps = repriced / float(tick_size)
+    steps = math.floor(steps + 1e-9) if side == BUY else math.ceil(steps - 1e-9)
+    repriced = round(steps * float(tick_size), len(tick_size.partition('.')[2]))
+    if side == BUY:
+        size = price * size / repriced if repriced > 0 else size
+    if repriced != price:
+        logger.debug("Order repriced from the book", token_id=token_id, side=side, price=price, repriced=repriced, best=best)
+    return repriced, size
+
+
+def make_order(price: float, size: float, side: str, token_id: str, metadata: MarketMetadata = None, traces: list = ()):
+    """
+    Sign and post a GTC order
+
+    The order is built locally from the token's cached market metadata, so
+    a warm cache leaves the post as the only network call.
+
+    Args:
+        metadata: Market metadata of the token (looked up in the cache if omitted)
+        traces: Latency traces of the copied trades, marked as signed/posted
+    """
     try:
-        print('Making order...')
+        logger.debug("Making order...", token_id=token_id, side=side, price=price, size=size)
         client = _get_client()
+        if metadata is None:
+            metadata = market_cache.get_or_load(token_id)
+
+        tick = float(metadata.tick_size)
+        if not tick <= price <= 1 - tick:
+            logger.info("⏭️  Price outside the tick range, skipping order", price=price, tick_size=metadata.tick_size)
+            _skip(traces, "price_out_of_range")
+            return None
+        if size < metadata.min_order_size:
+            logger.info("⏭️  Size below min order size, skipping order", size=size, min_order_size=metadata.min_order_size)
+            _skip(traces, "below_min_size")
+            return None
 
         order_args = OrderArgs(
             price=price,
             size=size,
             side=side,
             token_id=token_id,
+            fee_rate_bps=metadata.fee_rate_bps,
+        )
+        started_at = time.perf_counter()
+        signed_order = client.builder.create_order(
+            order_args,
+            CreateOrderOptions(tick_size=metadata.tick_size, neg_risk=metadata.neg_risk),
         )
-        signed_order = client.create_order(order_args)
+        signed_at = time.perf_counter()
+        for trace in traces:
+            trace.mark('signed')
         resp = client.post_order(signed_order, OrderType.GTC)
-        print(resp)
+        for trace in traces:
+            trace.mark('posted')
+        order_seconds.observe(signed_at - started_at, step="sign")
+        order_seconds.observe(time.perf_counter() - signed_at, step="post")
+        orders_total.inc(result="posted")
+        logger.debug("Order posted", token_id=token_id, response=resp)
         return resp
     except Exception as e:
-        print(f"Error making order: {e}")
+        logger.error("❌ Error making order", token_id=token_id, error=str(e))
+        orders_total.inc(result="failed")
+        for trace in traces:
+            tracer.finish(trace, "failed", "order_error")
+        # The market may have changed (e.g. a new tick size), reload it next time
+        market_cache.invalidate(token_id)
         return None
 
+
+def warm_up() -> dict:
+    """
+    Prepare the order path so the first copied trade is as fast as later ones
+
+    Builds the client (with cached or freshly derived API creds), checks the
+    creds with an authenticated request that also opens the pooled CLOB
+    connection, and signs a throwaway order so the signing code is loaded
+    and hot.
+
+    Returns:
+        dict: Seconds spent per step
+    """
+    timings = {}
+    started_at = time.perf_counter()
+    client = _get_client()
+    timings['clob_client'] = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    try:
+        client.get_api_keys()
+    except Exception as e:
+        # Cached creds were revoked or belong to another key, derive new ones
+        logger.warning("⚠️  CLOB API creds rejected, deriving new ones", error=str(e))
+        client.set_api_creds(_derive_creds(client))
+    timings['clob_auth'] = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    # Never posted: only warms up order building and EIP-712 signing
+    client.builder.create_order(
+        OrderArgs(price=0.5, size=10, side=BUY, token_id="1"),
+        CreateOrderOptions(tick_size="0.01", neg_risk=False),
+    )
+    timings['sign'] = time.perf_counter() - started_at
+    return timings
+
+
+def _skip(traces: list, reason: str):
+    orders_total.inc(result="skipped")
+    for trace in traces:
+        tracer.finish(trace, "skipped", reason)
+
 if __name__ == "__main__":
     make_order(price=0.071, size=14.1, side=BUY, token_id='27745789011483877770092220164639878505910623464021791529418856008078952259643')
@@ -0,0 +1,136 @@
+"""
+Market Metadata Cache Module for Polymarket Copytrading Bot
+
+Keeps per-token market metadata (tick size, neg risk, min order size, fee
+rate) in a TTL/LRU cache so order construction does not resolve it over
+the network on every copied order. Tokens are prefetched in the background
+as soon as a trader activity or position references them.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class MarketMetadata:
+    """Static order-construction metadata of one token"""
+
+    __slots__ = ('token_id', 'tick_size', 'neg_risk', 'min_order_size', 'fee_rate_bps', 'fetched_at')
+
+    def __init__(self, token_id: str, tick_size: str, neg_risk: bool, min_order_size: float = 0.0, fee_rate_bps: int = 0):
+        self.token_id = token_id
+        self.tick_size = tick_size
+        self.neg_risk = neg_risk
+        self.min_order_size = min_order_size
+        self.fee_rate_bps = fee_rate_bps
+        self.fetched_at = time.monotonic()
+
+    def __repr__(self) -> str:
+        return (
+            f"MarketMetadata(tick_size={self.tick_size}, neg_risk={self.neg_risk}, "
+            f"min_order_size={self.min_order_size}, fee_rate_bps={self.fee_rate_bps})"
+        )
+
+
+class MarketMetadataCache:
+    """
+    Thread-safe TTL/LRU cache of MarketMetadata keyed by token id
+
+    Orders are built from worker threads, so loads are guarded per token:
+    concurrent callers for the same token wait for one load instead of
+    each hitting the network.
+    """
+
+    def __init__(self, loader: Callable[[str], MarketMetadata], ttl: float = 3600, max_size: int = 5000):
+        self.loader = loader
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._prefetch_tasks = set()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token_id: str) -> Optional[MarketMetadata]:
+        """Return fresh cached metadata, or None"""
+        token_id = str(token_id)
+        with self._lock:
+            metadata = self._entries.get(token_id)
+            if metadata is None or time.monotonic() - metadata.fetched_at > self.ttl:
+                return None
+            self._entries.move_to_end(token_id)
+            return metadata
+
+    def put(self, metadata: MarketMetadata):
+        with self._lock:
+            self._entries[metadata.token_id] = metadata
+            self._entries.move_to_end(metadata.token_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token_id: str):
+        """Drop a token, e.g. after the exchange rejected an order for a stale tick size"""
+        with self._lock:
+            self._entries.pop(str(token_id), None)
+
+    def get_or_load(self, token_id: str) -> MarketMetadata:
+        """Return cached metadata, loading it (blocking) on a miss"""
+        token_id = str(token_id)
+        metadata = self.get(token_id)
+        if metadata is not None:
+            self.hits += 1
+            return metadata
+
+        with self._lock:
+            event = self._inflight.get(token_id)
+            owner = event is None
+            if owner:
+                event = self._inflight[token_id] = threading.Event()
+        if not owner:
+            event.wait()
+            metadata = self.get(token_id)
+            if metadata is not None:
+                self.hits += 1
+                return metadata
+            return self.get_or_load(token_id)
+
+        self.misses += 1
+        try:
+            metadata = self.loader(token_id)
+            self.put(metadata)
+            return metadata
+        finally:
+            with self._lock:
+                self._inflight.pop(token_id, None)
+            event.set()
+
+    def load_many(self, token_ids: Iterable[str]) -> int:
+        """Load every token not cached yet, returning how many were loaded"""
+        loaded = 0
+        for token_id in token_ids:
+            if not token_id or self.get(token_id) is not None:
+                continue
+            try:
+                self.get_or_load(token_id)
+                loaded += 1
+            except Exception:
+                logger.exception("❌ Market metadata load failed", token_id=token_id)
+        return loaded
+
+    def prefetch(self, token_ids: Iterable[str]):
+        """Load uncached tokens in a background thread (call from the event loop)"""
+        missing = {str(token_id) for token_id in token_ids if token_id and self.get(token_id) is None}
+        if not missing:
+            return
+        task = asyncio.get_running_loop().create_task(asyncio.to_thread(self.load_many, missing))
+        self._prefetch_tasks.add(task)
+        task.add_done_callback(self._prefetch_tasks.discard)
+
+    def stats(self) -> dict:
+        return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
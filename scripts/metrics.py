@@ -0,0 +1,389 @@
+"""
+Metrics Module for Polymarket Copytrading Bot
+
+Traces every copied trade from the trader's fill to our post_order
+response. Each stage the event passes (poll detection, Supabase upsert,
+realtime callback, worker pickup, coalescing, signing, posting) is
+timestamped on the event's trace, and finished traces are recorded into
+latency histograms and outcome counters.
+
+Metrics are served in the Prometheus text format on a small local HTTP
+endpoint and summarized periodically, so it is visible which stage
+dominates the copy delay.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Seconds; fills are timestamped by the API with 1s resolution, so the
+# upper buckets matter as much as the lower ones
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# Stages of a copied trade, in the order they normally happen
+STAGES = ('fill', 'detected', 'stored', 'received', 'started', 'coalesced', 'signed', 'posted')
+
+
+def _label_key(labels: dict) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def sum_by(self, label: str) -> Dict[str, float]:
+        """Totals grouped by one label"""
+        totals = {}
+        with self._lock:
+            for key, value in self._values.items():
+                group = dict(key).get(label, "")
+                totals[group] = totals.get(group, 0) + value
+        return totals
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines += [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in items]
+        return lines
+
+
+class Histogram:
+    """Bucketed histogram with optional labels"""
+
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # labels -> [bucket counts..., sum, count]
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[idx] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(_label_key(labels))
+        return series[-1] if series else 0
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """Estimate a quantile by interpolating inside its bucket"""
+        with self._lock:
+            series = self._series.get(_label_key(labels))
+            series = list(series) if series else None
+        if not series or not series[-1]:
+            return None
+        rank = q * series[-1]
+        seen = 0
+        lower = 0.0
+        for idx, bound in enumerate(self.buckets):
+            in_bucket = series[idx]
+            if seen + in_bucket >= rank and in_bucket:
+                if bound == math.inf:
+                    return lower
+                return lower + (bound - lower) * (rank - seen) / in_bucket
+            seen += in_bucket
+            lower = bound
+        return lower
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            cumulative = 0
+            for idx, bound in enumerate(self.buckets):
+                cumulative += series[idx]
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named counters, histograms and gauge callbacks rendered together"""
+
+    def __init__(self):
+        self._metrics = OrderedDict()
+        self._gauges = OrderedDict()
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        if name not in self._metrics:
+            self._metrics[name] = Counter(name, help_text)
+        return self._metrics[name]
+
+    def histogram(self, name: str, help_text: str, buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(name, help_text, buckets)
+        return self._metrics[name]
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], float]):
+        """Register a gauge read from a callback at scrape time"""
+        self._gauges[name] = (help_text, read)
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        for name, (help_text, read) in self._gauges.items():
+            try:
+                value = read()
+            except Exception:
+                continue
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {_format_value(value)}"]
+        return "\n".join(lines) + "\n"
+
+
+class Trace:
+    """Wall-clock timestamps of the stages one copied trade went through"""
+
+    __slots__ = ('key', 'stages', 'finished')
+
+    def __init__(self, key: str, fill_timestamp: Optional[float] = None):
+        self.key = key
+        self.stages = {}
+        self.finished = False
+        if fill_timestamp:
+            self.stages['fill'] = float(fill_timestamp)
+
+    def mark(self, stage: str, at: Optional[float] = None):
+        """Timestamp a stage (the first mark of a stage wins)"""
+        self.stages.setdefault(stage, time.time() if at is None else at)
+
+    def durations(self) -> list:
+        """(stage, seconds since the previous stage) in time order"""
+        ordered = sorted(self.stages.items(), key=lambda item: item[1])
+        return [(stage, max(0.0, at - ordered[idx][1])) for idx, (stage, at) in enumerate(ordered[1:])]
+
+
+class LatencyTracer:
+    """
+    Open traces keyed by activity key, finished into the registry
+
+    Args:
+        registry: Where finished traces are recorded
+        max_traces: Open traces kept; the oldest are dropped first (e.g.
+            activities that never reach a handler)
+        recent_size: Exact end-to-end latencies kept for percentile reports
+    """
+
+    def __init__(self, registry: MetricsRegistry, max_traces: int = 10000, recent_size: int = 10000):
+        self.max_traces = max_traces
+        self.recent_latencies = deque(maxlen=recent_size)
+        self._traces = OrderedDict()
+        self._lock = threading.Lock()
+        self.stage_seconds = registry.histogram(
+            "copy_stage_seconds", "Time from the previous stage to this one, per copied trade"
+        )
+        self.latency_seconds = registry.histogram(
+            "copy_latency_seconds", "Time from the trader's fill to our post_order response"
+        )
+        self.events = registry.counter("copy_events_total", "Copied trades by outcome and reason")
+
+    def start(self, key: str, fill_timestamp: Optional[float] = None) -> Trace:
+        """Return the open trace of a key, creating it if needed"""
+        with self._lock:
+            trace = self._traces.get(key)
+            if trace is None:
+                trace = self._traces[key] = Trace(key, fill_timestamp)
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            elif fill_timestamp and 'fill' not in trace.stages:
+                trace.stages['fill'] = float(fill_timestamp)
+            return trace
+
+    def mark(self, key: str, stage: str, at: Optional[float] = None):
+        """Timestamp a stage of an open trace, ignoring unknown keys"""
+        trace = self._traces.get(key)
+        if trace is not None:
+            trace.mark(stage, at)
+
+    def finish(self, trace: Optional[Trace], outcome: str, reason: str = ""):
+        """
+        Close a trace; only placed orders are recorded into the latency histograms
+
+        Args:
+            outcome: placed, skipped or failed
+            reason: Short label for why it was skipped or failed
+        """
+        if trace is None or trace.finished:
+            return
+        trace.finished = True
+        with self._lock:
+            self._traces.pop(trace.key, None)
+        self.count(outcome, reason)
+        if outcome != "placed":
+            return
+        for stage, seconds in trace.durations():
+            self.stage_seconds.observe(seconds, stage=stage)
+        if 'fill' in trace.stages and 'posted' in trace.stages:
+            latency = trace.stages['posted'] - trace.stages['fill']
+            self.latency_seconds.observe(latency)
+            self.recent_latencies.append(latency)
+
+    def count(self, outcome: str, reason: str = ""):
+        """Count an event that never got (or must not close) a trace"""
+        self.events.inc(outcome=outcome, reason=reason)
+
+    @property
+    def open_traces(self) -> int:
+        return len(self._traces)
+
+    def log_summary(self):
+        """One line with the p50/p95 of each stage and the end-to-end latency"""
+        def fmt(histogram, **labels):
+            p50, p95 = histogram.quantile(0.5, **labels), histogram.quantile(0.95, **labels)
+            return f"{p50:.2f}/{p95:.2f}s" if p50 is not None else "-"
+
+        stages = {
+            stage: fmt(self.stage_seconds, stage=stage)
+            for stage in STAGES[1:] if self.stage_seconds.count(stage=stage)
+        }
+        counts = self.events.sum_by('outcome')
+        logger.info(
+            "⏱️  Copy latency p50/p95", total=fmt(self.latency_seconds), stages=stages,
+            placed=int(counts.get('placed', 0)), skipped=int(counts.get('skipped', 0)),
+            failed=int(counts.get('failed', 0)), open=self.open_traces,
+        )
+
+    async def report_loop(self, interval: float = 60):
+        """Log the latency summary periodically"""
+        while True:
+            await asyncio.sleep(interval)
+            self.log_summary()
+
+
+class StartupReport:
+    """
+    Wall time of each startup phase, from process start until the bot is ready
+
+    Phases may overlap (e.g. warm-up steps run concurrently), so they do
+    not add up to the total.
+    """
+
+    def __init__(self, started_at: Optional[float] = None):
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self.phases: Dict[str, float] = {}
+        self.ready_at: Optional[float] = None
+
+    def record(self, phase: str, seconds: float):
+        self.phases[phase] = seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the block as one phase"""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started_at)
+
+    @property
+    def total(self) -> float:
+        """Seconds from start until ready (or until now)"""
+        return (self.ready_at or time.perf_counter()) - self.started_at
+
+    def ready(self):
+        """Mark the bot ready to copy and log the report"""
+        self.ready_at = time.perf_counter()
+        self.log_report()
+
+    def log_report(self):
+        logger.info(
+            "🚀 Startup ready", seconds=round(self.total, 3),
+            phases={name: round(seconds, 3) for name, seconds in self.phases.items()},
+        )
+
+
+async def _handle_scrape(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+        # Drain the headers, the body is never needed
+        while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = request_line.decode("latin-1").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+            status, body = "200 OK", registry.render().encode()
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            status, body, content_type = "404 Not Found", b"not found\n", "text/plain"
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_metrics(host: str = "127.0.0.1", port: int = 9108) -> Optional[asyncio.AbstractServer]:
+    """
+    Serve GET /metrics on a local port (port 0 disables the endpoint)
+
+    Returns:
+        The running server, or None if disabled or the port is taken
+    """
+    if not port:
+        return None
+    try:
+        server = await asyncio.start_server(_handle_scrape, host, port)
+    except OSError as e:
+        logger.warning("⚠️  Could not start metrics endpoint", host=host, port=port, error=str(e))
+        return None
+    logger.info("📈 Metrics endpoint listening", url=f"http://{host}:{port}/metrics")
+    return server
+
+
+# Process-wide registry and tracer
+registry = MetricsRegistry()
+tracer = LatencyTracer(registry)
+orders_total = registry.counter("orders_total", "Orders handed to make_order by result")
+order_seconds = registry.histogram("order_seconds", "Time spent signing and posting orders, by step")
@@ -0,0 +1,224 @@
+"""
+Record Models Module for Polymarket Copytrading Bot
+
+Typed, slotted models of the data-api /activity and /positions rows,
+decoded straight from the response bytes. Attributes use the database
+column names, and get()/[] read them like the database-format dicts the
+realtime and storage paths pass around, so handlers take either.
+
+With msgspec installed the models are msgspec Structs and a schema-bound
+decoder builds them in one pass over the body, skipping every field not
+in the schema. Heavy fields we never read on the copy path (bio, profile
+images, icons) are kept as raw JSON slices and only decoded when the row
+is written (note a raw slice keeps the response body alive while the
+record is). Without msgspec the same models are plain __slots__ classes
+filled from json.loads.
+"""
+
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Union
+from logger import get_logger
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+logger = get_logger(__name__)
+
+Number = Optional[Union[int, float]]
+Text = Optional[str]
+Flag = Optional[bool]
+# Decoded lazily, see the module docstring
+HEAVY = "heavy"
+
+# (column, API field, type) of every stored field
+ACTIVITY_SCHEMA = (
+    ('proxy_wallet', 'proxyWallet', Text),
+    ('timestamp', 'timestamp', Number),
+    ('condition_id', 'conditionId', Text),
+    ('type', 'type', Text),
+    ('size', 'size', Number),
+    ('usdc_size', 'usdcSize', Number),
+    ('transaction_hash', 'transactionHash', Text),
+    ('price', 'price', Number),
+    ('asset', 'asset', Text),
+    ('side', 'side', Text),
+    ('outcome_index', 'outcomeIndex', Number),
+    ('title', 'title', Text),
+    ('slug', 'slug', Text),
+    ('icon', 'icon', HEAVY),
+    ('event_slug', 'eventSlug', Text),
+    ('outcome', 'outcome', Text),
+    ('trader_name', 'name', Text),
+    ('pseudonym', 'pseudonym', Text),
+    ('bio', 'bio', HEAVY),
+    ('profile_image', 'profileImage', HEAVY),
+    ('profile_image_optimized', 'profileImageOptimized', HEAVY),
+)
+
+POSITION_SCHEMA = (
+    ('proxy_wallet', 'proxyWallet', Text),
+    ('asset', 'asset', Text),
+    ('condition_id', 'conditionId', Text),
+    ('size', 'size', Number),
+    ('avg_price', 'avgPrice', Number),
+    ('initial_value', 'initialValue', Number),
+    ('current_value', 'currentValue', Number),
+    ('cash_pnl', 'cashPnl', Number),
+    ('percent_pnl', 'percentPnl', Number),
+    ('total_bought', 'totalBought', Number),
+    ('realized_pnl', 'realizedPnl', Number),
+    ('percent_realized_pnl', 'percentRealizedPnl', Number),
+    ('cur_price', 'curPrice', Number),
+    ('redeemable', 'redeemable', Flag),
+    ('mergeable', 'mergeable', Flag),
+    ('title', 'title', Text),
+    ('slug', 'slug', Text),
+    ('icon', 'icon', HEAVY),
+    ('event_id', 'eventId', Optional[Union[int, str]]),
+    ('event_slug', 'eventSlug', Text),
+    ('outcome', 'outcome', Text),
+    ('outcome_index', 'outcomeIndex', Number),
+    ('opposite_outcome', 'oppositeOutcome', Text),
+    ('opposite_asset', 'oppositeAsset', Text),
+    ('end_date', 'endDate', Text),
+    ('negative_risk', 'negativeRisk', Flag),
+)
+
+
+def _activity_datetime(record) -> Optional[str]:
+    return datetime.fromtimestamp(record.timestamp).isoformat() if record.timestamp is not None else None
+
+
+def _event_id(record) -> Optional[int]:
+    """eventId comes as a string; anything that is not an int is stored as NULL"""
+    try:
+        return int(record.event_id) if record.event_id else None
+    except (ValueError, TypeError):
+        return None
+
+
+def _end_date(record) -> Optional[str]:
+    return record.end_date or None
+
+
+# Columns whose stored value is derived from the decoded fields
+ACTIVITY_COMPUTED = {'activity_datetime': _activity_datetime}
+POSITION_COMPUTED = {'event_id': _event_id, 'end_date': _end_date}
+
+
+def _materialize(value):
+    if msgspec is not None and isinstance(value, msgspec.Raw):
+        return msgspec.json.decode(value) if len(value) else None
+    return value
+
+
+def _get(self, column: str, default=None):
+    """Database-format value of a column, like dict.get"""
+    computed = self._computed.get(column)
+    if computed is not None:
+        return computed(self)
+    if column not in self._columns:
+        return default
+    value = _materialize(getattr(self, column))
+    return default if value is None else value
+
+
+def _getitem(self, column: str):
+    if column not in self._columns and column not in self._computed:
+        raise KeyError(column)
+    return self.get(column)
+
+
+def _to_db(self) -> dict:
+    """The row in database format, ready to upsert"""
+    row = {column: _materialize(getattr(self, column)) for column, _, _ in self._schema}
+    for column, computed in self._computed.items():
+        row[column] = computed(self)
+    return row
+
+
+def _from_api(cls, item: dict):
+    """Build a record from an already decoded API object"""
+    return cls(**{column: item.get(field) for column, field, _ in cls._schema})
+
+
+def _model(name: str, schema: tuple, computed: Dict[str, Callable], doc: str):
+    """Record class of a schema: a msgspec Struct when available, else a slotted class"""
+    namespace = {
+        '__doc__': doc,
+        '_schema': schema,
+        '_columns': frozenset(column for column, _, _ in schema),
+        '_computed': computed,
+        'get': _get,
+        '__getitem__': _getitem,
+        'to_db': _to_db,
+        'from_api': classmethod(_from_api),
+    }
+    if msgspec is not None:
+        fields = [
+            (column, msgspec.Raw if kind is HEAVY else kind,
+             msgspec.field(name=field, default=msgspec.Raw() if kind is HEAVY else None))
+            for column, field, kind in schema
+        ]
+        # Records never form reference cycles, keep them out of the GC
+        return msgspec.defstruct(name, fields, namespace=namespace, gc=False)
+
+    columns = tuple(column for column, _, _ in schema)
+
+    def __init__(self, **values):
+        for column in columns:
+            setattr(self, column, values.get(column))
+
+    def __repr__(self):
+        return f"{name}({', '.join(f'{column}={getattr(self, column)!r}' for column in columns[:4])}, ...)"
+
+    namespace.update(__slots__=columns, __init__=__init__, __repr__=__repr__)
+    cls = type(name, (), namespace)
+    # Fill the slots through their descriptors, the hot loop of the json.loads path
+    setters = [(cls.__dict__[column].__set__, field) for column, field, _ in schema]
+
+    def from_api(cls, item: dict):
+        record = object.__new__(cls)
+        for set_slot, field in setters:
+            set_slot(record, item.get(field))
+        return record
+
+    from_api.__doc__ = _from_api.__doc__
+    cls.from_api = classmethod(from_api)
+    return cls
+
+
+Activity = _model("Activity", ACTIVITY_SCHEMA, ACTIVITY_COMPUTED, "One row of the data-api /activity feed")
+Position = _model("Position", POSITION_SCHEMA, POSITION_COMPUTED, "One row of the data-api /positions snapshot")
+
+if msgspec is not None:
+    _activity_decoder = msgspec.json.Decoder(List[Activity])
+    _position_decoder = msgspec.json.Decoder(List[Position])
+
+
+def to_db_row(record) -> dict:
+    """Database-format dict of a record, or the dict itself"""
+    return record.to_db() if hasattr(record, 'to_db') else record
+
+
+def _decode(content: bytes, model, decoder) -> list:
+    if msgspec is not None:
+        try:
+            return decoder.decode(content)
+        except msgspec.ValidationError as e:
+            # A field changed type upstream, keep polling on the slow path
+            logger.warning("⚠️  Unexpected record shape, decoding without the schema", model=model.__name__, error=str(e))
+    return [model.from_api(item) for item in json.loads(content)]
+
+
+def decode_activities(content: bytes) -> List[Any]:
+    """Decode an /activity response body into Activity records"""
+    return _decode(content, Activity, _activity_decoder if msgspec is not None else None)
+
+
+def decode_positions(content: bytes) -> List[Any]:
+    """Decode a /positions response body into Position records"""
+    return _decode(content, Position, _position_decoder if msgspec is not None else None)
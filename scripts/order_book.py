@@ -0,0 +1,378 @@
+"""
+Order Book Mirror Module for Polymarket Copytrading Bot
+
+Keeps a local L2 copy of the CLOB order book of every token we copy, so
+copy orders are priced against the book as it is now instead of the
+trader's historical fill price.
+
+Books are seeded from the REST snapshot the market metadata load already
+fetches and kept current by the CLOB market websocket ("book" snapshots
+and "price_change" level updates). The feed has no sequence numbers: a
+price_change carries the exchange's best bid/ask after the change, and a
+local book that disagrees with it has missed an update, so the token is
+resynced from a fresh REST snapshot. Every book is stale while the socket
+is down and until the snapshots sent on resubscribe have arrived.
+
+A book that is not in sync is never used: book() returns None and the
+caller falls back to the trader's price.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from logger import get_logger
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+logger = get_logger(__name__)
+
+# Order sides as used by the CLOB
+BUY = "BUY"
+SELL = "SELL"
+
+
+def _levels(levels) -> Iterable[Tuple[float, float]]:
+    """(price, size) of REST OrderSummary objects or websocket level dicts"""
+    for level in levels or ():
+        if isinstance(level, dict):
+            yield float(level['price']), float(level['size'])
+        else:
+            yield float(level.price), float(level.size)
+
+
+def _timestamp(value) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class OrderBook:
+    """
+    Price levels of one token
+
+    Updated from the event loop and read from the order worker threads,
+    so every access holds the book's lock.
+    """
+
+    __slots__ = ('token_id', 'bids', 'asks', 'timestamp', 'synced', 'updated_at', '_pending', '_lock')
+
+    def __init__(self, token_id: str):
+        self.token_id = token_id
+        self.bids: Dict[float, float] = {}
+        self.asks: Dict[float, float] = {}
+        self.timestamp = 0
+        self.synced = False
+        self.updated_at = 0.0
+        # Level updates received while waiting for a snapshot
+        self._pending: List[Tuple[str, float, float, int]] = []
+        self._lock = threading.Lock()
+
+    def load(self, bids, asks, timestamp: int):
+        """Replace the book with a snapshot, then replay the updates newer than it"""
+        with self._lock:
+            if self.synced and timestamp and timestamp < self.timestamp:
+                return
+            self.bids = {price: size for price, size in _levels(bids) if size > 0}
+            self.asks = {price: size for price, size in _levels(asks) if size > 0}
+            self.timestamp = timestamp
+            for side, price, size, at in self._pending:
+                if at > timestamp:
+                    self._set(side, price, size, at)
+            self._pending = []
+            self.synced = True
+            self.updated_at = time.monotonic()
+
+    def apply(self, side: str, price: float, size: float, timestamp: int):
+        """Set one level (size 0 removes it); side is the order side of the level"""
+        with self._lock:
+            if not self.synced:
+                self._pending.append((side, price, size, timestamp))
+                return
+            if timestamp and timestamp < self.timestamp:
+                # Already part of the snapshot
+                return
+            self._set(side, price, size, timestamp)
+            self.updated_at = time.monotonic()
+
+    def _set(self, side: str, price: float, size: float, timestamp: int):
+        levels = self.bids if side == BUY else self.asks
+        if size > 0:
+            levels[price] = size
+        else:
+            levels.pop(price, None)
+        self.timestamp = max(self.timestamp, timestamp)
+
+    def invalidate(self):
+        with self._lock:
+            self.synced = False
+            self._pending = []
+
+    def best_bid(self) -> Optional[float]:
+        with self._lock:
+            return max(self.bids) if self.bids else None
+
+    def best_ask(self) -> Optional[float]:
+        with self._lock:
+            return min(self.asks) if self.asks else None
+
+    def sweep(self, side: str, size: float) -> Optional[float]:
+        """
+        Worst price reached filling size against the book: asks for a BUY,
+        bids for a SELL. Deeper than the book, the last level is returned.
+        """
+        with self._lock:
+            levels = sorted(self.asks.items()) if side == BUY else sorted(self.bids.items(), reverse=True)
+        price = None
+        for price, available in levels:
+            size -= available
+            if size <= 0:
+                break
+        return price
+
+    def __repr__(self) -> str:
+        return f"OrderBook(token_id={self.token_id}, bid={self.best_bid()}, ask={self.best_ask()}, synced={self.synced})"
+
+
+class OrderBookMirror:
+    """
+    Local books of the tracked tokens, fed by the CLOB market websocket
+
+    track() and seed() may be called from any thread; run() owns the
+    socket on the event loop and reconnects with backoff until cancelled.
+    """
+
+    def __init__(
+        self,
+        ws_url: str,
+        snapshot: Callable[[str], object],
+        ping_interval: float = 10.0,
+        snapshot_timeout: float = 5.0,
+        on_tick_size: Optional[Callable[[str], None]] = None,
+    ):
+        self.ws_url = ws_url
+        self.snapshot = snapshot
+        self.ping_interval = ping_interval
+        self.snapshot_timeout = snapshot_timeout
+        self.on_tick_size = on_tick_size
+        self._books: Dict[str, OrderBook] = {}
+        self._subscribed = set()
+        self._resyncing = set()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ws = None
+        self._wanted: Optional[asyncio.Event] = None
+        self._tasks = set()
+        self.events = 0
+        self.gaps = 0
+        self.resyncs = 0
+        self.connects = 0
+
+    def track(self, token_ids: Iterable[str]):
+        """Follow tokens, subscribing them on the socket if it is up"""
+        added = []
+        with self._lock:
+            for token_id in token_ids:
+                token_id = str(token_id)
+                if token_id and token_id not in self._books:
+                    self._books[token_id] = OrderBook(token_id)
+                    added.append(token_id)
+        if added and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._on_tracked)
+        return added
+
+    def seed(self, token_id: str, summary):
+        """Track a token and load a REST order book snapshot of it"""
+        token_id = str(token_id)
+        self.track([token_id])
+        self._books[token_id].load(summary.bids, summary.asks, _timestamp(getattr(summary, 'timestamp', 0)))
+
+    def book(self, token_id: str) -> Optional[OrderBook]:
+        """The token's book if it is in sync, else None"""
+        book = self._books.get(str(token_id))
+        if book is None or not book.synced or self._ws is None:
+            return None
+        return book
+
+    @property
+    def synced(self) -> int:
+        return sum(1 for book in list(self._books.values()) if book.synced)
+
+    def _on_tracked(self):
+        if self._wanted is not None:
+            self._wanted.set()
+        if self._ws is not None:
+            self._spawn(self._subscribe(self._ws))
+
+    def _spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _subscribe(self, ws, initial: bool = False):
+        """Subscribe every tracked token not subscribed on this connection yet"""
+        with self._lock:
+            token_ids = [token_id for token_id in self._books if token_id not in self._subscribed]
+            self._subscribed.update(token_ids)
+        if not token_ids:
+            return
+        if initial:
+            message = {"assets_ids": token_ids, "type": "market"}
+        else:
+            message = {"assets_ids": token_ids, "operation": "subscribe"}
+        await ws.send(json.dumps(message))
+        # The exchange answers a subscription with a book snapshot per token
+        self._spawn(self._ensure_synced(token_ids))
+
+    async def _ensure_synced(self, token_ids: List[str]):
+        await asyncio.sleep(self.snapshot_timeout)
+        for token_id in token_ids:
+            book = self._books.get(token_id)
+            if book is not None and not book.synced:
+                self._resync(token_id, "no snapshot")
+
+    async def _ping(self, ws):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await ws.send("PING")
+
+    def _disconnected(self):
+        self._ws = None
+        with self._lock:
+            self._subscribed.clear()
+            books = list(self._books.values())
+        for book in books:
+            book.invalidate()
+
+    async def run(self):
+        """Mirror the tracked books until cancelled"""
+        if websockets is None:
+            logger.warning("⚠️  websockets is not installed, order book mirror disabled")
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wanted = asyncio.Event()
+        backoff = 1.0
+        try:
+            while True:
+                if not self._books:
+                    self._wanted.clear()
+                    await self._wanted.wait()
+                try:
+                    async with websockets.connect(self.ws_url, ping_interval=None, max_size=None) as ws:
+                        self._ws = ws
+                        await self._subscribe(ws, initial=True)
+                        self.connects += 1
+                        backoff = 1.0
+                        logger.info("✅ Order book mirror connected", tokens=len(self._books))
+                        pinger = asyncio.create_task(self._ping(ws))
+                        try:
+                            async for message in ws:
+                                self._on_message(message)
+                        finally:
+                            pinger.cancel()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error("❌ Order book socket failed", error=str(e) or type(e).__name__, retry_in=backoff)
+                finally:
+                    self._disconnected()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+        finally:
+            for task in list(self._tasks):
+                task.cancel()
+            self._loop = None
+
+    def _on_message(self, message):
+        if message in ("PONG", b"PONG"):
+            return
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            logger.debug("Ignoring order book message", message=str(message)[:200])
+            return
+        for event in payload if isinstance(payload, list) else [payload]:
+            self.events += 1
+            try:
+                self._on_event(event)
+            except Exception:
+                logger.exception("❌ Order book event failed", event_type=event.get('event_type'))
+
+    def _on_event(self, event: dict):
+        event_type = event.get('event_type')
+        if event_type == "book":
+            book = self._books.get(str(event.get('asset_id')))
+            if book is not None:
+                bids = event.get('bids') if 'bids' in event else event.get('buys')
+                asks = event.get('asks') if 'asks' in event else event.get('sells')
+                book.load(bids, asks, _timestamp(event.get('timestamp')))
+        elif event_type == "price_change":
+            self._on_price_change(event)
+        elif event_type == "tick_size_change":
+            if self.on_tick_size is not None:
+                self.on_tick_size(str(event.get('asset_id')))
+
+    def _on_price_change(self, event: dict):
+        timestamp = _timestamp(event.get('timestamp'))
+        if 'price_changes' in event:
+            changes = event['price_changes']
+        else:
+            # Older payload: one token per event, no best bid/ask
+            changes = [dict(change, asset_id=event.get('asset_id')) for change in event.get('changes') or ()]
+        reported = {}
+        for change in changes:
+            token_id = str(change.get('asset_id'))
+            book = self._books.get(token_id)
+            if book is None:
+                continue
+            book.apply(str(change.get('side')).upper(), float(change['price']), float(change['size']), timestamp)
+            reported[token_id] = (change.get('best_bid'), change.get('best_ask'))
+        for token_id, (best_bid, best_ask) in reported.items():
+            book = self._books[token_id]
+            if book.synced and (_differs(best_bid, book.best_bid(), 0.0) or _differs(best_ask, book.best_ask(), 1.0)):
+                self.gaps += 1
+                logger.warning(
+                    "⚠️  Order book out of sync, resyncing", token_id=token_id,
+                    best_bid=best_bid, local_bid=book.best_bid(), best_ask=best_ask, local_ask=book.best_ask(),
+                )
+                self._resync(token_id, "best price mismatch")
+
+    def _resync(self, token_id: str, reason: str):
+        """Reload a token from a REST snapshot (one reload in flight per token)"""
+        if token_id in self._resyncing:
+            return
+        self._resyncing.add(token_id)
+        self._books[token_id].invalidate()
+        self._spawn(self._load_snapshot(token_id, reason))
+
+    async def _load_snapshot(self, token_id: str, reason: str):
+        try:
+            summary = await asyncio.to_thread(self.snapshot, token_id)
+            self._books[token_id].load(summary.bids, summary.asks, _timestamp(getattr(summary, 'timestamp', 0)))
+            self.resyncs += 1
+            logger.debug("Order book resynced", token_id=token_id, reason=reason)
+        except Exception as e:
+            logger.error("❌ Order book snapshot failed", token_id=token_id, error=str(e))
+        finally:
+            self._resyncing.discard(token_id)
+
+    def stats(self) -> dict:
+        return {
+            'tokens': len(self._books), 'synced': self.synced, 'events': self.events,
+            'gaps': self.gaps, 'resyncs': self.resyncs, 'connects': self.connects,
+        }
+
+
+def _differs(reported, local: Optional[float], empty: float) -> bool:
+    """Whether the exchange's best price disagrees with the local one"""
+    if reported in (None, ""):
+        return False
+    reported = float(reported)
+    if local is None:
+        return reported != empty
+    return abs(reported - local) > 1e-9
@@ -0,0 +1,233 @@
+"""
+Order Coalescer Module for Polymarket Copytrading Bot
+
+Whales often split one decision into dozens of fills. Instead of firing
+one tiny copy order per fill (or dropping fills that size below the
+minimum), copy intents for the same token and side arriving within a short
+window are merged into one order, and sub-minimum residuals are carried
+forward until they add up to a valid order.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# (token_id, side, stake bounds)
+Key = Tuple[str, str, Optional[tuple]]
+
+
+class _Bucket:
+    """Pending copy intents of one (token_id, side)"""
+
+    __slots__ = ('size', 'notional', 'reserved', 'price', 'intents', 'opened_at', 'traces')
+
+    def __init__(self):
+        self.size = 0.0
+        self.notional = 0.0
+        # USDC the risk engine holds for these intents, released as is
+        self.reserved = 0.0
+        self.price = 0.0
+        self.intents = 0
+        self.opened_at = time.monotonic()
+        self.traces = []
+
+    def add(self, size: float, price: float, reserved: float = 0.0):
+        self.size += size
+        self.notional += size * price
+        self.reserved += reserved
+        self.price = price
+        self.intents += 1
+
+
+class OrderCoalescer:
+    """
+    Merges copy intents per (token_id, side) over a time window
+
+    Intents of wallets with their own stake bounds are merged apart from
+    the others, so each merged order is clamped to one set of bounds.
+
+    Args:
+        execute: Coroutine placing one order: execute(token_id, side, price, size, traces, reserved, bounds),
+            where traces are the latency traces of the merged intents, reserved the
+            sum of the USDC they reserved and bounds the stake bounds they were added with
+        window: Seconds to wait for more fills before placing the merged order (0 = no wait)
+        min_usdc: Smallest order notional worth placing
+        min_size: Optional callable returning the market's min order size (shares) for a token
+        residual_ttl: Seconds after which an unplaced residual is discarded
+        on_expire: Optional callable(token_id, side, reserved, traces) for discarded residuals
+    """
+
+    def __init__(
+        self,
+        execute: Callable[..., Awaitable],
+        window: float = 0.25,
+        min_usdc: float = 1.0,
+        min_size: Optional[Callable[[str], float]] = None,
+        residual_ttl: float = 3600,
+        on_expire: Optional[Callable[[str, str, float, list], None]] = None,
+    ):
+        self.execute = execute
+        self.window = window
+        self.min_usdc = min_usdc
+        self.min_size = min_size
+        self.residual_ttl = residual_ttl
+        self.on_expire = on_expire
+        self._buckets: Dict[Key, _Bucket] = {}
+        self._residuals: Dict[Key, _Bucket] = {}
+        self._timers: Dict[Key, asyncio.TimerHandle] = {}
+        self._flush_tasks = set()
+        self.intents = 0
+        self.orders = 0
+        self.residual_orders = 0
+        self.residuals_expired = 0
+        self.intents_expired = 0
+
+    @property
+    def orders_saved(self) -> int:
+        """Orders avoided by merging intents"""
+        return max(0, self.intents - self.orders - self.pending_intents - self.intents_expired)
+
+    @property
+    def pending_intents(self) -> int:
+        return sum(b.intents for b in self._buckets.values()) + sum(b.intents for b in self._residuals.values())
+
+    async def add(self, token_id: str, side: str, size: float, price: float, trace=None,
+                  reserved: float = 0.0, bounds: Optional[tuple] = None):
+        """
+        Queue a copy intent; the merged order is placed when its window closes
+
+        Args:
+            reserved: USDC already reserved for the intent, handed back with the merged order
+            bounds: Stake bounds of the intent's wallet (None = global); intents
+                are only merged with intents of the same bounds
+        """
+        if size <= 0:
+            return
+        self.intents += 1
+        key = (str(token_id), side, bounds)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket()
+            if self.window > 0:
+                self._timers[key] = asyncio.get_running_loop().call_later(
+                    self.window, self._spawn_flush, key
+                )
+        bucket.add(size, price, reserved)
+        if trace is not None:
+            bucket.traces.append(trace)
+        if self.window <= 0:
+            await self.flush(key)
+
+    def _spawn_flush(self, key: Key):
+        task = asyncio.get_running_loop().create_task(self.flush(key))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    def _discard(self, key: Key, residual: _Bucket):
+        self.residuals_expired += 1
+        self.intents_expired += residual.intents
+        if self.on_expire is not None:
+            self.on_expire(key[0], key[1], residual.reserved, residual.traces)
+
+    def _take_residual(self, key: Key) -> Optional[_Bucket]:
+        residual = self._residuals.pop(key, None)
+        if residual is not None and time.monotonic() - residual.opened_at > self.residual_ttl:
+            self._discard(key, residual)
+            return None
+        return residual
+
+    def expire_residuals(self, max_age: Optional[float] = None) -> int:
+        """
+        Discard the residuals older than max_age (default residual_ttl)
+
+        Returns:
+            int: Number of residuals discarded
+        """
+        max_age = self.residual_ttl if max_age is None else max_age
+        now = time.monotonic()
+        expired = [key for key, residual in self._residuals.items() if now - residual.opened_at > max_age]
+        for key in expired:
+            self._discard(key, self._residuals.pop(key))
+        if expired:
+            logger.info("🧺 Discarded expired residuals", residuals=len(expired))
+        return len(expired)
+
+    async def flush(self, key: Key):
+        """Place the merged order of one key, or carry it forward if too small"""
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            return
+        token_id, side, bounds = key
+        residual = self._take_residual(key)
+        if residual is not None:
+            bucket.size += residual.size
+            bucket.notional += residual.notional
+            bucket.reserved += residual.reserved
+            bucket.intents += residual.intents
+            bucket.opened_at = residual.opened_at
+            bucket.traces[:0] = residual.traces
+
+        min_size = self.min_size(token_id) if self.min_size else 0.0
+        if bucket.notional < self.min_usdc or bucket.size < min_size:
+            logger.info("🧺 Carrying residual", token_id=token_id, side=side, size=round(bucket.size, 4), usdc=round(bucket.notional, 4))
+            self._residuals[key] = bucket
+            return
+
+        if residual is not None:
+            self.residual_orders += 1
+        self.orders += 1
+        if bucket.intents > 1:
+            logger.info("🧺 Coalesced intents into one order", intents=bucket.intents, token_id=token_id, side=side, size=round(bucket.size, 4))
+        for trace in bucket.traces:
+            trace.mark('coalesced')
+        try:
+            await self.execute(token_id, side, bucket.price, bucket.size, bucket.traces, bucket.reserved, bounds)
+        except Exception:
+            logger.exception("❌ Coalesced order failed", token_id=token_id, side=side)
+
+    async def flush_all(self):
+        """
+        Place every pending merged order now and discard the residuals still
+        too small to place (on shutdown)
+        """
+        for key in list(self._buckets):
+            await self.flush(key)
+        await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+        self.expire_residuals(max_age=-1)
+
+    def stats(self) -> dict:
+        return {
+            'intents': self.intents,
+            'orders': self.orders,
+            'orders_saved': self.orders_saved,
+            'residual_orders': self.residual_orders,
+            'pending_residuals': len(self._residuals),
+            'residual_usdc': sum(b.notional for b in self._residuals.values()),
+            'residuals_expired': self.residuals_expired,
+        }
+
+    def log_stats(self):
+        s = self.stats()
+        logger.info(
+            "🧺 Order coalescer", intents=s['intents'], orders=s['orders'], saved=s['orders_saved'],
+            from_residuals=s['residual_orders'], pending_residuals=s['pending_residuals'],
+            residual_usdc=round(s['residual_usdc'], 2), expired=s['residuals_expired'],
+        )
+
+    async def expire_loop(self, interval: float = 60):
+        """Discard expired residuals periodically, even for keys with no new intents"""
+        while True:
+            await asyncio.sleep(interval)
+            self.expire_residuals()
+
+    async def report_loop(self, interval: float = 60):
+        """Log the coalescer stats periodically"""
+        while True:
+            await asyncio.sleep(interval)
+            self.log_stats()
@@ -0,0 +1,169 @@
+"""
+Order Pipeline Module for Polymarket Copytrading Bot
+
+Decouples the Supabase realtime callbacks from order execution. Callbacks
+only enqueue events into a bounded queue; a configurable pool of workers
+drains it and runs the handlers, so a slow CLOB post never stalls the
+other listeners on the event loop.
+"""
+
+import asyncio
+import time
+from typing import Callable, Optional
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PipelineMetrics:
+    """Counters and timings collected by the order pipeline"""
+
+    def __init__(self):
+        self.enqueued = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.max_depth = 0
+        self.total_wait = 0.0
+        self.total_run = 0.0
+        self.max_wait = 0.0
+        self.max_run = 0.0
+
+    def record(self, wait: float, run: float, ok: bool):
+        """Record the timings of one processed event"""
+        if ok:
+            self.processed += 1
+        else:
+            self.failed += 1
+        self.total_wait += wait
+        self.total_run += run
+        self.max_wait = max(self.max_wait, wait)
+        self.max_run = max(self.max_run, run)
+
+    def snapshot(self, depth: int = 0) -> dict:
+        """Get a copy of the current metrics"""
+        done = self.processed + self.failed
+        return {
+            'enqueued': self.enqueued,
+            'processed': self.processed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'depth': depth,
+            'max_depth': self.max_depth,
+            'avg_wait_ms': (self.total_wait / done * 1000) if done else 0.0,
+            'avg_run_ms': (self.total_run / done * 1000) if done else 0.0,
+            'max_wait_ms': self.max_wait * 1000,
+            'max_run_ms': self.max_run * 1000,
+        }
+
+
+class OrderPipeline:
+    """
+    Bounded async queue of realtime events drained by a pool of workers.
+
+    Synchronous handlers are run in a worker thread so blocking HTTP calls
+    do not block the event loop; coroutine handlers are awaited directly.
+    """
+
+    def __init__(self, workers: int = 4, maxsize: int = 1000):
+        self.workers = max(1, workers)
+        self.maxsize = maxsize
+        self.metrics = PipelineMetrics()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+
+    @property
+    def depth(self) -> int:
+        """Number of events waiting in the queue"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self):
+        """Create the queue and start the worker pool"""
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [
+            asyncio.create_task(self._worker(idx), name=f"order-worker-{idx}")
+            for idx in range(self.workers)
+        ]
+        logger.info("⚙️  Order pipeline started", workers=self.workers, queue_size=self.maxsize)
+
+    async def stop(self):
+        """Cancel the workers and log the final stats"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self.log_stats()
+
+    def submit(self, handler: Callable, payload) -> bool:
+        """
+        Enqueue an event without blocking
+
+        Returns:
+            bool: True if the event was queued, False if it was rejected
+        """
+        if self._queue is None:
+            self.metrics.rejected += 1
+            logger.warning("⚠️  Order pipeline not started, dropping event", handler=handler.__name__)
+            return False
+        try:
+            self._queue.put_nowait((handler, payload, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.metrics.rejected += 1
+            logger.warning("⚠️  Order queue full, dropping event", handler=handler.__name__, maxsize=self.maxsize)
+            return False
+        self.metrics.enqueued += 1
+        self.metrics.max_depth = max(self.metrics.max_depth, self._queue.qsize())
+        return True
+
+    def callback(self, handler: Callable) -> Callable:
+        """Wrap a handler into a realtime callback that only enqueues"""
+        def _enqueue(payload):
+            self.submit(handler, payload)
+        _enqueue.__name__ = f"enqueue_{handler.__name__}"
+        return _enqueue
+
+    async def _worker(self, idx: int):
+        """Drain the queue forever, running one handler at a time"""
+        while True:
+            handler, payload, enqueued_at = await self._queue.get()
+            started_at = time.perf_counter()
+            ok = True
+            try:
+                if asyncio.iscoroutinefunction(handler):
+                    await handler(payload)
+                else:
+                    await asyncio.to_thread(handler, payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                ok = False
+                logger.exception("❌ Handler failed", handler=handler.__name__)
+            finally:
+                finished_at = time.perf_counter()
+                wait = started_at - enqueued_at
+                run = finished_at - started_at
+                self.metrics.record(wait, run, ok)
+                self._queue.task_done()
+                logger.debug(
+                    "⏱️  Event processed", worker=idx, handler=handler.__name__,
+                    queued_ms=round(wait * 1000, 1), ran_ms=round(run * 1000, 1),
+                )
+
+    def log_stats(self):
+        """Log a one-line summary of the pipeline metrics"""
+        s = self.metrics.snapshot(self.depth)
+        logger.info(
+            "📊 Order pipeline", enqueued=s['enqueued'], processed=s['processed'], failed=s['failed'],
+            rejected=s['rejected'], depth=s['depth'], max_depth=s['max_depth'],
+            avg_wait_ms=round(s['avg_wait_ms'], 1), avg_run_ms=round(s['avg_run_ms'], 1),
+            max_run_ms=round(s['max_run_ms'], 1),
+        )
+
+    async def report_loop(self, interval: float = 60):
+        """Log the pipeline stats periodically"""
+        while True:
+            await asyncio.sleep(interval)
+            self.log_stats()
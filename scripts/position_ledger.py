@@ -0,0 +1,227 @@
+"""
+Position Ledger Module for Polymarket Copytrading Bot
+
+Keeps a local, incrementally updated copy of a wallet's positions so the
+SELL copy path can size orders with a dictionary lookup instead of two
+round trips to the positions API. Each ledger is seeded once from the API,
+updated from the activity feed and our own fills, and periodically
+reconciled against the API in the background.
+"""
+
+import asyncio
+from collections import OrderedDict, deque
+import threading
+import time
+from typing import Callable, Optional
+from py_clob_client.order_builder.constants import BUY
+from get_player_positions import fetch_all_positions
+from logger import get_logger
+from watermark import activity_key
+
+# How many applied activity keys each ledger remembers
+RECENT_KEYS_LIMIT = 1000
+
+logger = get_logger(__name__)
+
+
+class PositionLedger:
+    """In-memory share balances of one wallet, keyed by asset (token id)"""
+
+    def __init__(self, wallet: str, name: str = "", on_seed: Optional[Callable[[list], None]] = None):
+        self.wallet = wallet
+        # Called with every positions snapshot the ledger is seeded from
+        self.on_seed = on_seed
+        self.name = name or (wallet[:10] if wallet else "?")
+        self._sizes = {}
+        self._conditions = {}
+        self._lock = threading.Lock()
+        self._recent = OrderedDict()
+        # (timestamp, asset, delta, condition_id) of recent changes, replayed on top
+        # of a snapshot requested before them; asset is None for a redeem
+        self._journal = deque(maxlen=RECENT_KEYS_LIMIT)
+        self.seeded_at: Optional[float] = None
+        self.applied = 0
+
+    @property
+    def is_seeded(self) -> bool:
+        return self.seeded_at is not None
+
+    def seed(self, positions: list, fetched_at: Optional[float] = None):
+        """
+        Replace the ledger with a positions API snapshot
+
+        Changes applied since the snapshot was requested are replayed on top
+        of it, and activity after that time is not taken as part of it.
+
+        Args:
+            positions: Position records as returned by fetch_all_positions
+            fetched_at: When the snapshot was requested (default now)
+        """
+        if fetched_at is None:
+            fetched_at = time.time()
+        sizes = {}
+        conditions = {}
+        for position in positions:
+            asset = str(position.get('asset'))
+            sizes[asset] = float(position.get('size') or 0)
+            conditions[asset] = position.get('condition_id')
+        with self._lock:
+            self._sizes = sizes
+            self._conditions = conditions
+            self.seeded_at = fetched_at
+            newer = [change for change in self._journal if change[0] > fetched_at]
+            self._journal = deque(newer, maxlen=RECENT_KEYS_LIMIT)
+            for change in newer:
+                self._replay(*change)
+        if self.on_seed is not None:
+            self.on_seed(positions)
+
+    def _add(self, asset: str, delta: float, condition_id: str = None):
+        size = self._sizes.get(asset, 0.0) + delta
+        if size <= 1e-9:
+            self._sizes.pop(asset, None)
+        else:
+            self._sizes[asset] = size
+        if condition_id:
+            self._conditions[asset] = condition_id
+
+    def _redeem(self, condition_id: str):
+        for asset in [a for a, c in self._conditions.items() if c == condition_id]:
+            self._sizes.pop(asset, None)
+
+    def _replay(self, timestamp: float, asset: Optional[str], delta: float, condition_id: Optional[str]):
+        if asset is None:
+            self._redeem(condition_id)
+        else:
+            self._add(asset, delta, condition_id)
+
+    def apply_activity(self, activity: dict) -> bool:
+        """
+        Apply one database-format activity from the feed
+
+        Activities the ledger already reflects (see reflects) are ignored.
+        Only TRADE and REDEEM activities change the balance.
+
+        Returns:
+            bool: True if the ledger changed
+        """
+        if not self.is_seeded or self._in_snapshot(activity):
+            return False
+        kind = activity.get('type')
+        condition_id = activity.get('condition_id')
+        key = activity_key(activity)
+        with self._lock:
+            if key in self._recent:
+                return False
+            before = None
+            if kind == 'TRADE':
+                asset = str(activity.get('asset'))
+                before = self._sizes.get(asset, 0.0)
+                change = (activity.get('timestamp') or 0, asset, self._delta(activity), condition_id)
+            elif kind == 'REDEEM':
+                change = (activity.get('timestamp') or 0, None, 0.0, condition_id)
+            else:
+                return False
+            self._replay(*change)
+            self._journal.append(change)
+            # Remember the balance before the fill, for size_before
+            self._recent[key] = before
+            if len(self._recent) > RECENT_KEYS_LIMIT:
+                self._recent.popitem(last=False)
+            self.applied += 1
+        return True
+
+    @staticmethod
+    def _delta(activity: dict) -> float:
+        size = float(activity.get('size') or 0)
+        return size if activity.get('side') == BUY else -size
+
+    def _in_snapshot(self, activity: dict) -> bool:
+        return self.is_seeded and (activity.get('timestamp') or 0) <= self.seeded_at
+
+    def has_applied(self, activity: dict) -> bool:
+        """Check if a database-format activity was applied from the feed"""
+        return activity_key(activity) in self._recent
+
+    def reflects(self, activity: dict) -> bool:
+        """
+        Check if the balances already include a database-format activity:
+        applied from the feed, or older than the snapshot the ledger was
+        seeded from (and so part of it)
+        """
+        return self.has_applied(activity) or self._in_snapshot(activity)
+
+    def size_before(self, activity: dict) -> float:
+        """
+        Share balance of a trade's asset just before the trade
+
+        Uses the balance recorded when the trade was applied, so each fill of
+        a batch applied at once sees its own starting balance. A trade only
+        covered by the snapshot is undone from the current balance, and one
+        the ledger does not reflect yet is ahead of it.
+        """
+        asset = str(activity.get('asset'))
+        with self._lock:
+            before = self._recent.get(activity_key(activity))
+            size = self._sizes.get(asset, 0.0)
+        if before is not None:
+            return before
+        if self._in_snapshot(activity):
+            return max(size - self._delta(activity), 0.0)
+        return size
+
+    def apply_activities(self, activities: list) -> int:
+        """Apply a batch of activities, returning how many changed the ledger"""
+        return sum(1 for activity in activities if self.apply_activity(activity))
+
+    def apply_fill(self, token_id: str, side: str, size: float):
+        """Apply one of our own fills"""
+        change = (time.time(), str(token_id), size if side == BUY else -size, None)
+        with self._lock:
+            self._replay(*change)
+            self._journal.append(change)
+            self.applied += 1
+
+    def size(self, asset: str) -> float:
+        """Current share balance of an asset (0 if not held)"""
+        return self._sizes.get(str(asset), 0.0)
+
+    def assets(self) -> list:
+        """Assets currently held"""
+        with self._lock:
+            return list(self._sizes)
+
+    def size_by_condition(self, condition_id: str) -> float:
+        """Total share balance held across the outcomes of a market"""
+        with self._lock:
+            return sum(self._sizes.get(a, 0.0) for a, c in self._conditions.items() if c == condition_id)
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    async def refresh(self) -> bool:
+        """Re-seed the ledger from the positions API"""
+        fetched_at = time.time()
+        snapshot = await fetch_all_positions(self.wallet)
+        if snapshot is None:
+            logger.warning("⚠️  Positions fetch failed, keeping local ledger state", ledger=self.name)
+            return False
+        self.seed(snapshot[0], fetched_at)
+        logger.info("📒 Ledger reconciled", ledger=self.name, open_positions=len(self))
+        return True
+
+    async def reconcile_loop(self, interval: float):
+        """Re-seed the ledger from the API periodically"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("❌ Ledger reconcile failed", ledger=self.name)
+
+
+def is_filled(response) -> bool:
+    """Check if a post_order response reports an immediate match"""
+    return bool(response) and response.get('success', True) and response.get('status') == 'matched'
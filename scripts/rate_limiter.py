@@ -0,0 +1,64 @@
+"""
+Rate Limiter Module for Polymarket Copytrading Bot
+
+Token bucket shared by every data-api request, so polling many wallets
+concurrently stays inside one global requests-per-second budget.
+"""
+
+import asyncio
+import time
+
+
+class RateLimiter:
+    """
+    Async token bucket
+
+    Each acquire() reserves the next free slot synchronously and then sleeps
+    until it, so concurrent callers on one event loop are served in order
+    without a lock.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self.acquired = 0
+        self.total_wait = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def _reserve(self) -> float:
+        """Take one token, returning how long the caller must wait for it"""
+        self._refill()
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.rate
+
+    def pause(self, seconds: float):
+        """Hold every caller back for at least the given time (e.g. after a 429)"""
+        if self.rate <= 0:
+            return
+        self._refill()
+        self._tokens = min(self._tokens, -seconds * self.rate)
+
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        self.acquired += 1
+        if self.rate <= 0:
+            return
+        wait = self._reserve()
+        if wait > 0:
+            self.total_wait += wait
+            await asyncio.sleep(wait)
+
+    def stats(self) -> dict:
+        return {
+            'rate': self.rate,
+            'acquired': self.acquired,
+            'avg_wait_ms': (self.total_wait / self.acquired * 1000) if self.acquired else 0.0,
+        }
@@ -0,0 +1,515 @@
+"""
+Realtime Listener Module for Polymarket Copytrading Bot
+
+Wraps a Supabase realtime channel so a dropped or silently stale
+websocket does not lose rows. Every table feed remembers the cursor (id
+or timestamp) of the last row it delivered. A heartbeat is broadcast on
+the channel and must echo back; when the echo stops, the channel leaves
+the joined state or the socket rejoins after a drop, the channel is
+resubscribed and the rows missed in between are backfilled from the
+table with an ordered range query before live delivery resumes. Rows are
+deduplicated by (key, cursor), so overlapping live and backfilled rows
+are delivered once.
+
+Feeds can be filtered server-side to a set of values of one column (the
+tracked wallets) and narrowed to the columns their handlers read, both on
+the channel and in the backfill queries, so several tables share one
+channel that only carries rows the bot acts on.
+"""
+
+import asyncio
+import inspect
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import partial
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+from realtime import RealtimeSubscribeStates
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+HEARTBEAT_EVENT = "copybot-heartbeat"
+
+# Row versions remembered for deduplication / previous rows kept per feed
+RECENT_ROWS_LIMIT = 5000
+PREVIOUS_ROWS_LIMIT = 10000
+
+# Most values Supabase realtime accepts in one "in" filter
+FILTER_MAX_VALUES = 100
+
+_TIMESTAMP_FRACTION = re.compile(r"\.(\d+)")
+
+# Whether the installed realtime client can subscribe to a subset of columns
+_select_supported: Optional[bool] = None
+
+
+def _accepts_select(channel) -> bool:
+    """Older realtime releases have no select argument; their feeds receive full rows"""
+    global _select_supported
+    if _select_supported is None:
+        _select_supported = 'select' in inspect.signature(channel.on_postgres_changes).parameters
+        if not _select_supported:
+            logger.info("ℹ️  Realtime client cannot select columns, receiving full rows")
+    return _select_supported
+
+
+def cursor_order(value):
+    """
+    Sortable form of a cursor value
+
+    Numbers sort as numbers; Postgres timestamps sort by their instant
+    (fractions have a variable number of digits, so they are not compared
+    as strings).
+    """
+    if value is None or isinstance(value, (int, float)):
+        return value
+    text = str(value).replace(" ", "T").replace("Z", "+00:00")
+    text = _TIMESTAMP_FRACTION.sub(lambda m: "." + m.group(1)[:6].ljust(6, "0"), text, count=1)
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        return text
+
+
+class TableFeed:
+    """
+    Rows of one table delivered to per-event handlers
+
+    Args:
+        table: Table name
+        handlers: Event ("INSERT" / "UPDATE") -> callable receiving the realtime payload
+        cursor_column: Monotonic column rows are backfilled by ("id", "updated_at")
+        key_columns: Columns identifying a row
+        created_column: Creation timestamp; backfilled rows created after the
+            cursor are INSERTs, older ones UPDATEs (needed only with both events)
+        filter_column: Column the rows are filtered on server-side
+        filter_values: Accepted values of filter_column (None = every row)
+        columns: Columns to receive (None = the full row); the cursor, key,
+            created and filter columns are always included. Realtime clients
+            too old to select columns deliver full rows instead
+    """
+
+    def __init__(
+        self,
+        table: str,
+        handlers: Dict[str, Callable[[dict], None]],
+        cursor_column: str = "id",
+        key_columns: Sequence[str] = ("id",),
+        created_column: Optional[str] = None,
+        filter_column: Optional[str] = None,
+        filter_values: Optional[Sequence[str]] = None,
+        columns: Optional[Sequence[str]] = None,
+    ):
+        self.table = table
+        self.handlers = handlers
+        self.cursor_column = cursor_column
+        self.key_columns = tuple(key_columns)
+        self.created_column = created_column
+        self.filter_column = filter_column
+        self.filter_values = sorted(set(filter_values)) if filter_column and filter_values is not None else None
+        if self.filter_values is not None and len(self.filter_values) > FILTER_MAX_VALUES:
+            logger.warning(
+                "⚠️  Too many values for a realtime filter, receiving every row",
+                table=table, column=filter_column, values=len(self.filter_values), max=FILTER_MAX_VALUES,
+            )
+            self.filter_values = None
+        self.columns = None
+        if columns is not None:
+            required = (cursor_column,) + self.key_columns + tuple(c for c in (created_column, filter_column) if c)
+            self.columns = list(dict.fromkeys(tuple(columns) + required))
+        self.cursor = None
+        self._recent = OrderedDict()
+        self._previous = OrderedDict()
+        self.delivered = 0
+        self.backfilled = 0
+        self.duplicates = 0
+
+    @property
+    def realtime_filter(self) -> Optional[str]:
+        """Server-side filter of the channel subscription, e.g. proxy_wallet=in.(0x1,0x2)"""
+        if self.filter_values is None:
+            return None
+        return f"{self.filter_column}=in.({','.join(self.filter_values)})"
+
+    def accepts(self, record: dict) -> bool:
+        """Check a row against the feed's filter (applied server-side on realtime channels)"""
+        return self.filter_values is None or str(record.get(self.filter_column)) in self.filter_values
+
+    def query(self, client):
+        """Select on the feed's table with its columns and filter applied"""
+        query = client.table(self.table).select(",".join(self.columns) if self.columns else "*")
+        if self.filter_values is not None:
+            query = query.in_(self.filter_column, self.filter_values)
+        return query
+
+    def key(self, record: dict) -> tuple:
+        return tuple(str(record.get(column)) for column in self.key_columns)
+
+    def advance(self, record: dict):
+        value = record.get(self.cursor_column)
+        if value is not None and (self.cursor is None or cursor_order(value) > cursor_order(self.cursor)):
+            self.cursor = value
+
+    def seen_or_add(self, record: dict) -> bool:
+        """Check if this version of the row was already delivered, remembering it if not"""
+        identity = self.key(record) + (str(record.get(self.cursor_column)),)
+        if identity in self._recent:
+            return True
+        self._recent[identity] = True
+        if len(self._recent) > RECENT_ROWS_LIMIT:
+            self._recent.popitem(last=False)
+        return False
+
+    def remember(self, record: dict):
+        """Keep the latest version of a row, the old_record of its next backfilled UPDATE"""
+        if "UPDATE" not in self.handlers:
+            return
+        key = self.key(record)
+        self._previous[key] = record
+        self._previous.move_to_end(key)
+        if len(self._previous) > PREVIOUS_ROWS_LIMIT:
+            self._previous.popitem(last=False)
+
+    def previous(self, record: dict) -> Optional[dict]:
+        """Latest delivered version of a row, None if unknown"""
+        return self._previous.get(self.key(record))
+
+    def backfill_event(self, record: dict, since) -> Optional[str]:
+        """Event a backfilled row stands for, None if no handler wants it"""
+        event = "INSERT"
+        if self.created_column is not None:
+            created = record.get(self.created_column)
+            if created is not None and since is not None and cursor_order(created) <= cursor_order(since):
+                event = "UPDATE"
+        return event if event in self.handlers else None
+
+    def stats(self) -> dict:
+        return {
+            'delivered': self.delivered,
+            'backfilled': self.backfilled,
+            'duplicates': self.duplicates,
+            'cursor': self.cursor,
+        }
+
+
+class RealtimeListener:
+    """
+    One realtime channel for a set of table feeds, with heartbeat and gap-fill
+
+    Args:
+        name: Channel topic
+        feeds: Table feeds subscribed on the channel
+        get_client: Coroutine returning the shared async Supabase client
+        heartbeat_interval: Seconds between heartbeats
+        stale_after: Seconds without a heartbeat echo before the channel is resubscribed
+        backfill_limit: Rows fetched per backfill query
+        subscribe_timeout: Seconds to wait for the server to confirm a subscription
+    """
+
+    def __init__(
+        self,
+        name: str,
+        feeds: List[TableFeed],
+        get_client: Callable[[], Awaitable],
+        heartbeat_interval: float = 15,
+        stale_after: float = 45,
+        backfill_limit: int = 1000,
+        subscribe_timeout: float = 10,
+    ):
+        self.name = name
+        self.feeds = feeds
+        self.get_client = get_client
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.backfill_limit = backfill_limit
+        self.subscribe_timeout = subscribe_timeout
+        self._client = None
+        self._channel = None
+        self._joins = 0
+        self._last_echo = time.monotonic()
+        # Servers without broadcast never echo; only state checks apply then
+        self._echo_seen = False
+        self._buffer: Optional[list] = None
+        self._gap_fill_task: Optional[asyncio.Task] = None
+        self.resubscribes = 0
+
+    # Delivery
+
+    def _on_change(self, feed: TableFeed, payload: dict):
+        if self._buffer is not None:
+            # Backfill in progress, deliver after the older rows
+            self._buffer.append((feed, payload))
+            return
+        self._deliver(feed, payload)
+
+    def _deliver(self, feed: TableFeed, payload: dict, backfilled: bool = False) -> bool:
+        """Hand a row to its handler unless this version was already delivered"""
+        data = payload.get('data', {})
+        record = data.get('record') or {}
+        if feed.seen_or_add(record):
+            feed.duplicates += 1
+            return False
+        feed.advance(record)
+        feed.remember(record)
+        handler = feed.handlers.get(data.get('type'))
+        if handler is None:
+            return False
+        if backfilled:
+            feed.backfilled += 1
+        else:
+            feed.delivered += 1
+        try:
+            handler(payload)
+        except Exception:
+            logger.exception("❌ Realtime handler failed", channel=self.name, table=feed.table)
+        return True
+
+    # Cursor and backfill
+
+    async def _start_at_newest(self, feed: TableFeed):
+        """Point the feed's cursor at the newest stored row, marking that row as delivered"""
+        response = await (
+            feed.query(self._client)
+            .order(feed.cursor_column, desc=True)
+            .limit(1)
+            .execute()
+        )
+        for row in response.data or []:
+            feed.seen_or_add(row)
+            feed.advance(row)
+            feed.remember(row)
+
+    async def _backfill(self, feed: TableFeed) -> int:
+        """Deliver every row after the feed's cursor, in cursor order"""
+        since = feed.cursor
+        delivered = 0
+        while True:
+            # gte: rows sharing the cursor value may not all have been delivered;
+            # the ones that were are dropped as duplicates
+            before = feed.cursor
+            query = feed.query(self._client)
+            if feed.cursor is not None:
+                query = query.gte(feed.cursor_column, feed.cursor)
+            # An empty table at start: everything in it now is new
+            response = await query.order(feed.cursor_column).limit(self.backfill_limit).execute()
+            rows = response.data or []
+            for row in rows:
+                event = feed.backfill_event(row, since)
+                if event is None:
+                    feed.advance(row)
+                    feed.remember(row)
+                    continue
+                old_record = {}
+                if event == "UPDATE":
+                    old_record = feed.previous(row)
+                    if old_record is None:
+                        # Without the previous row the change cannot be sized
+                        logger.debug("Skipping backfilled update without a previous row", table=feed.table, key=feed.key(row))
+                        feed.advance(row)
+                        feed.remember(row)
+                        continue
+                if self._deliver(feed, {'data': {
+                    'type': event, 'table': feed.table, 'schema': 'public',
+                    'record': row, 'old_record': old_record, 'commit_timestamp': None,
+                }}, backfilled=True):
+                    delivered += 1
+            if len(rows) < self.backfill_limit or feed.cursor == before:
+                return delivered
+
+    async def _gap_fill(self, reason: str):
+        """Backfill every feed, holding live rows back until it is done"""
+        if self._buffer is None:
+            self._buffer = []
+        try:
+            for feed in self.feeds:
+                try:
+                    missed = await self._backfill(feed)
+                except Exception as e:
+                    logger.error("❌ Realtime backfill failed", channel=self.name, table=feed.table, error=str(e))
+                    continue
+                if missed:
+                    logger.warning("🩹 Backfilled rows missed by realtime", channel=self.name, table=feed.table, rows=missed, reason=reason)
+        finally:
+            buffered, self._buffer = self._buffer, None
+            for feed, payload in buffered:
+                self._deliver(feed, payload)
+
+    def _on_system(self, payload):
+        self._joins += 1
+        self._last_echo = time.monotonic()
+        if self._joins > 1:
+            # The socket reconnected and rejoined by itself, rows may be missing
+            self._schedule_gap_fill("rejoined")
+
+    def _schedule_gap_fill(self, reason: str):
+        if self._gap_fill_task is None or self._gap_fill_task.done():
+            self._gap_fill_task = asyncio.get_running_loop().create_task(self._gap_fill(reason))
+
+    def _on_heartbeat(self, payload):
+        self._last_echo = time.monotonic()
+        self._echo_seen = True
+
+    # Subscription
+
+    async def _subscribe(self):
+        self._client = await self.get_client()
+        if self._channel is not None:
+            try:
+                await self._client.remove_channel(self._channel)
+            except Exception as e:
+                logger.debug("Removing the old channel failed", channel=self.name, error=str(e))
+            self._channel = None
+
+        channel = self._client.channel(self.name, {"config": {
+            "broadcast": {"ack": False, "self": True},
+            "presence": {"key": "", "enabled": False},
+            "private": False,
+        }})
+        for feed in self.feeds:
+            options = {}
+            if feed.realtime_filter:
+                options["filter"] = feed.realtime_filter
+            if feed.columns and _accepts_select(channel):
+                options["select"] = feed.columns
+            for event in feed.handlers:
+                channel.on_postgres_changes(event, schema="public", table=feed.table, callback=partial(self._on_change, feed), **options)
+        channel.on_broadcast(HEARTBEAT_EVENT, self._on_heartbeat)
+        channel.on_system(self._on_system)
+
+        subscribed = asyncio.Event()
+
+        def on_status(status, error=None):
+            if status == RealtimeSubscribeStates.SUBSCRIBED:
+                subscribed.set()
+            else:
+                logger.warning("⚠️  Realtime subscription problem", channel=self.name, status=str(status), error=str(error) if error else None)
+
+        self._joins = 0
+        await channel.subscribe(on_status)
+        self._channel = channel
+        await asyncio.wait_for(subscribed.wait(), self.subscribe_timeout)
+        self._last_echo = time.monotonic()
+
+    async def _resubscribe(self, reason: str):
+        """Resubscribe (reconnecting the socket if needed) and backfill the gap"""
+        logger.warning("🔌 Realtime channel unhealthy, resubscribing", channel=self.name, reason=reason)
+        backoff = 1.0
+        while True:
+            # Hold live rows from the new subscription until the gap is filled
+            self._buffer = self._buffer if self._buffer is not None else []
+            try:
+                await self._subscribe()
+                break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("❌ Realtime resubscribe failed", channel=self.name, error=str(e) or type(e).__name__, retry_in=backoff)
+                try:
+                    # The socket itself may be dead, force a fresh connection
+                    await self._client.realtime.close()
+                except Exception:
+                    pass
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+        self.resubscribes += 1
+        await self._gap_fill(reason)
+
+    def _unhealthy_reason(self) -> Optional[str]:
+        if not self._client.realtime.is_connected:
+            return "socket closed"
+        if not self._channel.is_joined:
+            return "channel not joined"
+        if self._echo_seen and time.monotonic() - self._last_echo > self.stale_after:
+            return "heartbeat timeout"
+        return None
+
+    async def run(self):
+        """Subscribe, then watch the channel until cancelled"""
+        self._client = await self.get_client()
+        # Rows written while subscribing are backfilled from here
+        for feed in self.feeds:
+            await self._start_at_newest(feed)
+        self._buffer = []
+        await self._subscribe()
+        await self._gap_fill("subscribed")
+        logger.info("✅ Realtime channel connected", channel=self.name, tables=[feed.table for feed in self.feeds])
+        try:
+            while True:
+                await asyncio.sleep(self.heartbeat_interval)
+                reason = self._unhealthy_reason()
+                if reason is None:
+                    try:
+                        await self._channel.send_broadcast(HEARTBEAT_EVENT, {"sent_at": time.time()})
+                    except Exception as e:
+                        reason = f"heartbeat failed: {e}"
+                if reason is not None:
+                    await self._resubscribe(reason)
+        finally:
+            if self._gap_fill_task is not None:
+                self._gap_fill_task.cancel()
+            if self._channel is not None:
+                try:
+                    await self._channel.unsubscribe()
+                except Exception:
+                    pass
+
+    def stats(self) -> dict:
+        return {
+            'resubscribes': self.resubscribes,
+            'feeds': {feed.table: feed.stats() for feed in self.feeds},
+        }
+
+
+class LocalChangeListener:
+    """
+    Routes the local store's change feed to table feeds (STORAGE_BACKEND=sqlite)
+
+    Writes are published in-process right after they commit, so there is
+    no socket to watch and no gap to backfill. Same interface as
+    RealtimeListener.
+
+    Args:
+        name: Listener name, for logs
+        feeds: Table feeds to deliver to
+        store: The LocalStore
+    """
+
+    def __init__(self, name: str, feeds: List[TableFeed], store):
+        self.name = name
+        self.feeds = feeds
+        self.store = store
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _on_change(self, table: str, event: str, record: dict, old_record: dict):
+        # Runs on the writing thread
+        self._loop.call_soon_threadsafe(self._route, table, event, record, old_record)
+
+    def _route(self, table: str, event: str, record: dict, old_record: dict):
+        for feed in self.feeds:
+            handler = feed.handlers.get(event)
+            if feed.table != table or handler is None or not feed.accepts(record):
+                continue
+            feed.advance(record)
+            feed.delivered += 1
+            try:
+                handler({'data': {
+                    'type': event, 'table': table, 'schema': 'public',
+                    'record': record, 'old_record': old_record, 'commit_timestamp': record.get('updated_at'),
+                }})
+            except Exception:
+                logger.exception("❌ Change handler failed", channel=self.name, table=table)
+
+    async def run(self):
+        """Deliver changes until cancelled"""
+        self._loop = asyncio.get_running_loop()
+        unsubscribe = self.store.subscribe(self._on_change)
+        logger.info("✅ Local change feed connected", channel=self.name, tables=[feed.table for feed in self.feeds])
+        try:
+            await asyncio.Event().wait()
+        finally:
+            unsubscribe()
+
+    def stats(self) -> dict:
+        return {'feeds': {feed.table: feed.stats() for feed in self.feeds}}
@@ -0,0 +1,171 @@
+"""
+Polling Scheduler Module for Polymarket Copytrading Bot
+
+Runs one polling job per wallet as concurrent tasks on the event loop.
+Jobs do not pace each other: the data-api requests they make all go
+through the shared rate limiter in http_client, so adding wallets spreads
+one global requests-per-second budget instead of serializing the polls.
+
+Intervals are adaptive: a wallet that just produced new rows is polled at
+the minimum interval, an idle one drifts towards the maximum, and failures
+(429/5xx included) back off exponentially with jitter, honoring Retry-After.
+"""
+
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+from http_client import throttle_delay
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PollJob:
+    """A coroutine function polled at an adaptive interval"""
+
+    def __init__(
+        self,
+        key: str,
+        job: Callable[[], Awaitable],
+        interval: float,
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        idle_growth: float = 1.5,
+        max_backoff: float = 300,
+    ):
+        self.key = key
+        self.job = job
+        self.interval = interval
+        self.min_interval = min_interval if min_interval is not None else interval
+        self.max_interval = max_interval if max_interval is not None else interval
+        self.idle_growth = idle_growth
+        self.max_backoff = max_backoff
+        self.next_delay = interval
+        self.failures = 0
+        self.runs = 0
+        self.errors = 0
+        self.throttled = 0
+        self.last_run_at = 0.0
+        self.last_duration = 0.0
+        self.last_active_at = 0.0
+
+    def on_success(self, result):
+        """Shorten the interval after new rows, lengthen it while idle"""
+        self.failures = 0
+        if result:
+            self.interval = self.min_interval
+            self.last_active_at = time.time()
+        else:
+            self.interval = min(self.max_interval, self.interval * self.idle_growth)
+        self.next_delay = self.interval
+
+    def on_failure(self, retry_after: Optional[float] = None):
+        """Back off exponentially with jitter, never sooner than Retry-After"""
+        self.failures += 1
+        backoff = min(self.max_backoff, self.interval * 2 ** self.failures)
+        backoff = random.uniform(backoff / 2, backoff)
+        self.next_delay = max(backoff, retry_after or 0)
+
+
+class PollScheduler:
+    """Concurrent per-wallet polling jobs"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.jobs: Dict[str, PollJob] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def add(
+        self,
+        key: str,
+        job: Callable[[], Awaitable],
+        interval: float,
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        **kwargs,
+    ):
+        """
+        Register a job; call before start()
+
+        The job's return value drives the interval: truthy means the wallet
+        was active. Leave min/max_interval unset for a fixed interval.
+        """
+        self.jobs[key] = PollJob(key, job, interval, min_interval, max_interval, **kwargs)
+
+    def start(self, initial_delay: float = 0.0) -> List[asyncio.Task]:
+        """
+        Start one task per job on the running event loop
+
+        Args:
+            initial_delay: Seconds to wait before the first run of each job
+        """
+        self._tasks = [
+            asyncio.create_task(self._run(poll_job, initial_delay), name=f"{self.name}-{poll_job.key[:10]}")
+            for poll_job in self.jobs.values()
+        ]
+        logger.info("⏲️  Polling started", scheduler=self.name, wallets=len(self._tasks))
+        return self._tasks
+
+    async def _run(self, poll_job: PollJob, initial_delay: float = 0.0):
+        if initial_delay > 0:
+            await asyncio.sleep(initial_delay)
+        while True:
+            started_at = time.perf_counter()
+            try:
+                result = await poll_job.job()
+                poll_job.on_success(result)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                retry_after = throttle_delay(e)
+                if retry_after is not None:
+                    poll_job.throttled += 1
+                    poll_job.on_failure(retry_after)
+                    logger.warning(
+                        "🐢 Throttled", scheduler=self.name, wallet=poll_job.key,
+                        error=str(e), retry_in=round(poll_job.next_delay, 1),
+                    )
+                else:
+                    poll_job.errors += 1
+                    poll_job.on_failure()
+                    logger.exception("❌ Poll failed", scheduler=self.name, wallet=poll_job.key)
+            poll_job.runs += 1
+            poll_job.last_run_at = time.time()
+            poll_job.last_duration = time.perf_counter() - started_at
+            await asyncio.sleep(poll_job.next_delay)
+
+    def intervals(self) -> Dict[str, float]:
+        """Current delay until the next poll of every job, keyed by wallet"""
+        return {key: poll_job.next_delay for key, poll_job in self.jobs.items()}
+
+    def stats(self) -> dict:
+        """Per-wallet intervals and the request rate they add up to"""
+        jobs = {
+            key: {
+                'interval': poll_job.next_delay,
+                'runs': poll_job.runs,
+                'errors': poll_job.errors,
+                'throttled': poll_job.throttled,
+                'last_active_at': poll_job.last_active_at,
+            }
+            for key, poll_job in self.jobs.items()
+        }
+        polls_per_second = sum(1 / max(job['interval'], 1e-3) for job in jobs.values())
+        return {'jobs': jobs, 'polls_per_second': polls_per_second}
+
+    def log_stats(self, top: int = 5):
+        """Log the overall poll rate and the busiest wallets"""
+        stats = self.stats()
+        busiest = sorted(stats['jobs'].items(), key=lambda item: item[1]['interval'])[:top]
+        logger.info(
+            "⏲️  Poll scheduler", scheduler=self.name, wallets=len(stats['jobs']),
+            polls_per_second=round(stats['polls_per_second'], 2),
+            fastest={key: round(job['interval'], 1) for key, job in busiest},
+        )
+
+    async def report_loop(self, interval: float = 60):
+        """Log the scheduler stats periodically"""
+        while True:
+            await asyncio.sleep(interval)
+            self.log_stats()
@@ -0,0 +1,49 @@
+"""
+Storage Module for Polymarket Copytrading Bot
+
+Picks the storage backend set with STORAGE_BACKEND:
+  - supabase: the hosted Supabase project (default)
+  - sqlite: the embedded SQLite database of local_store.py, for single-node
+    deployments where storage latency matters more than a shared database
+
+Both answer the same table(...) query builder calls, so modules only ever
+ask for get_storage_client().
+"""
+
+import threading
+from config import get_config
+from supabase_client import get_supabase_client
+
+_local_store = None
+_local_store_lock = threading.Lock()
+
+
+def is_local() -> bool:
+    """Check if the embedded SQLite backend is configured"""
+    return get_config().STORAGE_BACKEND == "sqlite"
+
+
+def get_local_store():
+    """
+    Returns the singleton local store, opening the database on first use
+    """
+    global _local_store
+    with _local_store_lock:
+        if _local_store is None:
+            from local_store import LocalStore
+            config = get_config()
+            _local_store = LocalStore(config.SQLITE_PATH, {
+                config.TABLE_NAME_TRADES: 'historic_trades',
+                config.TABLE_NAME_POSITIONS: 'polymarket_positions',
+                config.TABLE_NAME_WALLETS or 'tracked_wallets': 'tracked_wallets',
+            })
+    return _local_store
+
+
+def get_storage_client():
+    """
+    Returns the client of the configured backend (Supabase client or local store)
+    """
+    if is_local():
+        return get_local_store()
+    return get_supabase_client()
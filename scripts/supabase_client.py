@@ -0,0 +1,27 @@
+"""
+Supabase Client Module for Polymarket Copytrading Bot
+
+Provides the synchronous Supabase client shared by the positions and
+history modules. The client is created on first use instead of at import,
+so CLI scripts and the bot only pay for it when they actually touch the
+database, and the bot can create it during its warm-up phase.
+"""
+
+import threading
+from config import get_config
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_supabase_client():
+    """
+    Returns a singleton synchronous Supabase client
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            from supabase import create_client
+            config = get_config()
+            _client = create_client(config.SUPABASE_URL, config.SUPABASE_KEY)
+    return _client
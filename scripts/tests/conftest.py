@@ -0,0 +1,22 @@
+"""
+Test setup: the modules under scripts/ import each other as top-level
+modules and load the config at import, so put scripts/ on the path and
+give the config a throwaway local environment before anything is imported.
+"""
+
+import os
+import sys
+import tempfile
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+os.environ.update({
+    'STORAGE_BACKEND': 'sqlite',
+    'STATE_DIR': tempfile.mkdtemp(prefix="copybot-tests-"),
+    'PK': '0x' + '11' * 32,
+    'POLY_FUNDER': '0x000000000000000000000000000000000000f00d',
+    'TRADER_WALLET': '0x000000000000000000000000000000000000beef',
+    'LOG_LEVEL': 'WARNING',
+})
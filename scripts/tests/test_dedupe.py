@@ -0,0 +1,53 @@
+import time
+
+from dedupe import DedupeIndex, position_epoch_keys, trade_key
+
+
+def test_seen_or_add_flags_duplicates():
+    index = DedupeIndex()
+    assert not index.seen_or_add(trade_key("0xa_0xc_0.5"))
+    assert index.seen_or_add(trade_key("0xa_0xc_0.5"))
+    assert index.duplicates == 1
+
+
+def test_keys_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    index = DedupeIndex(ttl=10)
+    index.add("a")
+    now[0] += 5
+    assert index.contains("a")
+    now[0] += 6
+    assert not index.contains("a")
+    assert len(index) == 0
+
+
+def test_oldest_keys_are_evicted_past_max_size():
+    index = DedupeIndex(max_size=3)
+    index.add("a", "b", "c", "d")
+    assert not index.contains("a")
+    assert index.contains("b", "nope")
+    assert len(index) == 3
+
+
+def test_position_delta_matches_trade_across_an_epoch_boundary():
+    index = DedupeIndex()
+    index.add(position_epoch_keys("1", "BUY", 119.0, 60)[0])
+    assert index.contains(*position_epoch_keys("1", "BUY", 121.0, 60))
+    assert not index.contains(*position_epoch_keys("1", "SELL", 121.0, 60))
+    assert not index.contains(*position_epoch_keys("1", "BUY", 181.0, 60))
+
+
+def test_snapshot_round_trip_drops_expired_keys(tmp_path):
+    path = str(tmp_path / "dedupe.json")
+    index = DedupeIndex(ttl=60, snapshot_path=path)
+    index.add("fresh")
+    index._keys["stale"] = time.time() - 120
+    index._keys.move_to_end("stale", last=False)
+    index._dirty = True
+    index.save()
+
+    restored = DedupeIndex(ttl=60, snapshot_path=path)
+    assert restored.load() == 1
+    assert restored.contains("fresh")
+    assert not restored.contains("stale")
@@ -0,0 +1,69 @@
+import pytest
+
+from local_store import LocalStore, LocalStoreError
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LocalStore(str(tmp_path / "bot.db"))
+    yield store
+    store.close()
+
+
+def trade(tx: str, timestamp: int, price: float = 0.5) -> dict:
+    return {
+        'proxy_wallet': "0xw", 'timestamp': timestamp, 'type': "TRADE", 'transaction_hash': tx,
+        'condition_id': "0xc", 'price': price, 'asset': "1", 'side': "BUY", 'size': 2.0,
+    }
+
+
+def wallets(store) -> list:
+    return [row['proxy_wallet'] for row in store.table("tracked_wallets").select("proxy_wallet").order("proxy_wallet").execute().data]
+
+
+def test_upsert_ignores_duplicates_on_the_generated_activity_key(store):
+    query = store.table("historic_trades")
+    written = query.upsert([trade("0xa", 1), trade("0xb", 2)], on_conflict="unique_activity_key", ignore_duplicates=True).execute().data
+    assert [row['unique_activity_key'] for row in written] == ["0xa_0xc_0.5", "0xb_0xc_0.5"]
+
+    again = store.table("historic_trades").upsert(
+        [trade("0xa", 1), trade("0xa", 1, price=0.6)], on_conflict="unique_activity_key", ignore_duplicates=True,
+    ).execute().data
+    assert [row['unique_activity_key'] for row in again] == ["0xa_0xc_0.6"]
+    assert len(store.table("historic_trades").select("*").execute().data) == 3
+
+
+def test_upsert_updates_and_publishes_changes(store):
+    changes = []
+    unsubscribe = store.subscribe(lambda table, event, record, old: changes.append((event, record['label'], old.get('label'))))
+    store.table("tracked_wallets").upsert({'proxy_wallet': "0xa", 'label': "first"}).execute()
+    store.table("tracked_wallets").upsert({'proxy_wallet': "0xa", 'label': "second"}, on_conflict="proxy_wallet").execute()
+    unsubscribe()
+    store.table("tracked_wallets").upsert({'proxy_wallet': "0xb", 'label': "unseen"}).execute()
+    assert changes == [("INSERT", "first", None), ("UPDATE", "second", "first")]
+    row, = store.table("tracked_wallets").select("*").eq("proxy_wallet", "0xa").execute().data
+    assert row['label'] == "second"
+    assert row['enabled'] is True
+
+
+def test_filters_order_and_range(store):
+    store.table("tracked_wallets").upsert([
+        {'proxy_wallet': f"0x{n}", 'label': f"w{n}", 'stake_whale_pct': n / 100} for n in range(6)
+    ]).execute()
+    query = store.table("tracked_wallets").select("proxy_wallet").gte("stake_whale_pct", 0.02).neq("label", "w4")
+    assert [row['proxy_wallet'] for row in query.order("proxy_wallet", desc=True).range(0, 1).execute().data] == ["0x5", "0x3"]
+    assert len(store.table("tracked_wallets").select("*").in_("label", ["w1", "w2", "w9"]).execute().data) == 2
+    assert store.table("tracked_wallets").select("*").in_("label", []).execute().data == []
+
+
+def test_delete_needs_a_filter_and_unknown_columns_are_rejected(store):
+    store.table("tracked_wallets").upsert([{'proxy_wallet': "0xa"}, {'proxy_wallet': "0xb"}]).execute()
+    with pytest.raises(LocalStoreError):
+        store.table("tracked_wallets").delete().execute()
+    with pytest.raises(LocalStoreError):
+        store.table("tracked_wallets").select("nope").execute()
+    with pytest.raises(LocalStoreError):
+        store.table("tracked_wallets").upsert({'proxy_wallet': "0xc", 'nope': 1}).execute()
+    response = store.table("tracked_wallets").delete(count="exact").eq("proxy_wallet", "0xa").execute()
+    assert response.count == 1
+    assert wallets(store) == ["0xb"]
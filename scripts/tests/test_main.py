@@ -0,0 +1,275 @@
+import asyncio
+import time
+
+import pytest
+
+import main
+from models import Position
+from position_ledger import PositionLedger
+
+WALLET = "0x000000000000000000000000000000000000beef"
+
+
+class FakeCoalescer:
+    def __init__(self):
+        self.intents = []
+
+    async def add(self, token_id, side, size, price, trace=None, **kwargs):
+        self.intents.append((token_id, side, round(size, 6), price))
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    """main with fresh ledgers and a coalescer that only records intents"""
+    monkeypatch.setattr(main, "coalescer", FakeCoalescer())
+    monkeypatch.setattr(main, "trader_ledgers", {WALLET: PositionLedger(WALLET)})
+    monkeypatch.setattr(main, "my_ledger", PositionLedger(main.config.POLY_FUNDER))
+    return main
+
+
+def trade(tx: str, side: str, size: float, timestamp: float) -> dict:
+    return {
+        'transaction_hash': tx, 'type': 'TRADE', 'side': side, 'size': size, 'usdc_size': size / 2,
+        'asset': "1", 'condition_id': "0xc", 'price': 0.5, 'timestamp': timestamp, 'proxy_wallet': WALLET,
+    }
+
+
+def position_row(asset: str, size: float, avg_price: float, initial_value: float) -> dict:
+    """A stored position row in database format"""
+    return Position.from_api({
+        'proxyWallet': WALLET, 'asset': asset, 'conditionId': "0xc", 'size': size, 'avgPrice': avg_price,
+        'initialValue': initial_value, 'currentValue': initial_value, 'curPrice': avg_price,
+        'title': "Market", 'outcome': "Yes", 'eventSlug': "event",
+    }).to_db()
+
+
+def handle(bot, record: dict):
+    return asyncio.run(bot.handle_new_trade({'data': {'record': record}}))
+
+
+def test_multi_fill_exit_sells_in_proportion_to_each_fill(bot):
+    bot.trader_ledgers[WALLET].seed([{'asset': "1", 'size': 20, 'condition_id': "0xc"}])
+    bot.my_ledger.seed([{'asset': "1", 'size': 10, 'condition_id': "0xc"}])
+    now = time.time()
+    fills = [trade(f"exit-{now}-1", "SELL", 10, now + 5), trade(f"exit-{now}-2", "SELL", 10, now + 6)]
+    # The poller applies the whole batch before the fills are handled
+    bot.trader_ledgers[WALLET].apply_activities(fills)
+    for fill in fills:
+        handle(bot, fill)
+    # Half of the position, then all of it: the first SELL has not filled yet
+    assert [intent[2] for intent in bot.coalescer.intents] == [5.0, 10.0]
+
+
+@pytest.fixture
+def orders(bot, monkeypatch):
+    """Orders reaching make_order, priced at the intent's price"""
+    placed = []
+
+    def make_order(price, size, side, token_id, traces=()):
+        placed.append((side, round(size, 6)))
+        return {'success': True, 'status': 'live'}
+
+    monkeypatch.setattr(bot, "price_order", lambda price, size, side, token_id, traces=(): (price, size))
+    monkeypatch.setattr(bot, "make_order", make_order)
+    return placed
+
+
+def merged_sell(size: float, *intents: float):
+    async def run():
+        coalescer = main.OrderCoalescer(main._execute_coalesced, window=0.05, min_usdc=1.0)
+        for intent in intents:
+            await coalescer.add("1", main.SELL, intent, 0.5)
+        await asyncio.sleep(0.2)
+
+    main.my_ledger.seed([{'asset': "1", 'size': size, 'condition_id': "0xc"}] if size else [])
+    asyncio.run(run())
+
+
+def test_merged_sell_is_capped_at_the_holding(orders):
+    merged_sell(10, 5.0, 10.0)
+    assert orders == [(main.SELL, 10.0)]
+
+
+def test_merged_sell_is_dropped_when_nothing_is_held(orders):
+    merged_sell(0, 5.0, 10.0)
+    assert orders == []
+
+
+@pytest.fixture
+def direct(bot, monkeypatch, tmp_path):
+    """Direct mode poller whose dispatched trades and buffered rows are recorded"""
+    dispatched, written = [], []
+
+    class Writer:
+        def add(self, rows):
+            written.extend(rows)
+
+    monkeypatch.setattr(bot.config, "COPY_MODE", "direct")
+    monkeypatch.setattr(bot, "history_writer", Writer())
+    monkeypatch.setattr(bot.pipeline, "submit", lambda handler, payload: dispatched.append(payload) or True)
+
+    def poll(watermark, activities):
+        async def fetch(address, watermark, max_pages=None):
+            return [activity for activity in activities if watermark.is_new(activity)]
+
+        monkeypatch.setattr(bot, "fetch_new_history_activities", fetch)
+        store = bot.WatermarkStore(str(tmp_path))
+        return asyncio.run(bot.poll_history_once(bot.registry.get(WALLET), watermark, store))
+
+    return poll, dispatched, written
+
+
+def test_seeding_the_watermark_stores_history_without_copying_it(direct):
+    poll, dispatched, written = direct
+    now = time.time()
+    history = [trade(f"seed-{now}-{i}", "BUY", 10, main._started_at_ts - 3600 + i) for i in range(30)]
+    live = trade(f"seed-{now}-live", "BUY", 10, now + 1)
+    watermark = main.Watermark()
+    assert poll(watermark, history + [live]) == 31
+    assert len(written) == 31
+    assert [payload['data']['record']['transaction_hash'] for payload in dispatched] == [live['transaction_hash']]
+    assert watermark.timestamp == live['timestamp']
+    # Once stored, the realtime handler skips them as already handled
+    assert main.dedupe.contains(main.trade_key(main.activity_key(history[0])))
+
+
+def test_activity_after_the_watermark_is_copied(direct):
+    poll, dispatched, written = direct
+    now = time.time()
+    old = trade(f"next-{now}-0", "BUY", 10, main._started_at_ts - 60)
+    new = trade(f"next-{now}-1", "BUY", 10, main._started_at_ts - 30)
+    watermark = main.Watermark(timestamp=old['timestamp'], seen=[main.activity_key(old)])
+    # Trades missed while the bot was down are still copied
+    assert poll(watermark, [old, new]) == 1
+    assert [payload['data']['record']['transaction_hash'] for payload in dispatched] == [new['transaction_hash']]
+
+
+def closed_position(asset: str, old_size: float = 10) -> dict:
+    """Position UPDATE of a position that left the trader's snapshot (see diff_positions)"""
+    old = {
+        'proxy_wallet': WALLET, 'asset': asset, 'condition_id': "0xc", 'size': old_size,
+        'avg_price': 0.5, 'current_value': old_size * 0.5, 'cur_price': 0.5,
+    }
+    new = dict(old, size=0, current_value=0)
+    return {'data': {'type': 'UPDATE', 'old_record': old, 'record': new}}
+
+
+def test_closed_position_sells_what_we_hold(orders, monkeypatch):
+    monkeypatch.setattr(main, "_whale_pct", lambda wallet: 1.0)
+    asset = f"closed-{time.time()}"
+    main.my_ledger.seed([{'asset': asset, 'size': 4, 'condition_id': "0xc"}])
+    main.handle_update_position(closed_position(asset))
+    assert orders == [(main.SELL, 4.0)]
+
+
+def test_closed_position_already_sold_by_the_trade_path_is_skipped(orders, monkeypatch):
+    monkeypatch.setattr(main, "_whale_pct", lambda wallet: 1.0)
+    asset = f"closed-{time.time()}"
+    main.my_ledger.seed([])
+    assert main.handle_update_position(closed_position(asset)) is None
+    assert orders == []
+
+
+def test_projected_new_position_is_sized_and_bought(orders, monkeypatch):
+    monkeypatch.setattr(main, "_whale_pct", lambda wallet: 0.1)
+    asset = f"new-{time.time()}"
+    row = position_row(asset, size=100, avg_price=0.5, initial_value=50)
+    feed = next(feed for feed in main._copy_feeds() if feed.table == main.TABLE_NAME_POSITIONS)
+    projected = {column: row.get(column) for column in feed.columns}
+    main.handle_new_position({'data': {'type': 'INSERT', 'record': projected}})
+    # 10% of the trader's 50 USDC, at the trader's average price
+    assert orders == [(main.BUY, 10.0)]
+
+
+def test_wallet_table_is_loaded_during_warm_up(bot, monkeypatch):
+    class Table:
+        """Sync Supabase query builder returning one enabled wallet"""
+
+        def __init__(self, name):
+            self.name = name
+
+        def select(self, columns):
+            return self
+
+        def eq(self, column, value):
+            return self
+
+        def execute(self):
+            return type("Response", (), {'data': [{'proxy_wallet': "0xAbC", 'label': "table", 'stake_max': "5"}]})
+
+    monkeypatch.setattr(bot, "registry", bot.registry)
+    monkeypatch.setattr(bot.config, "TABLE_NAME_WALLETS", "wallets")
+    monkeypatch.setattr(bot, "get_storage_client", lambda: type("Client", (), {'table': staticmethod(Table)}))
+    asyncio.run(bot.load_wallet_table())
+    assert bot.registry.get("0xabc").stake_max == 5.0
+    assert bot.registry.get(WALLET) is not None
+    assert bot.trader_ledgers["0xabc"].name == "table"
+
+
+@pytest.fixture
+def positions_poll(bot, monkeypatch):
+    """poll_positions_once over a fake snapshot, recording fetches and table writes"""
+    fetches, writes = [], []
+    rows = [position_row("big", size=100, avg_price=0.5, initial_value=50), position_row("small", 2, 0.5, 1)]
+
+    async def fetch_all_positions(address, **kwargs):
+        fetches.append(address)
+        return rows, True
+
+    monkeypatch.setattr(bot, "fetch_all_positions", fetch_all_positions)
+    monkeypatch.setattr(bot, "insert_player_positions_batch", lambda *args: writes.append(args))
+    return fetches, writes
+
+
+def test_one_positions_snapshot_feeds_the_ledger_and_the_table(positions_poll, monkeypatch):
+    fetches, writes = positions_poll
+    monkeypatch.setattr(main.config, "POSITIONS_MIN_VALUE", 0)
+    assert asyncio.run(main.poll_positions_once(main.registry.get(WALLET))) == 2
+    assert fetches == [WALLET]
+    ledger = main.trader_ledgers[WALLET]
+    assert (ledger.size("big"), ledger.size("small")) == (100, 2)
+    assert [([row['asset'] for row in positions], complete) for positions, complete, _ in writes] == [(["big", "small"], True)]
+
+
+def test_positions_below_the_min_value_reach_the_ledger_only(positions_poll, monkeypatch):
+    fetches, writes = positions_poll
+    monkeypatch.setattr(main.config, "POSITIONS_MIN_VALUE", 10)
+    asyncio.run(main.poll_positions_once(main.registry.get(WALLET)))
+    assert main.trader_ledgers[WALLET].size("small") == 2
+    # The table snapshot is partial, so its missing rows are not closed
+    assert [([row['asset'] for row in positions], complete) for positions, complete, _ in writes] == [(["big"], False)]
+
+
+def test_skipped_trades_do_not_leave_open_traces(bot):
+    bot.trader_ledgers[WALLET].seed([{'asset': "1", 'size': 20, 'condition_id': "0xc"}])
+    bot.my_ledger.seed([])
+    now = time.time()
+    opened = main.tracer.open_traces
+    skipped = [
+        # Nothing held to sell
+        trade(f"skip-{now}-1", "SELL", 5, now + 5),
+        # Not a tracked wallet
+        dict(trade(f"skip-{now}-2", "BUY", 5, now + 5), proxy_wallet="0x0"),
+        # A redelivery of a trade already handled
+        trade(f"skip-{now}-1", "SELL", 5, now + 5),
+    ]
+    for record in skipped:
+        # Opened on receipt, as on_trade_insert does
+        main.tracer.start(main.activity_key(record), record['timestamp']).mark('received')
+        handle(bot, record)
+    assert main.tracer.open_traces == opened
+    assert bot.coalescer.intents == []
+
+
+def test_expired_residuals_finish_their_traces(orders):
+    async def run():
+        coalescer = main.OrderCoalescer(
+            main._execute_coalesced, window=0, min_usdc=100.0, on_expire=main._release_residual,
+        )
+        await coalescer.add("1", main.SELL, 2.0, 0.5, trace=main.tracer.start(f"residual-{time.time()}"))
+        coalescer.expire_residuals(max_age=-1)
+
+    opened = main.tracer.open_traces
+    asyncio.run(run())
+    assert main.tracer.open_traces == opened
+    assert orders == []
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from order_coalescer import OrderCoalescer
+
+
+class Orders:
+    """Records the merged orders the coalescer places"""
+
+    def __init__(self):
+        self.placed = []
+
+    async def __call__(self, token_id, side, price, size, traces, reserved, bounds=None):
+        self.placed.append((token_id, side, price, size, reserved))
+
+
+def test_intents_in_one_window_become_one_order():
+    orders = Orders()
+
+    async def run():
+        coalescer = OrderCoalescer(orders, window=0.05, min_usdc=1.0)
+        for _ in range(5):
+            await coalescer.add("t1", "BUY", 2.0, 0.5, reserved=1.0)
+        await coalescer.add("t2", "BUY", 4.0, 0.5, reserved=2.0)
+        await asyncio.sleep(0.1)
+        return coalescer
+
+    coalescer = asyncio.run(run())
+    assert sorted(orders.placed) == [("t1", "BUY", 0.5, 10.0, 5.0), ("t2", "BUY", 0.5, 4.0, 2.0)]
+    assert coalescer.orders_saved == 4
+
+
+def test_reserved_is_carried_as_is_across_prices():
+    orders = Orders()
+
+    async def run():
+        coalescer = OrderCoalescer(orders, window=0.05, min_usdc=1.0)
+        await coalescer.add("t1", "BUY", 10.0, 0.40, reserved=4.0)
+        await coalescer.add("t1", "BUY", 10.0, 0.60, reserved=6.0)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+    (_, _, price, size, reserved), = orders.placed
+    # Placed at the last price, but the reservation is what the intents reserved
+    assert price * size == pytest.approx(12.0)
+    assert reserved == pytest.approx(10.0)
+
+
+def test_residual_is_carried_until_it_adds_up():
+    orders = Orders()
+
+    async def run():
+        coalescer = OrderCoalescer(orders, window=0, min_usdc=1.0)
+        await coalescer.add("t1", "BUY", 1.0, 0.5, reserved=0.5)
+        assert orders.placed == []
+        assert coalescer.stats()['pending_residuals'] == 1
+        await coalescer.add("t1", "BUY", 1.0, 0.5, reserved=0.5)
+        return coalescer
+
+    coalescer = asyncio.run(run())
+    assert orders.placed == [("t1", "BUY", 0.5, 2.0, 1.0)]
+    assert coalescer.residual_orders == 1
+    assert coalescer.pending_intents == 0
+
+
+def test_min_order_size_holds_back_small_orders():
+    orders = Orders()
+
+    async def run():
+        coalescer = OrderCoalescer(orders, window=0, min_usdc=0.0, min_size=lambda token_id: 5.0)
+        await coalescer.add("t1", "SELL", 3.0, 0.5)
+        await coalescer.add("t1", "SELL", 3.0, 0.5)
+
+    asyncio.run(run())
+    assert orders.placed == [("t1", "SELL", 0.5, 6.0, 0.0)]
+
+
+def test_sweep_expires_residuals_without_new_intents():
+    orders, released = Orders(), []
+
+    async def run():
+        coalescer = OrderCoalescer(
+            orders, window=0, min_usdc=1.0, residual_ttl=0.05,
+            on_expire=lambda token_id, side, reserved, traces: released.append((token_id, side, reserved)),
+        )
+        await coalescer.add("t1", "BUY", 1.0, 0.5, reserved=0.5)
+        assert coalescer.expire_residuals() == 0
+        await asyncio.sleep(0.1)
+        assert coalescer.expire_residuals() == 1
+        return coalescer
+
+    coalescer = asyncio.run(run())
+    assert released == [("t1", "BUY", 0.5)]
+    assert orders.placed == []
+    assert coalescer.stats()['pending_residuals'] == 0
+    assert coalescer.orders_saved == 0
+
+
+def test_flush_all_places_orders_and_releases_residuals():
+    orders, released = Orders(), []
+
+    async def run():
+        coalescer = OrderCoalescer(
+            orders, window=10, min_usdc=1.0,
+            on_expire=lambda token_id, side, reserved, traces: released.append((token_id, reserved)),
+        )
+        await coalescer.add("t1", "BUY", 4.0, 0.5, reserved=2.0)
+        await coalescer.add("t2", "BUY", 1.0, 0.5, reserved=0.5)
+        await coalescer.flush_all()
+        return coalescer
+
+    coalescer = asyncio.run(run())
+    assert orders.placed == [("t1", "BUY", 0.5, 4.0, 2.0)]
+    assert released == [("t2", 0.5)]
+    assert coalescer.pending_intents == 0
+    assert coalescer.residuals_expired == 1
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+import get_player_history_new as history
+from get_player_history_new import ActivityWriteError, insert_activities_batch
+from watermark import Watermark
+
+
+class FakeTable:
+    """Upserts rows like PostgREST, failing every statement that holds a bad row"""
+
+    def __init__(self, rows: dict, bad: set):
+        self.rows = rows
+        self.bad = bad
+        self.statements = 0
+        self._chunk = None
+
+    def upsert(self, chunk, on_conflict=None, ignore_duplicates=False):
+        self._chunk = chunk
+        return self
+
+    def execute(self):
+        self.statements += 1
+        if any(row['transaction_hash'] in self.bad for row in self._chunk):
+            raise RuntimeError("value too long for type character varying")
+        inserted = [row for row in self._chunk if row['transaction_hash'] not in self.rows]
+        for row in inserted:
+            self.rows[row['transaction_hash']] = row
+        return type("Response", (), {'data': inserted})()
+
+
+class FakeClient:
+    def __init__(self, table: FakeTable):
+        self._table = table
+
+    def table(self, name):
+        return self._table
+
+
+def activity(n: int) -> dict:
+    return {
+        'transaction_hash': f"0x{n:04x}", 'asset': "1", 'side': "BUY", 'type': "TRADE",
+        'timestamp': 1_700_000_000 + n, 'size': 1.0, 'price': 0.5,
+    }
+
+
+@pytest.fixture
+def table(monkeypatch):
+    table = FakeTable({}, set())
+    monkeypatch.setattr(history, "get_storage_client", lambda: FakeClient(table))
+    return table
+
+
+def test_inserts_in_chunks(table):
+    assert insert_activities_batch([activity(n) for n in range(10)], chunk_size=4) == 10
+    assert table.statements == 3
+    assert insert_activities_batch([activity(n) for n in range(12)], chunk_size=4) == 2
+
+
+def test_failed_rows_are_raised_after_the_others_are_written(table):
+    table.bad = {"0x0003", "0x0006"}
+    with pytest.raises(ActivityWriteError) as error:
+        insert_activities_batch([activity(n) for n in range(8)], chunk_size=8)
+    assert [row['transaction_hash'] for row in error.value.rows] == ["0x0003", "0x0006"]
+    assert error.value.inserted == 6
+    assert len(table.rows) == 6
+
+
+def test_duplicate_error_on_a_single_row_is_a_skip(table, monkeypatch):
+    class DuplicateTable(FakeTable):
+        def execute(self):
+            raise RuntimeError('duplicate key value violates unique constraint "unique_activity_key"')
+
+    monkeypatch.setattr(history, "get_storage_client", lambda: FakeClient(DuplicateTable({}, set())))
+    assert insert_activities_batch([activity(1)]) == 0
+
+
+class FakeActivityApi:
+    """Serves /activity pages like the data-api: start filter, sort direction, offset/limit"""
+
+    def __init__(self, rows: list):
+        self.rows = rows
+        self.requests = 0
+
+    async def __call__(self, path, params=None, timeout=None, decoder=None):
+        self.requests += 1
+        start = int(params.get('start') or 0)
+        rows = sorted(
+            (row for row in self.rows if row['timestamp'] >= start),
+            key=lambda row: row['timestamp'], reverse=params['sortDirection'] == "DESC",
+        )
+        offset, limit = int(params['offset']), int(params['limit'])
+        return rows[offset:offset + limit]
+
+
+def poll(watermark, max_pages=2):
+    rows = asyncio.run(history.fetch_new_activities("0xw", watermark, page_size=5, max_pages=max_pages))
+    watermark.advance(rows)
+    return [row['transaction_hash'] for row in rows]
+
+
+def test_empty_watermark_is_seeded_from_the_newest_page(monkeypatch):
+    monkeypatch.setattr(history, "get_json", FakeActivityApi([activity(n) for n in range(12)]))
+    watermark = Watermark()
+    assert poll(watermark) == [f"0x{n:04x}" for n in range(7, 12)]
+    assert poll(watermark) == []
+
+
+def test_backlog_past_max_pages_is_read_without_gaps(monkeypatch):
+    api = FakeActivityApi([activity(0)])
+    monkeypatch.setattr(history, "get_json", api)
+    watermark = Watermark()
+    poll(watermark)
+    api.rows += [activity(n) for n in range(1, 26)]
+
+    polled = []
+    for _ in range(4):
+        polled += poll(watermark)
+    assert polled == [f"0x{n:04x}" for n in range(1, 26)]
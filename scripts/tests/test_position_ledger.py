@@ -0,0 +1,112 @@
+import asyncio
+import time
+
+from position_ledger import PositionLedger
+
+
+def trade(tx: str, side: str, size: float, timestamp: float, asset: str = "1") -> dict:
+    return {
+        'transaction_hash': tx, 'type': 'TRADE', 'side': side, 'size': size,
+        'asset': asset, 'condition_id': "0xc", 'price': 0.5, 'timestamp': timestamp,
+    }
+
+
+def seeded(size: float) -> PositionLedger:
+    ledger = PositionLedger("0xw")
+    ledger.seed([{'asset': "1", 'size': size, 'condition_id': "0xc"}])
+    return ledger
+
+
+def test_unseeded_ledger_ignores_activity():
+    ledger = PositionLedger("0xw")
+    assert not ledger.apply_activity(trade("a", "BUY", 5, time.time()))
+    assert not ledger.reflects(trade("a", "BUY", 5, time.time()))
+
+
+def test_activity_after_the_snapshot_is_applied_once():
+    ledger = seeded(10)
+    fill = trade("a", "SELL", 4, time.time() + 5)
+    assert not ledger.reflects(fill)
+    assert ledger.apply_activity(fill)
+    assert not ledger.apply_activity(fill)
+    assert ledger.size("1") == 6
+    assert ledger.reflects(fill)
+
+
+def test_activity_before_the_snapshot_is_part_of_it():
+    ledger = seeded(6)
+    catch_up = trade("old", "SELL", 4, ledger.seeded_at - 30)
+    assert not ledger.apply_activity(catch_up)
+    assert ledger.size("1") == 6
+    # Both the ledger update and the SELL ratio treat it as already included
+    assert ledger.reflects(catch_up)
+    assert not ledger.has_applied(catch_up)
+
+
+def test_selling_everything_drops_the_asset():
+    ledger = seeded(3)
+    ledger.apply_activity(trade("a", "SELL", 3, time.time() + 5))
+    assert ledger.size("1") == 0
+    assert len(ledger) == 0
+
+
+def test_redeem_clears_every_outcome_of_the_market():
+    ledger = PositionLedger("0xw")
+    ledger.seed([
+        {'asset': "1", 'size': 3, 'condition_id': "0xc"},
+        {'asset': "2", 'size': 2, 'condition_id': "0xc"},
+        {'asset': "3", 'size': 1, 'condition_id': "0xd"},
+    ])
+    ledger.apply_activity({'transaction_hash': "r", 'type': 'REDEEM', 'condition_id': "0xc", 'timestamp': time.time() + 5})
+    assert ledger.assets() == ["3"]
+
+
+def test_each_fill_of_a_batch_keeps_its_own_starting_balance():
+    ledger = seeded(20)
+    now = time.time()
+    fills = [trade("a", "SELL", 10, now + 5), trade("b", "SELL", 10, now + 6)]
+    assert ledger.apply_activities(fills) == 2
+    assert ledger.size("1") == 0
+    assert [ledger.size_before(fill) for fill in fills] == [20, 10]
+
+
+def test_size_before_a_trade_only_in_the_snapshot_undoes_it():
+    ledger = seeded(6)
+    assert ledger.size_before(trade("old", "SELL", 4, ledger.seeded_at - 30)) == 10
+    # Not applied yet: the balance is still the one before it
+    assert ledger.size_before(trade("new", "SELL", 4, time.time() + 5)) == 6
+
+
+def test_seeding_keeps_activity_applied_while_the_snapshot_was_fetched():
+    ledger = seeded(10)
+    fetched_at = time.time()
+    ledger.apply_activity(trade("during", "SELL", 4, fetched_at + 1))
+    ledger.apply_fill("1", "BUY", 2)
+    # The snapshot was requested before both and does not include them
+    ledger.seed([{'asset': "1", 'size': 10, 'condition_id': "0xc"}], fetched_at)
+    assert ledger.size("1") == 8
+    assert ledger.seeded_at == fetched_at
+
+
+def test_activity_after_the_snapshot_request_is_not_part_of_it():
+    ledger = PositionLedger("0xw")
+    fetched_at = time.time() - 10
+    ledger.seed([{'asset': "1", 'size': 10, 'condition_id': "0xc"}], fetched_at)
+    late = trade("late", "SELL", 4, fetched_at + 5)
+    assert not ledger.reflects(late)
+    assert ledger.apply_activity(late)
+    assert ledger.size("1") == 6
+
+
+def test_refresh_timestamps_the_snapshot_before_fetching(monkeypatch):
+    import position_ledger
+
+    ledger = seeded(10)
+
+    async def fetch_all_positions(wallet):
+        ledger.apply_fill("1", "SELL", 3)
+        return [{'asset': "1", 'size': 10, 'condition_id': "0xc"}], True
+
+    monkeypatch.setattr(position_ledger, "fetch_all_positions", fetch_all_positions)
+    asyncio.run(ledger.refresh())
+    assert ledger.size("1") == 7
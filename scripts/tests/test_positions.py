@@ -0,0 +1,198 @@
+import asyncio
+
+import httpx
+import pytest
+
+import get_player_positions as positions_module
+from get_player_positions import diff_positions, insert_player_positions_batch, position_key
+from http_client import throttle_delay
+from local_store import LocalStore
+from models import Position
+
+WALLET = "0x000000000000000000000000000000000000beef"
+
+
+def position(asset: str, size: float, wallet: str = WALLET) -> dict:
+    """A position in database format, every NOT NULL column filled"""
+    return Position.from_api({
+        'proxyWallet': wallet, 'asset': asset, 'conditionId': f"0xc{asset}", 'size': size,
+        'avgPrice': 0.5, 'initialValue': size / 2, 'currentValue': size / 2, 'cashPnl': 0.0,
+        'percentPnl': 0.0, 'totalBought': size, 'realizedPnl': 0.0, 'percentRealizedPnl': 0.0,
+        'curPrice': 0.5, 'redeemable': False, 'mergeable': False, 'title': f"Market {asset}",
+        'slug': f"market-{asset}", 'icon': "", 'eventSlug': "event", 'outcome': "Yes",
+        'outcomeIndex': 0, 'oppositeOutcome': "No", 'oppositeAsset': f"{asset}0", 'negativeRisk': False,
+    }).to_db()
+
+
+def keyed(*rows) -> dict:
+    return {position_key(row): row for row in rows}
+
+
+def test_diff_detects_inserted_updated_unchanged():
+    existing = keyed(position("1", 10), position("2", 10))
+    diff = diff_positions(existing, [position("1", 10.05), position("2", 12), position("3", 1)])
+    assert [row['asset'] for row in diff['inserted']] == ["3"]
+    assert [row['asset'] for row in diff['updated']] == ["2"]
+    assert diff['unchanged'] == 1
+    assert diff['closed'] == []
+
+
+def test_diff_closes_missing_positions_only_on_complete_snapshots():
+    existing = keyed(position("1", 10), position("2", 10), position("3", 0))
+    assert diff_positions(existing, [position("1", 10)], complete=False)['closed'] == []
+    closed = diff_positions(existing, [position("1", 10)], complete=True)['closed']
+    assert [(row['asset'], row['size'], row['current_value']) for row in closed] == [("2", 0, 0)]
+
+
+def test_empty_complete_snapshot_closes_everything():
+    existing = keyed(position("1", 10), position("2", 5))
+    diff = diff_positions(existing, [], complete=True)
+    assert sorted(row['asset'] for row in diff['closed']) == ["1", "2"]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = LocalStore(str(tmp_path / "positions.db"))
+    monkeypatch.setattr(positions_module, "get_storage_client", lambda: store)
+    yield store
+    store.close()
+
+
+def stored_sizes(store) -> dict:
+    rows = store.table(positions_module.TABLE_NAME).select("*").execute().data
+    return {row['asset']: row['size'] for row in rows}
+
+
+def test_batch_writes_only_changes(store):
+    assert insert_player_positions_batch([position("1", 10), position("2", 5)], complete=True) == 2
+    assert insert_player_positions_batch([position("1", 10), position("2", 8)], complete=True) == 1
+    assert stored_sizes(store) == {"1": 10, "2": 8}
+
+
+def test_batch_with_empty_complete_snapshot_closes_the_wallet(store):
+    insert_player_positions_batch([position("1", 10), position("2", 5)], complete=True)
+    assert insert_player_positions_batch([], complete=True) == 0
+    assert insert_player_positions_batch([], complete=False, wallet=WALLET) == 0
+    assert stored_sizes(store) == {"1": 10, "2": 5}
+    assert insert_player_positions_batch([], complete=True, wallet=WALLET.upper().replace("0X", "0x")) == 2
+    assert stored_sizes(store) == {"1": 0, "2": 0}
+
+
+class FakePositionsApi:
+    """Serves `total` positions sorted by initial value, like /positions"""
+
+    def __init__(self, total: int, failing_offset: int = None):
+        self.rows = [position(str(i), 2 * (total - i)) for i in range(total)]
+        self.failing_offset = failing_offset
+        self.offsets = []
+
+    async def __call__(self, user_address, limit=500, offset=0, condition_id=None):
+        self.offsets.append(offset)
+        if offset == self.failing_offset:
+            return None
+        return self.rows[offset:offset + limit]
+
+
+@pytest.fixture
+def api(monkeypatch):
+    def install(total: int, **kwargs) -> FakePositionsApi:
+        fake = FakePositionsApi(total, **kwargs)
+        monkeypatch.setattr(positions_module, "fetch_player_positions", fake)
+        monkeypatch.setattr(positions_module, "_page_hints", {})
+        return fake
+    return install
+
+
+def fetch_all(**kwargs):
+    return asyncio.run(positions_module.fetch_all_positions(WALLET, page_size=10, concurrency=4, **kwargs))
+
+
+def test_fetch_all_stops_at_the_first_short_page(api):
+    fake = api(25)
+    positions, complete = fetch_all(max_pages=10)
+    assert complete
+    assert [row['asset'] for row in positions] == [str(i) for i in range(25)]
+    # Waves of 1 then 2 pages reach the short third page
+    assert sorted(fake.offsets) == [0, 10, 20]
+    assert positions_module._page_hints[WALLET] == 3
+
+
+def test_fetch_all_reuses_the_page_hint_as_the_first_wave(api):
+    fake = api(25)
+    fetch_all(max_pages=10)
+    fake.offsets.clear()
+    fetch_all(max_pages=10)
+    assert sorted(fake.offsets) == [0, 10, 20]
+
+
+def test_fetch_all_is_incomplete_at_the_page_cap(api):
+    fake = api(50)
+    positions, complete = fetch_all(max_pages=3)
+    assert not complete
+    assert len(positions) == 30
+    assert max(fake.offsets) == 20
+    assert WALLET not in positions_module._page_hints
+
+
+def test_fetch_all_stops_below_min_value(api):
+    api(50)
+    # initial_value is size / 2 = total - i, so rows 0..34 are worth at least 16
+    positions, complete = fetch_all(max_pages=10, min_value=16)
+    assert not complete
+    assert [row['asset'] for row in positions] == [str(i) for i in range(35)]
+
+
+def test_fetch_all_returns_none_when_a_page_fails(api):
+    api(50, failing_offset=10)
+    assert fetch_all(max_pages=10) is None
+
+
+def test_fetch_all_deduplicates_rows_shifting_between_pages(api):
+    fake = api(15)
+    # A row moved down while paging shows up on both pages
+    fake.rows.insert(10, fake.rows[9])
+    positions, complete = fetch_all(max_pages=10)
+    assert complete
+    assert len(positions) == 15
+
+
+def throttled(retry_after: str = "0.01") -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "https://data-api.invalid/positions")
+    response = httpx.Response(429, headers={"Retry-After": retry_after}, request=request)
+    return httpx.HTTPStatusError("429 Too Many Requests", request=request, response=response)
+
+
+@pytest.fixture
+def data_api(monkeypatch):
+    """get_json serving 25 positions, throttling each page the given number of times first"""
+    def install(throttles: int) -> dict:
+        rows = [position(str(i), 2 * (25 - i)) for i in range(25)]
+        calls = {}
+
+        async def get_json(path, params=None, decoder=None):
+            offset, limit = int(params['offset']), int(params['limit'])
+            calls[offset] = calls.get(offset, 0) + 1
+            if calls[offset] <= throttles:
+                raise throttled()
+            return rows[offset:offset + limit]
+
+        monkeypatch.setattr(positions_module, "get_json", get_json)
+        monkeypatch.setattr(positions_module, "_page_hints", {})
+        return calls
+    return install
+
+
+def test_throttled_pages_are_retried(data_api):
+    calls = data_api(throttles=1)
+    positions, complete = fetch_all(max_pages=10)
+    assert complete
+    assert len(positions) == 25
+    assert calls == {0: 2, 10: 2, 20: 2}
+
+
+def test_pages_still_throttled_raise_the_throttle_error(data_api):
+    data_api(throttles=positions_module.PAGE_RETRIES + 1)
+    with pytest.raises(httpx.HTTPStatusError) as error:
+        fetch_all(max_pages=10)
+    # The scheduler backs off on it instead of counting a failed poll
+    assert throttle_delay(error.value) == 0.01
@@ -0,0 +1,55 @@
+import pytest
+
+import make_orders
+from make_orders import BUY, SELL, price_order
+from market_cache import MarketMetadata
+from order_book import OrderBookMirror
+
+TOKEN = "123"
+
+
+class Summary:
+    """REST order book snapshot"""
+    bids = [{'price': "0.48", 'size': "100"}, {'price': "0.47", 'size': "500"}]
+    asks = [{'price': "0.50", 'size': "10"}, {'price': "0.51", 'size': "20"}, {'price': "0.56", 'size': "1000"}]
+    timestamp = "1"
+
+
+@pytest.fixture
+def book(monkeypatch):
+    mirror = OrderBookMirror("ws://unused", snapshot=lambda token_id: Summary())
+    mirror.seed(TOKEN, Summary())
+    # Books are only used while the market socket is up
+    mirror._ws = object()
+    monkeypatch.setattr(make_orders.config, "ORDER_BOOK_MIRROR", True)
+    monkeypatch.setattr(make_orders.config, "MAX_SLIPPAGE", 0.05)
+    monkeypatch.setattr(make_orders, "order_books", mirror)
+    make_orders.market_cache.put(MarketMetadata(TOKEN, "0.01", False))
+    return mirror.book(TOKEN)
+
+
+def test_buy_takes_the_sweep_price_and_keeps_its_stake(book):
+    price, size = price_order(0.50, 20.0, BUY, TOKEN)
+    assert price == 0.51
+    assert price * size == pytest.approx(10.0)
+
+
+def test_buy_is_capped_at_max_slippage_and_rounded_down(book):
+    price, size = price_order(0.50, 100.0, BUY, TOKEN)
+    # The sweep reaches 0.56, the cap is 0.525 rounded down to the tick
+    assert price == 0.52
+    assert price * size == pytest.approx(50.0)
+
+
+def test_sell_takes_the_bids_and_keeps_its_size(book):
+    assert price_order(0.48, 150.0, SELL, TOKEN) == (0.47, 150.0)
+
+
+def test_order_is_skipped_when_the_book_moved_past_the_cap(book):
+    assert price_order(0.45, 10.0, BUY, TOKEN) is None
+    assert price_order(0.52, 10.0, SELL, TOKEN) is None
+
+
+def test_trader_price_is_used_without_a_synced_book(book):
+    book.invalidate()
+    assert price_order(0.50, 20.0, BUY, TOKEN) == (0.50, 20.0)
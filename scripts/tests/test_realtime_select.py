@@ -0,0 +1,18 @@
+import realtime_listener
+
+
+class NewChannel:
+    def on_postgres_changes(self, event, callback, table=None, schema=None, filter=None, select=None):
+        pass
+
+
+class OldChannel:
+    def on_postgres_changes(self, event, callback, table=None, schema=None, filter=None):
+        pass
+
+
+def test_select_is_only_passed_to_clients_that_accept_it(monkeypatch):
+    monkeypatch.setattr(realtime_listener, "_select_supported", None)
+    assert realtime_listener._accepts_select(OldChannel()) is False
+    monkeypatch.setattr(realtime_listener, "_select_supported", None)
+    assert realtime_listener._accepts_select(NewChannel()) is True
@@ -0,0 +1,93 @@
+import pytest
+
+from constraints.risk import RiskEngine
+
+
+def make_engine(**overrides):
+    params = dict(bankroll=100.0, stake_min=5.0, stake_max=20.0)
+    params.update(overrides)
+    return RiskEngine(**params)
+
+
+def test_intents_are_not_raised_to_stake_min():
+    risk = make_engine()
+    stakes = [risk.size_buy("t1", 0.5) for _ in range(4)]
+    assert stakes == [0.5] * 4
+    assert risk.total == pytest.approx(2.0)
+
+
+def test_intent_is_capped_at_stake_max_and_headroom():
+    risk = make_engine(bankroll=30.0)
+    assert risk.size_buy("t1", 50.0) == 20.0
+    assert risk.size_buy("t2", 50.0) == pytest.approx(10.0)
+    assert risk.size_buy("t3", 5.0) == 0.0
+    assert risk.clamped == 1
+    assert risk.rejected == 1
+
+
+def test_clamp_order_tops_up_merged_order_to_stake_min():
+    risk = make_engine()
+    reserved = sum(risk.size_buy("t1", 0.5) for _ in range(4))
+    assert risk.clamp_order("t1", reserved) == 5.0
+    assert risk.stats()['reserved'] == pytest.approx(5.0)
+
+
+def test_clamp_order_releases_above_stake_max():
+    risk = make_engine()
+    reserved = sum(risk.size_buy("t1", 15.0) for _ in range(2))
+    assert risk.clamp_order("t1", reserved) == 20.0
+    assert risk.total == pytest.approx(20.0)
+
+
+def test_clamp_order_top_up_is_limited_by_headroom():
+    risk = make_engine(bankroll=3.0)
+    reserved = risk.size_buy("t1", 2.0)
+    assert risk.clamp_order("t1", reserved) == pytest.approx(3.0)
+    assert risk.total == pytest.approx(3.0)
+    assert risk.clamped == 1
+
+
+def test_market_and_event_caps():
+    risk = make_engine(max_market_usdc=25.0, max_event_usdc=30.0)
+    assert risk.size_buy("yes", 20.0, market="m1", event="e1") == 20.0
+    assert risk.size_buy("no", 20.0, market="m1", event="e1") == pytest.approx(5.0)
+    assert risk.size_buy("other", 20.0, market="m2", event="e1") == pytest.approx(5.0)
+    assert risk.market_exposure("m1") == pytest.approx(25.0)
+    assert risk.event_exposure("e1") == pytest.approx(30.0)
+
+
+def test_settle_moves_reservation_to_committed():
+    risk = make_engine()
+    stake = risk.size_buy("t1", 10.0)
+    risk.settle("t1", reserved=stake, committed=9.5)
+    assert risk.stats()['reserved'] == 0
+    assert risk.total == pytest.approx(9.5)
+
+
+def test_release_never_goes_below_zero():
+    risk = make_engine()
+    risk.size_buy("t1", 4.0)
+    risk.release("t1", 10.0)
+    assert risk.total == pytest.approx(0.0)
+    assert risk.stats()['reserved'] == 0
+
+
+def test_apply_sell_frees_cost_pro_rata():
+    risk = make_engine()
+    risk.settle("t1", reserved=0.0, committed=10.0)
+    risk.apply_sell("t1", size=25.0, held=100.0)
+    assert risk.total == pytest.approx(7.5)
+
+
+def test_seed_replaces_committed_and_keeps_reservations():
+    risk = make_engine()
+    risk.settle("t1", reserved=0.0, committed=10.0)
+    risk.size_buy("t2", 3.0)
+    risk.seed([{'asset': 't3', 'condition_id': 'm3', 'event_slug': 'e3', 'initial_value': 7.0}])
+    assert risk.total == pytest.approx(10.0)
+    assert risk.market_exposure("m3") == pytest.approx(7.0)
+
+
+def test_size_batch_uses_headroom_in_order():
+    risk = make_engine(bankroll=25.0)
+    assert risk.size_batch([("a", 15.0, None, None), ("b", 15.0, None, None)]) == [15.0, pytest.approx(10.0)]
@@ -0,0 +1,37 @@
+import asyncio
+
+from constraints.risk import RiskEngine
+from order_coalescer import OrderCoalescer
+from wallet_registry import TrackedWallet
+
+
+def test_stake_bounds_only_when_overridden():
+    assert TrackedWallet("0xa").stake_bounds is None
+    assert TrackedWallet("0xa", stake_max=50.0).stake_bounds == (None, 50.0)
+    wallet = TrackedWallet.from_dict({'address': "0xb", 'stake_min': "2", 'stake_max': ""})
+    assert wallet.stake_bounds == (2.0, None)
+
+
+def test_risk_engine_applies_wallet_bounds():
+    risk = RiskEngine(bankroll=1000.0, stake_min=5.0, stake_max=20.0)
+    assert risk.size_buy("t1", 80.0, stake_max=50.0) == 50.0
+    assert risk.clamp_order("t1", 50.0, None, 40.0) == 40.0
+    assert risk.clamp_order("t2", 0.0, 1.0, None) == 1.0
+    assert risk.total == 41.0
+
+
+def test_intents_with_different_bounds_are_not_merged():
+    placed = []
+
+    async def execute(token_id, side, price, size, traces, reserved, bounds):
+        placed.append((size, reserved, bounds))
+
+    async def run():
+        coalescer = OrderCoalescer(execute, window=0.05, min_usdc=1.0)
+        await coalescer.add("t1", "BUY", 4.0, 0.5, reserved=2.0)
+        await coalescer.add("t1", "BUY", 4.0, 0.5, reserved=2.0)
+        await coalescer.add("t1", "BUY", 6.0, 0.5, reserved=3.0, bounds=(1.0, 50.0))
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+    assert sorted(placed, key=str) == [(6.0, 3.0, (1.0, 50.0)), (8.0, 4.0, None)]
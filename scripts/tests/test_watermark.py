@@ -0,0 +1,54 @@
+from watermark import Watermark, WatermarkStore, activity_key
+
+
+def activity(tx: str, timestamp: int) -> dict:
+    return {'transaction_hash': tx, 'condition_id': "0xc", 'price': 0.5, 'timestamp': timestamp}
+
+
+def test_activity_key_matches_unique_activity_key():
+    assert activity_key({'transaction_hash': "0xa", 'price': None}) == "0xa_null_null"
+    assert activity_key(activity("0xa", 1)) == "0xa_0xc_0.5"
+
+
+def test_advance_keeps_keys_of_the_newest_timestamp():
+    watermark = Watermark()
+    assert watermark.is_empty
+    watermark.advance([activity("a", 10), activity("b", 20), activity("c", 20)])
+    assert watermark.timestamp == 20
+    assert watermark.seen == {activity_key(activity("b", 20)), activity_key(activity("c", 20))}
+
+
+def test_is_new_at_and_past_the_watermark():
+    watermark = Watermark()
+    watermark.advance([activity("a", 10), activity("b", 20)])
+    assert not watermark.is_new(activity("old", 5))
+    assert not watermark.is_new(activity("b", 20))
+    assert watermark.is_new(activity("c", 20))
+    assert watermark.is_new(activity("d", 21))
+
+
+def test_advance_stops_before_the_oldest_failed_row():
+    rows = [activity("a", 10), activity("b", 20), activity("c", 20), activity("d", 30), activity("e", 40)]
+    watermark = Watermark()
+    watermark.advance(rows, failed=[activity("e", 40), activity("c", 20)])
+    assert watermark.timestamp == 20
+    # The failed row and everything after it are fetched again
+    assert [row['transaction_hash'] for row in rows if watermark.is_new(row)] == ["c", "d", "e"]
+
+
+def test_advance_without_failures_passes_every_row():
+    watermark = Watermark(10, {activity_key(activity("a", 10))})
+    watermark.advance([activity("b", 10), activity("c", 15)], failed=[])
+    assert watermark.timestamp == 15
+    assert watermark.seen == {activity_key(activity("c", 15))}
+
+
+def test_store_round_trip(tmp_path):
+    store = WatermarkStore(str(tmp_path))
+    watermark = Watermark()
+    watermark.advance([activity("a", 10), activity("b", 10)])
+    store.save("0xABC", watermark)
+    loaded = store.load("0xabc")
+    assert loaded.timestamp == 10
+    assert loaded.seen == watermark.seen
+    assert store.load("0xother").is_empty
@@ -0,0 +1,67 @@
+import asyncio
+
+from get_player_history_new import ActivityWriteError
+from write_behind import WriteBehindBuffer
+
+
+class FlakyWriter:
+    """Writes every row but the ones in bad, like insert_activities_batch"""
+
+    def __init__(self, bad=(), down=False):
+        self.bad = set(bad)
+        self.down = down
+        self.written = []
+
+    def __call__(self, rows):
+        if self.down:
+            raise ConnectionError("storage unreachable")
+        failed = [row for row in rows if row in self.bad]
+        self.written.extend(row for row in rows if row not in self.bad)
+        if failed:
+            raise ActivityWriteError(failed, inserted=len(rows) - len(failed))
+
+
+def test_only_failed_rows_are_requeued():
+    writer = FlakyWriter(bad={3, 5})
+    buffer = WriteBehindBuffer(writer, batch_size=10)
+    buffer.add(list(range(8)))
+    assert asyncio.run(buffer.flush()) is False
+    assert writer.written == [0, 1, 2, 4, 6, 7]
+    assert buffer._pending == [3, 5]
+    assert buffer.written == 6
+
+    writer.bad.clear()
+    assert asyncio.run(buffer.flush()) is True
+    assert buffer.pending == 0
+    assert sorted(writer.written) == list(range(8))
+
+
+def test_failed_batch_is_requeued_in_front():
+    writer = FlakyWriter(down=True)
+    buffer = WriteBehindBuffer(writer, batch_size=3)
+    buffer.add([1, 2, 3, 4])
+    assert asyncio.run(buffer.flush()) is False
+    assert buffer._pending == [1, 2, 3, 4]
+    assert buffer.failed_flushes == 1
+
+
+def test_overflow_drops_oldest_rows():
+    buffer = WriteBehindBuffer(FlakyWriter(), max_pending=3)
+    buffer.add([1, 2, 3, 4, 5])
+    assert buffer._pending == [3, 4, 5]
+    assert buffer.dropped == 2
+
+
+def test_stop_writes_everything_pending():
+    writer = FlakyWriter()
+
+    async def run():
+        buffer = WriteBehindBuffer(writer, batch_size=2, flush_interval=60)
+        await buffer.start()
+        buffer.add([1, 2, 3, 4, 5])
+        await buffer.stop()
+        return buffer
+
+    buffer = asyncio.run(run())
+    assert buffer.pending == 0
+    assert sorted(writer.written) == [1, 2, 3, 4, 5]
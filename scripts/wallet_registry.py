@@ -0,0 +1,142 @@
+"""
+Wallet Registry Module for Polymarket Copytrading Bot
+
+Lists the trader wallets to copy and their per-wallet sizing overrides.
+Wallets are read from, in order (later sources override earlier ones):
+  - TRADER_WALLET: the single wallet, as before
+  - TRADER_WALLETS: comma separated "address" or "address:stake_whale_pct"
+  - TRADER_WALLETS_FILE: JSON list of objects, or one address per line
+  - TABLE_NAME_WALLETS: Supabase table (see supabase/create_table.sql)
+"""
+
+import json
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class TrackedWallet:
+    """One trader wallet to copy and its sizing overrides (None = use global config)"""
+
+    def __init__(
+        self,
+        address: str,
+        label: Optional[str] = None,
+        stake_whale_pct: Optional[float] = None,
+        stake_min: Optional[float] = None,
+        stake_max: Optional[float] = None,
+    ):
+        self.address = address.strip()
+        self.label = label or self.address[:10]
+        self.stake_whale_pct = stake_whale_pct
+        self.stake_min = stake_min
+        self.stake_max = stake_max
+
+    @property
+    def key(self) -> str:
+        return self.address.lower()
+
+    @property
+    def stake_bounds(self) -> Optional[Tuple[Optional[float], Optional[float]]]:
+        """(stake_min, stake_max) overrides, None when both use the global ones"""
+        if self.stake_min is None and self.stake_max is None:
+            return None
+        return self.stake_min, self.stake_max
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TrackedWallet":
+        def _float(name):
+            value = data.get(name)
+            return float(value) if value not in (None, "") else None
+
+        return cls(
+            address=data.get('proxy_wallet') or data.get('address'),
+            label=data.get('label'),
+            stake_whale_pct=_float('stake_whale_pct'),
+            stake_min=_float('stake_min'),
+            stake_max=_float('stake_max'),
+        )
+
+    def __repr__(self) -> str:
+        return f"TrackedWallet({self.label}, pct={self.stake_whale_pct})"
+
+
+class WalletRegistry:
+    """Tracked wallets indexed by lowercase address"""
+
+    def __init__(self, wallets: List[TrackedWallet]):
+        self._wallets: Dict[str, TrackedWallet] = {}
+        for wallet in wallets:
+            if wallet.address:
+                self._wallets[wallet.key] = wallet
+
+    def get(self, address: Optional[str]) -> Optional[TrackedWallet]:
+        """Look up a tracked wallet, None if it is not tracked"""
+        if not address:
+            return None
+        return self._wallets.get(address.lower())
+
+    def __contains__(self, address: str) -> bool:
+        return self.get(address) is not None
+
+    def __iter__(self) -> Iterator[TrackedWallet]:
+        return iter(self._wallets.values())
+
+    def __len__(self) -> int:
+        return len(self._wallets)
+
+    @property
+    def addresses(self) -> List[str]:
+        return [wallet.address for wallet in self]
+
+
+def parse_wallet_list(value: str) -> List[TrackedWallet]:
+    """Parse "addr1,addr2:0.002" into tracked wallets"""
+    wallets = []
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        address, _, pct = entry.partition(":")
+        wallets.append(TrackedWallet(address, stake_whale_pct=float(pct) if pct else None))
+    return wallets
+
+
+def load_wallet_file(path: str) -> List[TrackedWallet]:
+    """Load wallets from a JSON list or a plain text file (one address per line)"""
+    with open(path) as f:
+        content = f.read()
+    try:
+        data = json.loads(content)
+    except ValueError:
+        lines = [line.split("#")[0].strip() for line in content.splitlines()]
+        return parse_wallet_list(",".join(line for line in lines if line))
+    return [
+        TrackedWallet(item) if isinstance(item, str) else TrackedWallet.from_dict(item)
+        for item in data
+    ]
+
+
+def load_wallet_table(supabase, table_name: str) -> List[TrackedWallet]:
+    """Load the enabled wallets from a Supabase table"""
+    response = supabase.table(table_name).select("*").eq("enabled", True).execute()
+    return [TrackedWallet.from_dict(row) for row in response.data or []]
+
+
+def load_wallet_registry(config, supabase=None) -> WalletRegistry:
+    """
+    Build the registry from every configured source
+
+    Args:
+        config: The bot configuration
+        supabase: Sync Supabase client to read TABLE_NAME_WALLETS with (the table is skipped without one)
+    """
+    wallets = []
+    if config.TRADER_WALLET:
+        wallets.append(TrackedWallet(config.TRADER_WALLET))
+    # Later sources override earlier ones for the same address
+    if config.TRADER_WALLETS:
+        wallets += parse_wallet_list(config.TRADER_WALLETS)
+    if config.TRADER_WALLETS_FILE:
+        wallets += load_wallet_file(config.TRADER_WALLETS_FILE)
+    if config.TABLE_NAME_WALLETS and supabase is not None:
+        wallets += load_wallet_table(supabase, config.TABLE_NAME_WALLETS)
+    return WalletRegistry(wallets)
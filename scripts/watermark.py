@@ -0,0 +1,106 @@
+"""
+Watermark Module for Polymarket Copytrading Bot
+
+Remembers the newest activity already ingested for a wallet so the poller
+only requests and stores activity it has not seen yet. Watermarks are
+persisted as small JSON files so a restart resumes where it stopped.
+"""
+
+import json
+import os
+from typing import Iterable, Optional
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def activity_key(activity: dict) -> str:
+    """
+    Build the local equivalent of the unique_activity_key column
+
+    Args:
+        activity: Activity in database format
+    """
+    condition_id = activity.get('condition_id') or 'null'
+    price = activity.get('price')
+    return f"{activity.get('transaction_hash')}_{condition_id}_{'null' if price is None else price}"
+
+
+class Watermark:
+    """Newest timestamp seen for a wallet and the activity keys at that timestamp"""
+
+    def __init__(self, timestamp: int = 0, seen: Optional[Iterable[str]] = None):
+        self.timestamp = timestamp
+        self.seen = set(seen or ())
+
+    @property
+    def is_empty(self) -> bool:
+        return self.timestamp == 0
+
+    def is_new(self, activity: dict) -> bool:
+        """Check if a database-format activity is newer than the watermark"""
+        ts = activity.get('timestamp') or 0
+        if ts != self.timestamp:
+            return ts > self.timestamp
+        return activity_key(activity) not in self.seen
+
+    def advance(self, activities: Iterable[dict], failed: Iterable[dict] = ()):
+        """
+        Move the watermark forward past the given activities
+
+        Activities that could not be stored are passed as failed: the
+        watermark then stops short of the oldest of them, so the next fetch
+        returns them (and the rows after them, already stored) again.
+        """
+        failed_keys = {activity_key(activity): activity.get('timestamp') or 0 for activity in failed}
+        if failed_keys:
+            stop = min(failed_keys.values())
+            activities = [
+                activity for activity in activities
+                if (activity.get('timestamp') or 0) <= stop and activity_key(activity) not in failed_keys
+            ]
+        for activity in activities:
+            ts = activity.get('timestamp') or 0
+            if ts > self.timestamp:
+                self.timestamp = ts
+                self.seen = {activity_key(activity)}
+            elif ts == self.timestamp:
+                self.seen.add(activity_key(activity))
+
+    def to_dict(self) -> dict:
+        return {'timestamp': self.timestamp, 'seen': sorted(self.seen)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Watermark":
+        return cls(timestamp=int(data.get('timestamp', 0)), seen=data.get('seen', []))
+
+
+class WatermarkStore:
+    """Persists one watermark per wallet as a JSON file under a state directory"""
+
+    def __init__(self, state_dir: str, name: str = "activity"):
+        self.state_dir = state_dir
+        self.name = name
+
+    def _path(self, wallet: str) -> str:
+        return os.path.join(self.state_dir, f"{self.name}_watermark_{wallet.lower()}.json")
+
+    def load(self, wallet: str) -> Watermark:
+        """Load a wallet's watermark, or an empty one if none was saved"""
+        try:
+            with open(self._path(wallet)) as f:
+                return Watermark.from_dict(json.load(f))
+        except FileNotFoundError:
+            return Watermark()
+        except (OSError, ValueError) as e:
+            logger.warning("⚠️  Could not read watermark", wallet=wallet, error=str(e))
+            return Watermark()
+
+    def save(self, wallet: str, watermark: Watermark):
+        """Atomically write a wallet's watermark"""
+        os.makedirs(self.state_dir, exist_ok=True)
+        path = self._path(wallet)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(watermark.to_dict(), f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,120 @@
+"""
+Write-Behind Module for Polymarket Copytrading Bot
+
+Buffers rows that must be persisted but are not on the copy path, and
+writes them in batches from a background task. Used when activities go
+straight from the poller to the order pipeline, so Supabase latency never
+delays an order.
+"""
+
+import asyncio
+import time
+from typing import Callable, Optional
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class WriteBehindBuffer:
+    """
+    Batches rows and hands them to a (blocking) batch writer off the event loop
+
+    Rows are flushed when batch_size rows are waiting or every flush_interval
+    seconds. A failed flush keeps its rows for the next attempt, up to
+    max_pending rows; beyond that the oldest rows are dropped and counted.
+    A writer that raises an exception with a rows attribute wrote the rest
+    of the batch, and only those rows are kept.
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[list], object],
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_pending: int = 50000,
+        name: str = "write-behind",
+    ):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.name = name
+        self._pending = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def add(self, rows: list):
+        """Queue rows for writing without blocking"""
+        self._pending.extend(rows)
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            self.dropped += overflow
+            logger.warning("⚠️  Buffer full, dropped oldest rows", buffer=self.name, dropped=overflow)
+        if self._wakeup is not None and len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def start(self):
+        """Start the background flush task"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self):
+        """Stop the flush task and write whatever is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while self._pending:
+            if not await self.flush():
+                logger.error("❌ Rows not written on shutdown", buffer=self.name, pending=len(self._pending))
+                break
+
+    async def flush(self) -> bool:
+        """Write one batch, returning False if the writer failed"""
+        if not self._pending:
+            return True
+        batch = self._pending[:self.batch_size]
+        del self._pending[:len(batch)]
+        started_at = time.perf_counter()
+        try:
+            await asyncio.to_thread(self.writer, batch)
+        except Exception as e:
+            self.failed_flushes += 1
+            failed = getattr(e, 'rows', None)
+            if failed is None:
+                logger.exception("❌ Batch write failed", buffer=self.name, rows=len(batch))
+                failed = batch
+            else:
+                self.written += len(batch) - len(failed)
+                logger.error("❌ Rows not written, retrying them", buffer=self.name, rows=len(batch), failed=len(failed))
+            # Put the failed rows back in front for the next attempt
+            self._pending[:0] = failed
+            return False
+        self.written += len(batch)
+        logger.debug(
+            "💾 Batch written", buffer=self.name, rows=len(batch),
+            ms=round((time.perf_counter() - started_at) * 1000, 1), pending=len(self._pending),
+        )
+        return True
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._pending:
+                if not await self.flush():
+                    break
+                if len(self._pending) < self.batch_size:
+                    break
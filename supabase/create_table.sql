@@ -67,4 +67,31 @@ GENERATED ALWAYS AS (
     COALESCE(price::text, 'null')
 ) STORED;
 
-CREATE UNIQUE INDEX idx_unique_activity_key ON historic_trades (unique_activity_key);
\ No newline at end of file
+CREATE UNIQUE INDEX idx_unique_activity_key ON historic_trades (unique_activity_key);
+
+-- Bump updated_at on every position write; after a realtime reconnect the
+-- bot backfills missed position changes ordered by it. clock_timestamp()
+-- keeps rows of one upsert apart.
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = clock_timestamp();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER polymarket_positions_set_updated_at
+BEFORE INSERT OR UPDATE ON polymarket_positions
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+CREATE INDEX idx_positions_updated_at ON polymarket_positions (updated_at);
+
+-- Optional: wallets to copy (set TABLE_NAME_WALLETS=tracked_wallets)
+CREATE TABLE tracked_wallets (
+    proxy_wallet        CHAR(42)        PRIMARY KEY,
+    label               VARCHAR(255)    NULL,
+    stake_whale_pct     NUMERIC(10, 6)  NULL,
+    stake_min           NUMERIC(24, 6)  NULL,
+    stake_max           NUMERIC(24, 6)  NULL,
+    enabled             BOOLEAN         NOT NULL DEFAULT TRUE,
+    created_at          TIMESTAMPTZ     NOT NULL DEFAULT NOW()
+);